@@ -26,6 +26,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from src.simplified_traffic import (
     generate_network_and_routes, 
+    get_cached_scenario,
     save_optimized_solution, 
     load_solution,
     evaluate_solution_with_new_seed
@@ -35,7 +36,14 @@ from src.optimization.simple_aco import (
     create_baseline_solution, 
     evaluate_solution, 
     calculate_cost,
-    run_traditional_aco_optimization
+    run_traditional_aco_optimization,
+    paired_difference_stats,
+    describe_paired_difference
+)
+from src.optimization.robust_aco import (
+    generate_multi_seed_scenarios,
+    cleanup_scenario_files,
+    evaluate_batch
 )
 
 # ============================================================================
@@ -54,6 +62,8 @@ ALPHA = 1.0            # Pheromone importance weight
 BETA = 2.0             # Heuristic importance weight
 EVAPORATION_RATE = 0.1 # Pheromone evaporation rate
 EXPLORATION_RATE = 0.15 # Pure exploration probability
+N_WORKERS = 4           # Concurrent SUMO runs for cross-seed evaluation
+COMMON_RANDOM_NUMBERS = True  # Same SUMO seed for optimized and baseline on each test seed (paired comparison)
 
 # Analysis Configuration
 TRAINING_SEED = 42      # Seed for training each pattern
@@ -91,8 +101,8 @@ def evaluate_baseline_on_seed(test_seed, pattern, grid_size, n_vehicles, sim_tim
         Dictionary with baseline evaluation results
     """
     try:
-        # Generate scenario with test seed
-        scenario = generate_network_and_routes(
+        # Scenario with test seed (read-only paths from the scenario store)
+        scenario = get_cached_scenario(
             grid_size=grid_size,
             n_vehicles=n_vehicles,
             sim_time=sim_time,
@@ -114,7 +124,9 @@ def evaluate_baseline_on_seed(test_seed, pattern, grid_size, n_vehicles, sim_tim
             baseline_solution, 
             scenario['files']['network'], 
             scenario['files']['routes'], 
-            temp_dir
+            temp_dir,
+            sim_time=sim_time,
+            n_vehicles=n_vehicles
         )
         
         cost = calculate_cost(metrics)
@@ -179,34 +191,7 @@ def run_aco_for_pattern(pattern, training_seed):
         # Run ACO optimization using the traditional ACO function
         start_time = time.time()
         
-        # Temporarily modify global parameters for this run
-        import src.optimization.simple_aco as aco_module
-        original_grid = aco_module.GRID_SIZE
-        original_vehicles = aco_module.N_VEHICLES
-        original_sim_time = aco_module.SIMULATION_TIME
-        original_ants = aco_module.N_ANTS
-        original_iterations = aco_module.N_ITERATIONS
-        original_evap = aco_module.EVAPORATION_RATE
-        original_explore = aco_module.EXPLORATION_RATE
-        original_alpha = aco_module.ALPHA
-        original_beta = aco_module.BETA
-        original_show_progress = aco_module.SHOW_PROGRESS
-        original_show_plots = aco_module.SHOW_PLOTS
-        
-        # Apply configuration
-        aco_module.GRID_SIZE = GRID_SIZE
-        aco_module.N_VEHICLES = N_VEHICLES
-        aco_module.SIMULATION_TIME = SIMULATION_TIME
-        aco_module.N_ANTS = N_ANTS
-        aco_module.N_ITERATIONS = N_ITERATIONS
-        aco_module.EVAPORATION_RATE = EVAPORATION_RATE
-        aco_module.EXPLORATION_RATE = EXPLORATION_RATE
-        aco_module.ALPHA = ALPHA
-        aco_module.BETA = BETA
-        aco_module.SHOW_PROGRESS = True  # Reduce noise
-        aco_module.SHOW_PLOTS = False 
-        
-        # Run optimization
+        # Run optimization (all parameters travel in config, no module globals are patched)
         results = run_traditional_aco_optimization(
             config=config,
             show_plots_override=False,
@@ -214,19 +199,6 @@ def run_aco_for_pattern(pattern, training_seed):
             compare_baseline=True
         )
         
-        # Restore original parameters
-        aco_module.GRID_SIZE = original_grid
-        aco_module.N_VEHICLES = original_vehicles
-        aco_module.SIMULATION_TIME = original_sim_time
-        aco_module.N_ANTS = original_ants
-        aco_module.N_ITERATIONS = original_iterations
-        aco_module.EVAPORATION_RATE = original_evap
-        aco_module.EXPLORATION_RATE = original_explore
-        aco_module.ALPHA = original_alpha
-        aco_module.BETA = original_beta
-        aco_module.SHOW_PROGRESS = original_show_progress
-        aco_module.SHOW_PLOTS = original_show_plots
-        
         training_time = time.time() - start_time
         
         if results['success']:
@@ -271,59 +243,40 @@ def evaluate_cross_seed_performance(pattern_results, pattern):
     baseline_costs = []
     successful_evaluations = 0
     
-    for i, test_seed in enumerate(TEST_SEEDS, 1):
-        print_progress(f"Testing seed {test_seed} ({i}/{len(TEST_SEEDS)})", 1)
-        
-        try:
-            # Generate test scenario
-            scenario = generate_network_and_routes(
-                grid_size=GRID_SIZE,
-                n_vehicles=N_VEHICLES,
-                sim_time=SIMULATION_TIME,
-                pattern=pattern,
-                seed=test_seed
-            )
-            
-            if not scenario['success']:
-                print_progress(f"⚠️ Scenario generation failed for seed {test_seed}", 2)
-                continue
-            
-            # Evaluate optimized solution
-            temp_dir = f"temp_opt_{pattern}_{test_seed}"
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            opt_metrics = evaluate_solution(
-                pattern_results['best_solution'],
-                scenario['files']['network'],
-                scenario['files']['routes'],
-                temp_dir
-            )
-            opt_cost = calculate_cost(opt_metrics)
-            
-            # Evaluate baseline solution
-            baseline_result = evaluate_baseline_on_seed(
-                test_seed, pattern, GRID_SIZE, N_VEHICLES, SIMULATION_TIME, 
-                pattern_results['phase_types']
-            )
-            
-            # Cleanup
-            import shutil
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+    # Generate every test scenario up front (one directory per seed)
+    base_config = {
+        'grid_size': GRID_SIZE,
+        'n_vehicles': N_VEHICLES,
+        'simulation_time': SIMULATION_TIME,
+        'traffic_pattern': pattern
+    }
+    scenarios = generate_multi_seed_scenarios(base_config, TEST_SEEDS)
+    
+    # Optimized and baseline solutions on all seeds as one batch
+    baseline_solution = create_baseline_solution(pattern_results['phase_types'], green_duration=30, yellow_duration=4)
+    temp_dir = f"temp_opt_{pattern}"
+    os.makedirs(temp_dir, exist_ok=True)
+    try:
+        costs, _ = evaluate_batch([pattern_results['best_solution'], baseline_solution], scenarios, temp_dir,
+                                  workers=N_WORKERS, sim_time=SIMULATION_TIME,
+                                  common_random_numbers=COMMON_RANDOM_NUMBERS)
+    finally:
+        import shutil
+        if os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir)
+        cleanup_scenario_files(scenarios)
+    
+    for scenario, opt_cost, base_cost in zip(scenarios, costs[0], costs[1]):
+        test_seed = scenario['seed']
+        if np.isfinite(opt_cost) and np.isfinite(base_cost):
+            optimized_costs.append(float(opt_cost))
+            baseline_costs.append(float(base_cost))
+            successful_evaluations += 1
             
-            if baseline_result['success'] and opt_cost != float('inf'):
-                optimized_costs.append(opt_cost)
-                baseline_costs.append(baseline_result['cost'])
-                successful_evaluations += 1
-                
-                improvement = ((baseline_result['cost'] - opt_cost) / baseline_result['cost']) * 100
-                print_progress(f"✅ Opt: {opt_cost:.1f}, Base: {baseline_result['cost']:.1f}, Improvement: {improvement:+.1f}%", 2)
-            else:
-                error_msg = baseline_result.get('error', 'Invalid optimized cost')
-                print_progress(f"❌ Evaluation failed: {error_msg}", 2)
-                
-        except Exception as e:
-            print_progress(f"❌ Error with seed {test_seed}: {e}", 2)
+            improvement = ((base_cost - opt_cost) / base_cost) * 100
+            print_progress(f"✅ Seed {test_seed}: Opt: {opt_cost:.1f}, Base: {base_cost:.1f}, Improvement: {improvement:+.1f}%", 2)
+        else:
+            print_progress(f"❌ Evaluation failed for seed {test_seed}", 2)
     
     # Calculate statistics
     if successful_evaluations > 0:
@@ -333,11 +286,13 @@ def evaluate_cross_seed_performance(pattern_results, pattern):
         std_base_cost = np.std(baseline_costs)
         
         overall_improvement = ((avg_base_cost - avg_opt_cost) / avg_base_cost) * 100
+        paired = paired_difference_stats(optimized_costs, baseline_costs)
         
         print_progress(f"📊 {pattern} Cross-Seed Results ({successful_evaluations}/{len(TEST_SEEDS)} successful):", 1)
         print_progress(f"   Optimized: μ={avg_opt_cost:.1f}, σ={std_opt_cost:.1f}", 2)
         print_progress(f"   Baseline:  μ={avg_base_cost:.1f}, σ={std_base_cost:.1f}", 2)
         print_progress(f"   Overall improvement: {overall_improvement:+.1f}%", 2)
+        print_progress(f"   Paired (optimized − baseline): {describe_paired_difference(paired)}", 2)
         
         return {
             'success': True,
@@ -349,7 +304,8 @@ def evaluate_cross_seed_performance(pattern_results, pattern):
             'avg_baseline_cost': avg_base_cost,
             'std_optimized_cost': std_opt_cost,
             'std_baseline_cost': std_base_cost,
-            'overall_improvement': overall_improvement
+            'overall_improvement': overall_improvement,
+            'paired_difference': paired
         }
     else:
         print_progress(f"❌ No successful evaluations for {pattern}", 1)
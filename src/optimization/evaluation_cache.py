@@ -0,0 +1,198 @@
+"""
+Content-Addressed Evaluation Cache
+
+Memoizes SUMO evaluation results for (solution, scenario) pairs so repeated ants,
+baseline comparisons and re-evaluations do not re-run identical simulations.
+
+The cache key combines:
+- The phase duration tuple
+- Content hashes of the network, route and vehicle type files
+- The simulation settings that influence the result (end time, teleport, backend)
+
+Two tiers are supported: an in-memory LRU and an optional SQLite database that
+persists across runs.
+
+Author: Traffic Optimization System
+Date: August 2025
+"""
+
+import os
+import json
+import numbers
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 4096      # Entries kept in the in-memory LRU tier
+
+# ============================================================================
+# KEY CONSTRUCTION
+# ============================================================================
+
+_digest_memo = {}
+_digest_lock = threading.Lock()
+
+def file_digest(path):
+    """
+    Return the SHA-256 of a file's contents (None if the file does not exist).
+
+    Digests are memoized by (path, size, mtime) so large network files are only
+    hashed once per process.
+    """
+    if not path or not os.path.exists(path):
+        return None
+
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        if memo_key in _digest_memo:
+            return _digest_memo[memo_key]
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+def make_cache_key(solution, net_file, route_file, vtype_file=None, settings=None):
+    """
+    Build a content-addressed key for one (solution, scenario, settings) evaluation.
+
+    Args:
+        solution: Phase durations
+        net_file: SUMO network file
+        route_file: SUMO route file
+        vtype_file: Vehicle type file (defaults to vtype.add.xml next to the routes)
+        settings: Dictionary of simulation settings that affect the result
+
+    Returns:
+        Hex digest string
+    """
+    if vtype_file is None and route_file:
+        vtype_file = os.path.join(os.path.dirname(os.path.abspath(route_file)), 'vtype.add.xml')
+
+    payload = {
+        'durations': [int(d) for d in solution],
+        'net': file_digest(net_file),
+        'routes': file_digest(route_file),
+        'vtypes': file_digest(vtype_file),
+        'settings': settings or {}
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+# ============================================================================
+# TWO-TIER CACHE
+# ============================================================================
+
+def scalar_metrics(metrics):
+    """
+    The scalar fields of a metrics dict (numbers, strings, flags).
+
+    Per-vehicle lists such as 'completed_ids' grow with the vehicle count and
+    would otherwise be kept in every LRU entry and serialized into SQLite.
+    """
+    return {key: value.item() if hasattr(value, 'item') else value for key, value in metrics.items()
+            if value is None or isinstance(value, (numbers.Number, str))}
+
+class EvaluationCache:
+    """
+    In-memory LRU cache with an optional SQLite tier that survives between runs.
+
+    Thread-safe, so it can sit in front of parallel evaluations.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, db_path=None):
+        self.max_entries = max(1, int(max_entries))
+        self.db_path = db_path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS evaluations (key TEXT PRIMARY KEY, metrics TEXT NOT NULL)'
+            )
+            self._db.commit()
+
+    def _remember(self, key, metrics):
+        """Insert into the LRU tier, evicting the least recently used entry."""
+        self._memory[key] = metrics
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return a copy of the cached metrics for key, or None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return dict(self._memory[key])
+
+            if self._db is not None:
+                row = self._db.execute('SELECT metrics FROM evaluations WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    metrics = json.loads(row[0])
+                    self._remember(key, metrics)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return dict(metrics)
+
+            self.misses += 1
+            return None
+
+    def put(self, key, metrics):
+        """
+        Store metrics for key.
+
+        Failed evaluations (infinite travel time) are not cached since they are
+        often caused by transient problems such as timeouts. Raced-out partial
+        results depend on the incumbent at the time and are not cached either.
+        Only the scalar fields are stored (see scalar_metrics).
+        """
+        if metrics.get('total_time', float('inf')) == float('inf') or metrics.get('partial'):
+            return
+
+        stored = scalar_metrics(metrics)
+        with self._lock:
+            self._remember(key, stored)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO evaluations (key, metrics) VALUES (?, ?)',
+                    (key, json.dumps(stored))
+                )
+                self._db.commit()
+
+    def stats(self):
+        """Return hit/miss counters for reporting."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._memory)
+            }
+
+    def close(self):
+        """Close the SQLite tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
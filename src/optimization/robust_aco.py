@@ -25,14 +25,20 @@ import matplotlib.pyplot as plt
 import time
 import random
 import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 
 # Import functions from the original ACO
+from . import simple_aco
 from .simple_aco import (
     print_progress, get_project_paths, analyze_traffic_light_phases,
     apply_solution_to_network, create_sumo_config, parse_tripinfo_file,
-    calculate_cost, create_baseline_solution, extract_files_from_sumo_config
+    calculate_cost, unfinished_cost, create_baseline_solution, extract_files_from_sumo_config,
+    make_temp_stem, write_solution_program, PheromoneMatrix,
+    paired_difference_stats, describe_paired_difference
 )
 
 # ============================================================================
@@ -43,60 +49,131 @@ from .simple_aco import (
 DEFAULT_TRAINING_SEEDS = 5     # Number of different traffic seeds to train on
 DEFAULT_VALIDATION_SEEDS = 3   # Number of seeds for final validation
 SEED_WEIGHT_STRATEGY = 'equal' # 'equal', 'performance_weighted', 'adaptive'
+SEED_RACING = False            # Successive-halving seed racing instead of every ant on every seed
+RACING_INITIAL_SEEDS = 2       # Seeds every ant is simulated on before the first elimination
+RACING_KEEP_FRACTION = 0.5     # Share of surviving ants kept after each racing round
+SEED_HISTORY_WINDOW = 5        # Iterations of per-seed costs kept for adaptive seed weighting
+KEEP_VEHICLE_IDS = False       # Debug: keep per-vehicle 'completed_ids' in retained seed metrics
 
 # ============================================================================
 # MULTI-SEED SCENARIO MANAGEMENT
 # ============================================================================
 
-def generate_multi_seed_scenarios(base_config, training_seeds):
+# Reference counts of run-private scenario directories, see cleanup_scenario_files
+_scenario_dir_refs = {}
+_scenario_dir_lock = threading.Lock()
+
+def _acquire_scenario_dir(path, count=1):
+    with _scenario_dir_lock:
+        _scenario_dir_refs[path] = _scenario_dir_refs.get(path, 0) + count
+
+def _release_scenario_dir(path):
+    """Drop one reference; the directory is deleted when the last one goes."""
+    with _scenario_dir_lock:
+        remaining = _scenario_dir_refs.get(path, 1) - 1
+        if remaining > 0:
+            _scenario_dir_refs[path] = remaining
+            return
+        _scenario_dir_refs.pop(path, None)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+def generate_multi_seed_scenarios(base_config, training_seeds, n_workers=None):
     """
     Generate multiple traffic scenarios with different seeds for robust training.
     
+    The grid network is built once and every seed's routes are generated against
+    it, n_workers seeds at a time. With the scenario store enabled the scenarios
+    are read-only store paths; otherwise the network and route sets live in
+    run-private temp directories owned by the returned scenarios (see
+    cleanup_scenario_files).
+    
     Args:
         base_config: Base scenario configuration
         training_seeds: List of seeds to generate scenarios for
+        n_workers: Seeds generated concurrently (defaults to N_WORKERS)
     
     Returns:
         List of scenario dictionaries with file paths
     """
-    from ..simplified_traffic import generate_network_and_routes
+    from .. import simplified_traffic
     
-    scenarios = []
+    grid_size = base_config['grid_size']
+    n_workers = max(1, min(n_workers or simple_aco.N_WORKERS, len(training_seeds) or 1))
+    use_store = simplified_traffic.USE_SCENARIO_CACHE
     
-    print_progress(f" Generating {len(training_seeds)} training scenarios...")
+    print_progress(f" Generating {len(training_seeds)} training scenarios on one shared network...")
     
-    for i, seed in enumerate(training_seeds):
-        print_progress(f"   Seed {i+1}/{len(training_seeds)}: {seed}")
+    if use_store:
+        def generate(seed):
+            return simplified_traffic.get_cached_scenario(grid_size, base_config['n_vehicles'],
+                                                          base_config['simulation_time'],
+                                                          base_config['traffic_pattern'], seed)
         
-        # Generate scenario with this seed
-        scenario = generate_network_and_routes(
-            grid_size=base_config['grid_size'],
-            n_vehicles=base_config['n_vehicles'],
-            sim_time=base_config['simulation_time'],
-            pattern=base_config['traffic_pattern'],
-            seed=seed,
-            output_dir=os.path.join(get_project_paths()['temp'], f'seed_{seed}')
-        )
+        # The first seed builds (or finds) the stored network the others reuse
+        first = [generate(training_seeds[0])] if training_seeds else []
+        rest = training_seeds[1:]
+        network_dir = None
+    else:
+        network_dir = os.path.join(get_project_paths()['temp'], f'network_{grid_size}x{grid_size}_{uuid.uuid4().hex[:8]}')
+        os.makedirs(network_dir, exist_ok=True)
+        net_file = os.path.join(network_dir, f'grid_{grid_size}x{grid_size}.net.xml')
+        if not simplified_traffic.generate_grid_network(grid_size, net_file):
+            print_progress("    Failed to generate the shared network")
+            shutil.rmtree(network_dir, ignore_errors=True)
+            return []
         
+        def generate(seed):
+            return simplified_traffic.generate_seed_routes(
+                net_file, os.path.join(network_dir, f'seed_{seed}'), grid_size,
+                base_config['n_vehicles'], base_config['simulation_time'], base_config['traffic_pattern'], seed)
+        
+        first = []
+        rest = training_seeds
+    
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        results = first + list(pool.map(generate, rest))
+    
+    scenarios = []
+    for i, (seed, scenario) in enumerate(zip(training_seeds, results)):
         if scenario['success']:
+            # Own seed directory first, then the shared network directory it lives in
+            owned_dirs = [] if use_store else [os.path.dirname(scenario['files']['routes']), network_dir]
             scenarios.append({
                 'seed': seed,
                 'files': scenario['files'],
-                'weight': 1.0  # Initial equal weighting
+                'weight': 1.0,  # Initial equal weighting
+                'owned_dirs': owned_dirs
             })
-            print_progress(f"    Scenario {i+1} ready")
+            print_progress(f"    Scenario {i+1} ready (seed {seed})")
         else:
             print_progress(f"    Failed to generate scenario for seed {seed}")
     
+    if not use_store:
+        # Every scenario holds one reference to the shared network
+        for scenario in scenarios:
+            _acquire_scenario_dir(scenario['owned_dirs'][0])
+        _acquire_scenario_dir(network_dir, len(scenarios))
+        if not scenarios:
+            shutil.rmtree(network_dir, ignore_errors=True)
+    
     return scenarios
 
 def cleanup_scenario_files(scenarios):
-    """Clean up temporary scenario files."""
+    """
+    Close the scenarios' persistent worker pools and release the temp
+    directories they own.
+    
+    Shared directories (the network) are reference-counted and deleted with their
+    last scenario; scenario store paths are never deleted.
+    """
+    # SUMO instances still hold the scenario files open
+    close_scenario_pools(scenarios)
     for scenario in scenarios:
         try:
-            seed_dir = os.path.dirname(scenario['files']['network'])
-            if os.path.exists(seed_dir):
-                shutil.rmtree(seed_dir)
+            for path in scenario.get('owned_dirs', []):
+                _release_scenario_dir(path)
+            scenario['owned_dirs'] = []
         except Exception as e:
             print_progress(f"  Warning: Could not clean up scenario files: {e}")
 
@@ -104,67 +181,297 @@ def cleanup_scenario_files(scenarios):
 # ROBUST EVALUATION FUNCTIONS
 # ============================================================================
 
-def evaluate_solution_multi_seed(solution, scenarios, temp_dir):
+MULTI_SEED_TIME_TO_TELEPORT = 600  # More generous teleport timeout for multi-seed
+
+def evaluate_solution_on_seed(solution, scenario, temp_dir, cache=None, sim_time=None, evaluator=None,
+                              sumo_seed=None):
     """
-    Evaluate a solution across multiple traffic seeds for robust assessment.
+    Evaluate a solution on one seed scenario.
     
     Args:
         solution: Traffic light phase durations
-        scenarios: List of scenario dictionaries
+        scenario: Scenario dictionary with 'seed' and 'files'
         temp_dir: Temporary directory for evaluation files
+        cache: Optional EvaluationCache consulted before running SUMO
+        sim_time: Simulation end time (defaults to simple_aco.SIMULATION_TIME)
+        evaluator: Optional persistent backend (traci_backend.SumoWorkerPool) for
+            this scenario, used instead of starting a SUMO subprocess
+        sumo_seed: Explicit SUMO --seed (None keeps SUMO's default seed)
     
     Returns:
-        Dictionary with aggregated metrics across all seeds
+        Metrics dictionary, or None if the simulation produced no tripinfo output
     """
-    all_metrics = []
-    valid_evaluations = 0
-    
-    for scenario in scenarios:
-        seed = scenario['seed']
-        net_file = scenario['files']['network']
-        route_file = scenario['files']['routes']
-        weight = scenario['weight']
+    seed = scenario['seed']
+    net_file = scenario['files']['network']
+    route_file = scenario['files']['routes']
+    
+    cache_key = None
+    if cache is not None:
+        from .evaluation_cache import make_cache_key
+        if evaluator is not None:
+            from .traci_backend import TIME_TO_TELEPORT
+            settings = simple_aco.evaluation_settings(backend=evaluator.backend, time_to_teleport=TIME_TO_TELEPORT,
+                                                      sim_time=sim_time, sumo_seed=sumo_seed)
+        else:
+            settings = simple_aco.evaluation_settings(time_to_teleport=MULTI_SEED_TIME_TO_TELEPORT, sim_time=sim_time,
+                                                      sumo_seed=sumo_seed)
+        cache_key = make_cache_key(solution, net_file, route_file, settings=settings)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    metrics = None
+    
+    if evaluator is not None:
+        metrics = evaluator.evaluate(solution)
+        if not np.isfinite(metrics.get('total_time', float('inf'))):
+            metrics = None  # Worker error, same as a run without tripinfo output
+    else:
+        # Create temporary files for this seed evaluation
+        temp_stem = make_temp_stem(temp_dir, f"seed_{seed}_temp")
+        temp_tls_file = temp_stem + ".tls.xml"
+        temp_cfg_file = temp_stem + ".sumocfg"
+        temp_tripinfo_file = temp_stem + "_tripinfo.xml"
         
-        # Evaluate on this seed
         try:
-            # Create temporary files for this seed evaluation
-            temp_net_file = os.path.join(temp_dir, f"seed_{seed}_temp_{random.randint(1000,9999)}.net.xml")
-            temp_cfg_file = temp_net_file.replace('.net.xml', '.sumocfg')
-            temp_tripinfo_file = temp_net_file.replace('.net.xml', '_tripinfo.xml')
-            
-            # Copy and modify network file
-            shutil.copy2(net_file, temp_net_file)
-            apply_solution_to_network(temp_net_file, solution)
+            # Candidate durations go into a small tlLogic additional file
+            write_solution_program(net_file, solution, temp_tls_file)
             
             # Create SUMO configuration with extended timeout for robust evaluation
-            create_sumo_config(temp_cfg_file, temp_net_file, route_file, temp_tripinfo_file, None)
+            create_sumo_config(temp_cfg_file, net_file, route_file, temp_tripinfo_file, sim_time,
+                               additional_files=[temp_tls_file])
             
             # Run SUMO simulation
-            result = subprocess.run([
+            command = [
                 'sumo', '-c', temp_cfg_file,
                 '--no-warnings', '--no-step-log',
-                '--time-to-teleport', '600'  # More generous timeout for multi-seed
-            ], capture_output=True, text=True, timeout=400)
+                '--time-to-teleport', str(MULTI_SEED_TIME_TO_TELEPORT)
+            ]
+            if sumo_seed is not None:
+                command += ['--seed', str(int(sumo_seed))]
+            result = subprocess.run(command, capture_output=True, text=True, timeout=400)
             
             # Parse results
             if os.path.exists(temp_tripinfo_file):
-                metrics = parse_tripinfo_file(temp_tripinfo_file)
-                metrics['seed'] = seed
-                metrics['weight'] = weight
-                all_metrics.append(metrics)
-                valid_evaluations += 1
-            
+                metrics = parse_tripinfo_file(temp_tripinfo_file, with_ids=KEEP_VEHICLE_IDS)
+        finally:
             # Cleanup
-            for temp_file in [temp_net_file, temp_cfg_file, temp_tripinfo_file]:
+            for temp_file in [temp_tls_file, temp_cfg_file, temp_tripinfo_file]:
                 if os.path.exists(temp_file):
                     os.remove(temp_file)
-                    
-        except Exception as e:
-            print_progress(f"     Evaluation failed for seed {seed}: {e}")
+    
+    if metrics is not None and cache is not None:
+        cache.put(cache_key, metrics)
+    
+    return metrics
+
+# Long-lived simulation thread pools, one per worker count, see get_simulation_executor
+_simulation_executors = {}
+_simulation_executor_lock = threading.Lock()
+
+# Persistent TraCI/libsumo worker pools and their leases, see acquire_simulation_pool
+_simulation_pools = {}
+_pool_leases = {}
+_pools_to_close = set()
+
+def get_simulation_executor(workers):
+    """
+    Shared thread pool with `workers` threads for per-seed simulations.
+    
+    Reusing one pool across calls keeps threads warm between ants, and since
+    every cell is its own task a worker that finishes a fast seed immediately
+    picks up the next cell while a slow seed is still running.
+    """
+    with _simulation_executor_lock:
+        if workers not in _simulation_executors:
+            _simulation_executors[workers] = ThreadPoolExecutor(max_workers=workers,
+                                                                thread_name_prefix=f'robust_sim_{workers}')
+        return _simulation_executors[workers]
+
+def _pool_key(scenario, backend, sim_time, temp_dir, sumo_seed):
+    files = scenario['files']
+    return (backend, os.path.abspath(files['network']), os.path.abspath(files['routes']), sim_time, sumo_seed,
+            temp_dir)
+
+def acquire_simulation_pool(scenario, n_workers, backend='traci', sim_time=None, temp_dir=None, sumo_seed=None):
+    """
+    Lease the persistent SumoWorkerPool of one scenario (release_simulation_pool when done).
+    
+    Pools are keyed by scenario files, backend, horizon and SUMO seed and live
+    until cleanup_scenario_files or shutdown_simulation_executors, so every
+    iteration of an optimization reuses the same SUMO instances. A pool has up to
+    n_workers workers, but each is only started when that many simulations of
+    the scenario run at once; the number of running simulations is bounded by
+    the caller (evaluate_batch's shared executor), not by closing idle pools.
+    
+    libsumo supports one simulation per process, so it keeps a single one-worker
+    pool that is switched between scenarios with SumoWorkerPool.retarget
+    (traci.load) instead of being restarted.
+    """
+    from .traci_backend import SumoWorkerPool
+    files = scenario['files']
+    key = _pool_key(scenario, backend, sim_time, temp_dir, sumo_seed)
+    with _simulation_executor_lock:
+        if backend == 'libsumo':
+            current = next((k for k in _simulation_pools if k[0] == 'libsumo'), None)
+            if current is not None and current != key:
+                pool = _simulation_pools[current]
+                if _pool_leases.get(id(pool), 0) > 0:
+                    raise RuntimeError("libsumo runs one scenario per process and its pool is in use")
+                pool.retarget(files['network'], files['routes'], sumo_seed)
+                _simulation_pools[key] = _simulation_pools.pop(current)
+        if key not in _simulation_pools:
+            _simulation_pools[key] = SumoWorkerPool(files['network'], files['routes'], n_workers, sim_time=sim_time,
+                                                    use_libsumo=backend == 'libsumo', temp_dir=temp_dir,
+                                                    sumo_seed=sumo_seed)
+        pool = _simulation_pools[key]
+        _pool_leases[id(pool)] = _pool_leases.get(id(pool), 0) + 1
+        return pool
+
+def release_simulation_pool(pool):
+    """End a lease from acquire_simulation_pool; a pool closed while leased is closed now."""
+    with _simulation_executor_lock:
+        _pool_leases[id(pool)] -= 1
+        if _pool_leases[id(pool)] == 0:
+            del _pool_leases[id(pool)]
+            if id(pool) in _pools_to_close:
+                _pools_to_close.discard(id(pool))
+                pool.close()
+
+def _close_pool(key):
+    """Forget a pool and close it, or defer the close to its last lease (lock held)."""
+    pool = _simulation_pools.pop(key)
+    if _pool_leases.get(id(pool), 0) > 0:
+        _pools_to_close.add(id(pool))
+    else:
+        pool.close()
+
+def close_scenario_pools(scenarios):
+    """Close the persistent worker pools that simulate any of the given scenarios."""
+    routes = {os.path.abspath(scenario['files']['routes']) for scenario in scenarios if scenario.get('files')}
+    with _simulation_executor_lock:
+        for key in [k for k in _simulation_pools if k[2] in routes]:
+            _close_pool(key)
+
+def shutdown_simulation_executors():
+    """Shut down the shared simulation thread pools and close every persistent worker pool."""
+    with _simulation_executor_lock:
+        executors = list(_simulation_executors.values())
+        _simulation_executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+    with _simulation_executor_lock:
+        for key in list(_simulation_pools):
+            _close_pool(key)
+
+def evaluate_batch(solutions, scenarios, temp_dir, backend='subprocess', workers=None, cache=None, sim_time=None,
+                   common_random_numbers=False):
+    """
+    Evaluate every (solution, scenario) pair as one batch of independent tasks.
+    
+    The whole Cartesian product is scheduled on the shared simulation pool, so an
+    iteration with 60 ants and 5 seeds keeps up to `workers` simulations running
+    for all 300 cells instead of evaluating them one after another. Results are
+    collected as they complete and returned once every cell has finished.
+    
+    Args:
+        solutions: List of phase duration lists
+        scenarios: List of scenario dictionaries with 'seed' and 'files'
+        temp_dir: Temporary directory for evaluation files
+        backend: 'subprocess' (one SUMO process per cell), 'traci' (persistent
+            workers per scenario, kept until cleanup_scenario_files) or 'libsumo'
+            (one in-process worker reloaded for each scenario in turn)
+        workers: Maximum concurrent simulations (defaults to simple_aco.N_WORKERS)
+        cache: Optional EvaluationCache for per-cell results
+        sim_time: Simulation end time (defaults to simple_aco.SIMULATION_TIME)
+        common_random_numbers: Run every solution on scenario j with SUMO --seed set
+            to that scenario's seed, so costs in one column are directly comparable
+    
+    Returns:
+        (costs, metrics): costs is an (n_solutions, n_scenarios) array of
+        calculate_cost values (inf where a simulation failed) and metrics[i][j]
+        holds the metrics of solution i on scenario j, or None on failure
+    """
+    n_solutions, n_scenarios = len(solutions), len(scenarios)
+    costs = np.full((n_solutions, n_scenarios), np.inf)
+    metrics = [[None] * n_scenarios for _ in range(n_solutions)]
+    if n_solutions == 0 or n_scenarios == 0:
+        return costs, metrics
+    
+    workers = workers if workers is not None else simple_aco.N_WORKERS
+    workers = max(1, int(workers or 1))
+    sumo_seeds = [scenario['seed'] if common_random_numbers else None for scenario in scenarios]
+    
+    if backend in ('subprocess', 'traci'):
+        groups = [list(range(n_scenarios))]
+    elif backend == 'libsumo':
+        # libsumo holds one simulation per process, so its scenarios run one after another
+        groups = [[j] for j in range(n_scenarios)]
+    else:
+        raise ValueError(f"Unknown evaluation backend: {backend}")
+    
+    for group in groups:
+        # At most `workers` cells run at once (serially or on the shared executor),
+        # which bounds the busy SUMO instances however many scenario pools exist
+        pools = {}
+        if backend != 'subprocess':
+            for j in group:
+                pools[j] = acquire_simulation_pool(scenarios[j], workers, backend, sim_time, temp_dir, sumo_seeds[j])
+        
+        def evaluate_cell(cell):
+            i, j = cell
+            try:
+                return evaluate_solution_on_seed(solutions[i], scenarios[j], temp_dir, cache, sim_time, pools.get(j),
+                                                 sumo_seeds[j])
+            except Exception as e:
+                print_progress(f"     Evaluation failed for seed {scenarios[j]['seed']}: {e}")
+                return None
+        
+        cells = [(i, j) for i in range(n_solutions) for j in group]
+        try:
+            if workers == 1 or len(cells) == 1:
+                results = [evaluate_cell(cell) for cell in cells]
+            else:
+                executor = get_simulation_executor(workers)
+                futures = {executor.submit(evaluate_cell, cell): k for k, cell in enumerate(cells)}
+                results = [None] * len(cells)
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+        finally:
+            for pool in pools.values():
+                release_simulation_pool(pool)
+        
+        for (i, j), cell_metrics in zip(cells, results):
+            metrics[i][j] = cell_metrics
+            if cell_metrics is not None:
+                costs[i, j] = calculate_cost(cell_metrics)
+    
+    return costs, metrics
+
+def aggregate_seed_metrics(seed_metrics, scenarios, keep_vehicle_ids=None):
+    """
+    Combine one solution's per-seed metrics (a row of evaluate_batch) into the
+    weighted multi-seed metrics used by calculate_robust_cost.
+    
+    Seeds with None metrics (failed, or skipped by seed racing) are left out;
+    'seeds_total' records how many seeds the solution could have been run on.
+    Per-vehicle id lists are dropped from the seed details unless keep_vehicle_ids
+    (defaults to KEEP_VEHICLE_IDS).
+    """
+    keep_vehicle_ids = KEEP_VEHICLE_IDS if keep_vehicle_ids is None else keep_vehicle_ids
+    all_metrics = []
+    for metrics, scenario in zip(seed_metrics, scenarios):
+        if metrics is not None:
+            detail = dict(metrics, seed=scenario['seed'], weight=scenario['weight'])
+            if not keep_vehicle_ids:
+                detail.pop('completed_ids', None)
+            all_metrics.append(detail)
+    valid_evaluations = len(all_metrics)
     
     # Aggregate results across seeds
     if valid_evaluations == 0:
-        return {'total_time': float('inf'), 'max_stop': 0, 'vehicles': 0, 'seeds_evaluated': 0}
+        return {'total_time': float('inf'), 'max_stop': 0, 'vehicles': 0, 'seeds_evaluated': 0,
+                'seeds_total': len(scenarios)}
     
     # Calculate weighted averages
     total_weight = sum(m['weight'] for m in all_metrics)
@@ -175,12 +482,104 @@ def evaluate_solution_multi_seed(solution, scenarios, temp_dir):
         'avg_wait': sum(m.get('avg_wait', 0) * m['weight'] for m in all_metrics) / total_weight,
         'wait_p95': sum(m.get('wait_p95', 0) * m['weight'] for m in all_metrics) / total_weight,
         'vehicles': sum(m['vehicles'] * m['weight'] for m in all_metrics) / total_weight,
+        'unfinished': sum(m.get('unfinished', 0) * m['weight'] for m in all_metrics) / total_weight,
         'seeds_evaluated': valid_evaluations,
+        'seeds_total': len(scenarios),
         'seed_details': all_metrics
     }
     
     return aggregated
 
+def evaluate_solution_multi_seed(solution, scenarios, temp_dir, cache=None, backend='subprocess', workers=None,
+                                 sim_time=None, common_random_numbers=False):
+    """
+    Evaluate a solution across multiple traffic seeds for robust assessment.
+    
+    All seeds are simulated concurrently on the shared simulation pool (up to
+    `workers` at a time), and the weighted metrics are aggregated once every
+    seed has returned.
+    
+    Args:
+        solution: Traffic light phase durations
+        scenarios: List of scenario dictionaries
+        temp_dir: Temporary directory for evaluation files
+        cache: Optional EvaluationCache for per-seed results
+        backend, workers, sim_time, common_random_numbers: Passed on to evaluate_batch
+    
+    Returns:
+        Dictionary with aggregated metrics across all seeds
+    """
+    _, seed_metrics = evaluate_batch([solution], scenarios, temp_dir, backend, workers, cache, sim_time,
+                                     common_random_numbers)
+    return aggregate_seed_metrics(seed_metrics[0], scenarios)
+
+def race_solutions_on_seeds(solutions, scenarios, temp_dir, backend='subprocess', workers=None, cache=None,
+                            sim_time=None, common_random_numbers=False, initial_seeds=RACING_INITIAL_SEEDS,
+                            keep_fraction=RACING_KEEP_FRACTION):
+    """
+    Successive-halving race of solutions over the training seeds.
+    
+    Every solution is simulated on the first initial_seeds seeds. After each round,
+    solutions that are statistically dominated by the round leader (paired 95% CI of
+    their per-seed cost difference above zero) or that failed everywhere are
+    dropped, and only the best keep_fraction of the rest (by weighted mean cost)
+    continue. Each later round doubles the number of new seeds, until the seeds
+    run out. Survivors therefore end with every seed, eliminated solutions with the
+    seeds they reached.
+    
+    Returns:
+        (costs, metrics, reached): as evaluate_batch, with inf costs and None
+        metrics on the seeds a solution never reached, plus a boolean
+        (n_solutions, n_scenarios) array of the simulations actually run
+    """
+    n_solutions, n_scenarios = len(solutions), len(scenarios)
+    costs = np.full((n_solutions, n_scenarios), np.inf)
+    metrics = [[None] * n_scenarios for _ in range(n_solutions)]
+    weights = np.array([scenario['weight'] for scenario in scenarios], dtype=float)
+    
+    reached = np.zeros((n_solutions, n_scenarios), dtype=bool)
+    alive = list(range(n_solutions))
+    next_seed = 0
+    round_size = max(1, initial_seeds)
+    
+    while alive and next_seed < n_scenarios:
+        seeds = list(range(next_seed, min(n_scenarios, next_seed + round_size)))
+        round_costs, round_metrics = evaluate_batch([solutions[i] for i in alive], [scenarios[j] for j in seeds],
+                                                    temp_dir, backend, workers, cache, sim_time,
+                                                    common_random_numbers)
+        reached[np.ix_(alive, seeds)] = True
+        for row, i in enumerate(alive):
+            for col, j in enumerate(seeds):
+                costs[i, j] = round_costs[row, col]
+                metrics[i][j] = round_metrics[row][col]
+        next_seed = seeds[-1] + 1
+        round_size *= 2
+        if next_seed >= n_scenarios or len(alive) == 1:
+            continue
+        
+        # Rank on the seeds every alive solution has seen (all seeds so far)
+        seen = costs[np.ix_(alive, range(next_seed))]
+        finite = np.isfinite(seen)
+        mean_costs = np.array([np.average(row[ok], weights=weights[:next_seed][ok]) if ok.any() else np.inf
+                               for row, ok in zip(seen, finite)])
+        leader = int(np.argmin(mean_costs))
+        
+        survivors = []
+        for row, i in enumerate(alive):
+            if not np.isfinite(mean_costs[row]):
+                continue
+            if row != leader:
+                stats = paired_difference_stats(seen[row], seen[leader])
+                if stats['n'] >= 2 and stats['ci95'][0] > 0:
+                    continue  # Statistically worse than the leader
+            survivors.append(row)
+        
+        n_keep = max(1, int(np.ceil(len(alive) * keep_fraction)))
+        survivors = sorted(survivors, key=lambda row: mean_costs[row])[:n_keep]
+        alive = [alive[row] for row in sorted(survivors)]
+    
+    return costs, metrics, reached
+
 def calculate_robust_cost(metrics):
     """Calculate cost from multi-seed aggregated metrics."""
     total_time = metrics.get('total_time', float('inf'))
@@ -199,32 +598,73 @@ def calculate_robust_cost(metrics):
     wait_component = min(wait_p95, 60.0)  # Cap outliers
     waiting_penalty = 2.0  # Use same penalty weight as original
     
-    return avg_time + waiting_penalty * wait_component + seed_penalty
+    return avg_time + waiting_penalty * wait_component + seed_penalty + unfinished_cost(metrics)
 
 # ============================================================================
 # ADAPTIVE SEED WEIGHTING
 # ============================================================================
 
-def update_seed_weights(scenarios, solution_performance_history):
+class SeedCostHistory:
+    """
+    Fixed-size ring buffer of per-seed costs for the last `window` iterations.
+    
+    Each iteration is stored as an (n_solutions, n_seeds) float32 block of
+    calculate_cost values (nan where a solution has no finished run on a seed),
+    so memory stays constant however long the optimization runs.
+    """
+    
+    def __init__(self, seeds, window=SEED_HISTORY_WINDOW):
+        self.seeds = list(seeds)
+        self._seed_index = {seed: j for j, seed in enumerate(self.seeds)}
+        self.window = window
+        self._costs = np.full((window, 0, len(self.seeds)), np.nan, dtype=np.float32)
+        self.n_iterations = 0
+    
+    def __len__(self):
+        return self.n_iterations
+    
+    def append(self, metrics_list):
+        """Record one iteration from its aggregated multi-seed metrics."""
+        if len(metrics_list) > self._costs.shape[1]:
+            grown = np.full((self.window, len(metrics_list), len(self.seeds)), np.nan, dtype=np.float32)
+            grown[:, :self._costs.shape[1]] = self._costs
+            self._costs = grown
+        
+        block = self._costs[self.n_iterations % self.window]
+        block[:] = np.nan
+        for row, metrics in enumerate(metrics_list):
+            if not isinstance(metrics, dict):
+                continue
+            for detail in metrics.get('seed_details', []):
+                j = self._seed_index.get(detail.get('seed'))
+                if j is not None and detail.get('vehicles', 0) > 0:
+                    block[row, j] = calculate_cost(detail)
+        self.n_iterations += 1
+    
+    def seed_costs(self, seed):
+        """Finite costs recorded on one seed over the retained iterations."""
+        j = self._seed_index.get(seed)
+        if j is None:
+            return np.empty(0, dtype=np.float32)
+        filled = min(self.n_iterations, self.window)
+        costs = self._costs[:filled, :, j].ravel()
+        return costs[np.isfinite(costs)]
+
+def update_seed_weights(scenarios, seed_history):
     """
     Adaptively update seed weights based on solution performance consistency.
     Seeds where solutions show high variance get higher weight in training.
+    
+    Args:
+        scenarios: Training scenarios (weights are updated in place)
+        seed_history: SeedCostHistory of the recent iterations
     """
-    if len(solution_performance_history) < 3:  # Need history to adapt
+    if len(seed_history) < 3:  # Need history to adapt
         return
     
     for scenario in scenarios:
-        seed = scenario['seed']
-        
-        # Extract performance on this seed across iterations
-        seed_performances = []
-        for iteration_data in solution_performance_history[-5:]:  # Last 5 iterations
-            seed_details = iteration_data.get('seed_details', [])
-            for detail in seed_details:
-                if detail.get('seed') == seed and detail.get('vehicles', 0) > 0:
-                    cost = calculate_cost(detail)
-                    if cost != float('inf'):
-                        seed_performances.append(cost)
+        # Performance on this seed across the retained iterations
+        seed_performances = seed_history.seed_costs(scenario['seed']).astype(float)
         
         # Increase weight for seeds with high variance (harder to optimize)
         if len(seed_performances) >= 3:
@@ -249,62 +689,17 @@ def update_seed_weights(scenarios, solution_performance_history):
 def initialize_robust_pheromone_matrix(n_phases, phase_types):
     """Initialize pheromone matrix for robust ACO."""
     # Same as original but with more conservative initial values
-    from .simple_aco import GREEN_MIN_DURATION, GREEN_MAX_DURATION, YELLOW_MIN_DURATION, YELLOW_MAX_DURATION
-    
-    pheromone_matrix = {}
-    
-    for phase_i in range(n_phases):
-        pheromone_matrix[phase_i] = {}
-        
-        if phase_i < len(phase_types) and phase_types[phase_i]:
-            duration_range = range(GREEN_MIN_DURATION, GREEN_MAX_DURATION + 1)
-        else:
-            duration_range = range(YELLOW_MIN_DURATION, YELLOW_MAX_DURATION + 1)
-        
-        # More conservative initial pheromone for robustness
-        for duration in duration_range:
-            pheromone_matrix[phase_i][duration] = 0.05
-    
-    return pheromone_matrix
+    phase_types = [phase_i < len(phase_types) and bool(phase_types[phase_i]) for phase_i in range(n_phases)]
+    return PheromoneMatrix(phase_types, initial_level=0.05)
+
+def generate_robust_ant_solutions(n_ants, pheromone_matrix, exploration_rate=0.2):
+    """Generate a whole iteration of solutions with slightly higher exploration for robustness."""
+    # Use original ALPHA/BETA (1.0 / 2.0) with the higher robust exploration rate
+    return pheromone_matrix.sample(n_ants, exploration_rate, 1.0, 2.0).tolist()
 
 def generate_robust_ant_solution(n_phases, phase_types, pheromone_matrix, exploration_rate=0.2):
     """Generate solution with slightly higher exploration for robustness."""
-    from .simple_aco import GREEN_MIN_DURATION, GREEN_MAX_DURATION, YELLOW_MIN_DURATION, YELLOW_MAX_DURATION
-    
-    solution = []
-    
-    for phase_i in range(n_phases):
-        # Determine valid duration options
-        if phase_i < len(phase_types) and phase_types[phase_i]:
-            duration_options = list(range(GREEN_MIN_DURATION, GREEN_MAX_DURATION + 1))
-        else:
-            duration_options = list(range(YELLOW_MIN_DURATION, YELLOW_MAX_DURATION + 1))
-        
-        # Higher exploration rate for robustness
-        if random.random() < exploration_rate:
-            chosen_duration = random.choice(duration_options)
-        else:
-            # Pheromone-guided selection
-            probabilities = []
-            
-            for duration in duration_options:
-                pheromone = pheromone_matrix.get(phase_i, {}).get(duration, 0.05)
-                heuristic = 1.0  # Could be enhanced with multi-seed heuristics
-                
-                prob = (pheromone ** 1.0) * (heuristic ** 2.0)  # Use original ALPHA/BETA
-                probabilities.append(prob)
-            
-            # Normalize and select
-            total_prob = sum(probabilities)
-            if total_prob > 0:
-                probabilities = [p / total_prob for p in probabilities]
-                chosen_duration = np.random.choice(duration_options, p=probabilities)
-            else:
-                chosen_duration = random.choice(duration_options)
-        
-        solution.append(chosen_duration)
-    
-    return solution
+    return generate_robust_ant_solutions(1, pheromone_matrix, exploration_rate)[0]
 
 def update_robust_pheromones(pheromone_matrix, all_solutions, all_metrics, phase_types, evaporation_rate=0.1):
     """
@@ -314,84 +709,61 @@ def update_robust_pheromones(pheromone_matrix, all_solutions, all_metrics, phase
     n_phases = len(phase_types)
     
     # 1. EVAPORATION
-    for phase_i in range(n_phases):
-        if phase_i in pheromone_matrix:
-            for duration in list(pheromone_matrix[phase_i].keys()):
-                pheromone_matrix[phase_i][duration] *= (1 - evaporation_rate)
-                if pheromone_matrix[phase_i][duration] < 0.01:
-                    pheromone_matrix[phase_i][duration] = 0.01
+    pheromone_matrix.evaporate(evaporation_rate, floor=0.01)
     
     # 2. REINFORCEMENT based on robust performance
     valid_data = []
     for solution, metrics in zip(all_solutions, all_metrics):
         cost = calculate_robust_cost(metrics)
         if np.isfinite(cost) and len(solution) == n_phases:
-            # Weight by how many seeds were successfully evaluated
-            robustness_factor = metrics.get('seeds_evaluated', 0) / max(1, len(metrics.get('seed_details', [])))
+            # Weight by how many seeds were successfully evaluated (fewer for seed-racing losers)
+            robustness_factor = metrics.get('seeds_evaluated', 0) / max(1, metrics.get('seeds_total',
+                                                                                  len(metrics.get('seed_details', []))))
             valid_data.append((solution, cost, robustness_factor))
     
     if not valid_data:
         return
     
-    # Normalize costs for pheromone calculation
-    costs = [cost for _, cost, _ in valid_data]
-    min_cost = min(costs)
-    max_cost = max(costs)
+    # Better and more robust solutions deposit more pheromone
+    costs = np.array([cost for _, cost, _ in valid_data], dtype=float)
+    factors = np.array([factor for _, _, factor in valid_data], dtype=float)
+    min_cost = costs.min()
+    max_cost = costs.max()
     cost_range = max_cost - min_cost if max_cost > min_cost else 1.0
+    amounts = (1.0 - (costs - min_cost) / cost_range) * factors + 0.1
     
-    # Deposit pheromones
-    for solution, cost, robustness_factor in valid_data:
-        # Better and more robust solutions deposit more pheromone
-        if cost_range > 0:
-            normalized_cost = (cost - min_cost) / cost_range
-            pheromone_amount = (1.0 - normalized_cost) * robustness_factor + 0.1
-        else:
-            pheromone_amount = robustness_factor + 0.1
-        
-        for phase_i, duration in enumerate(solution):
-            if phase_i >= n_phases:
-                break
-            
-            if phase_i not in pheromone_matrix:
-                pheromone_matrix[phase_i] = {}
-            if duration not in pheromone_matrix[phase_i]:
-                pheromone_matrix[phase_i][duration] = 0.01
-            
-            pheromone_matrix[phase_i][duration] += pheromone_amount
+    pheromone_matrix.deposit([solution for solution, _, _ in valid_data], amounts)
     
-    # 3. ELITE REINFORCEMENT for most robust solution
-    if valid_data:
-        # Find solution with best cost AND high robustness
-        elite_solution, _, _ = min(valid_data, key=lambda x: x[1] / max(x[2], 0.1))
-        elite_boost = 1.5
-        
-        for phase_i, duration in enumerate(elite_solution):
-            if phase_i >= n_phases:
-                break
-            if phase_i in pheromone_matrix and duration in pheromone_matrix[phase_i]:
-                pheromone_matrix[phase_i][duration] += elite_boost
+    # 3. ELITE REINFORCEMENT for most robust solution (best cost AND high robustness)
+    elite_idx = int(np.argmin(costs / np.maximum(factors, 0.1)))
+    elite_boost = 1.5
+    pheromone_matrix.deposit([valid_data[elite_idx][0]], elite_boost)
 
 # ============================================================================
 # ROBUST BASELINE EVALUATION
 # ============================================================================
 
-def evaluate_robust_baseline_comparison(best_solution, phase_types, scenarios, temp_dir):
+def evaluate_robust_baseline_comparison(best_solution, phase_types, scenarios, temp_dir, cache=None,
+                                        backend='subprocess', workers=None, sim_time=None,
+                                        common_random_numbers=False):
     """
     Evaluate baseline vs optimized across all training seeds for fair comparison.
+    The optimized solution was already simulated during training, so a cache
+    avoids re-running it. Both solutions go through a single evaluate_batch call,
+    and their per-seed costs are compared as pairs.
     """
     print_progress("📊 Evaluating robust baseline comparison across all seeds...")
     
     # Create baseline solution
     baseline_solution = create_baseline_solution(phase_types, green_duration=30, yellow_duration=4)
     
-    # Evaluate baseline across all seeds
-    print_progress("   Evaluating baseline (30s green, 4s yellow) across all seeds...")
-    baseline_metrics = evaluate_solution_multi_seed(baseline_solution, scenarios, temp_dir)
+    # Evaluate baseline (30s green, 4s yellow) and optimized solution across all seeds
+    print_progress("   Evaluating baseline (30s green, 4s yellow) and optimized solution across all seeds...")
+    costs, seed_metrics = evaluate_batch([baseline_solution, best_solution], scenarios, temp_dir,
+                                         backend, workers, cache, sim_time, common_random_numbers)
+    baseline_metrics = aggregate_seed_metrics(seed_metrics[0], scenarios)
     baseline_cost = calculate_robust_cost(baseline_metrics)
-    
-    # Evaluate optimized solution across all seeds
-    print_progress("   Evaluating optimized solution across all seeds...")
-    optimized_metrics = evaluate_solution_multi_seed(best_solution, scenarios, temp_dir)
+    optimized_metrics = aggregate_seed_metrics(seed_metrics[1], scenarios)
     optimized_cost = calculate_robust_cost(optimized_metrics)
     
     # Calculate improvement
@@ -421,7 +793,8 @@ def evaluate_robust_baseline_comparison(best_solution, phase_types, scenarios, t
             'baseline_seeds_evaluated': baseline_metrics.get('seeds_evaluated', 0),
             'optimized_seeds_evaluated': optimized_metrics.get('seeds_evaluated', 0),
             'total_seeds': len(scenarios)
-        }
+        },
+        'paired': paired_difference_stats(costs[1], costs[0])  # Per-seed optimized − baseline
     }
     
     # Print comparison results
@@ -432,6 +805,7 @@ def evaluate_robust_baseline_comparison(best_solution, phase_types, scenarios, t
     print_progress(f"📊 ROBUST BASELINE COMPARISON RESULTS:")
     print_progress(f"   Baseline (30s/4s): Cost = {baseline_cost:.1f} (evaluated on {baseline_seeds}/{total_seeds} seeds)")
     print_progress(f"   Optimized solution: Cost = {optimized_cost:.1f} (evaluated on {optimized_seeds}/{total_seeds} seeds)")
+    print_progress(f"   Paired per seed (optimized − baseline): {describe_paired_difference(comparison_results['paired'])}")
     
     if improvement_percent > 0:
         print_progress(f"    Robust Improvement: {improvement_percent:.1f}% better ({absolute_improvement:.1f} cost units)")
@@ -474,6 +848,7 @@ def run_robust_aco_optimization(
     # Setup configuration
     from .simple_aco import GRID_SIZE, N_VEHICLES, SIMULATION_TIME, N_ANTS, N_ITERATIONS
     from .simple_aco import EVAPORATION_RATE, EXPLORATION_RATE, SHOW_PLOTS, LAUNCH_SUMO_GUI
+    from .simple_aco import N_WORKERS, EVALUATION_BACKEND, COMMON_RANDOM_NUMBERS
     
     # Apply config overrides (same as original)
     if config:
@@ -484,6 +859,13 @@ def run_robust_aco_optimization(
         N_ITERATIONS = config.get('n_iterations', N_ITERATIONS)
         EVAPORATION_RATE = config.get('evaporation_rate', EVAPORATION_RATE)
         EXPLORATION_RATE = config.get('exploration_rate', EXPLORATION_RATE)
+        N_WORKERS = config.get('n_workers', N_WORKERS)
+        EVALUATION_BACKEND = config.get('evaluation_backend', EVALUATION_BACKEND)
+        COMMON_RANDOM_NUMBERS = config.get('common_random_numbers', COMMON_RANDOM_NUMBERS)
+    seed_racing = config.get('seed_racing', SEED_RACING) if config else SEED_RACING
+    racing_initial_seeds = config.get('racing_initial_seeds', RACING_INITIAL_SEEDS) if config else RACING_INITIAL_SEEDS
+    racing_keep_fraction = config.get('racing_keep_fraction', RACING_KEEP_FRACTION) if config else RACING_KEEP_FRACTION
+    keep_vehicle_ids = config.get('keep_vehicle_ids', KEEP_VEHICLE_IDS) if config else KEEP_VEHICLE_IDS
     
     # Robust-specific config
     n_training_seeds = config.get('training_seeds', DEFAULT_TRAINING_SEEDS) if config else DEFAULT_TRAINING_SEEDS
@@ -498,6 +880,11 @@ def run_robust_aco_optimization(
     print_progress(f"   ACO: {N_ANTS} ants × {N_ITERATIONS} iterations")
     print_progress(f"   Training Seeds: {len(training_seeds)} ({training_seeds})")
     print_progress(f"   Exploration Rate: {EXPLORATION_RATE:.2f} (increased for robustness)")
+    print_progress(f"   Evaluation: {N_ANTS} ants × {len(training_seeds)} seeds per batch, "
+                   f"{N_WORKERS} workers ({EVALUATION_BACKEND})"
+                   + (", common random numbers" if COMMON_RANDOM_NUMBERS else "")
+                   + (f", seed racing ({racing_initial_seeds} seeds, keep {racing_keep_fraction:.0%})"
+                      if seed_racing else ""))
     
     # Extract base scenario config from SUMO file if provided
     base_config = {
@@ -509,9 +896,15 @@ def run_robust_aco_optimization(
     
     paths = get_project_paths()
     
+    # Optional memoization of per-seed evaluations
+    cache = None
+    if config and config.get('use_cache', False):
+        from .evaluation_cache import EvaluationCache, DEFAULT_CACHE_SIZE
+        cache = EvaluationCache(config.get('cache_size', DEFAULT_CACHE_SIZE), config.get('cache_db'))
+    
     try:
         # Generate multiple scenarios with different seeds
-        scenarios = generate_multi_seed_scenarios(base_config, training_seeds)
+        scenarios = generate_multi_seed_scenarios(base_config, training_seeds, N_WORKERS)
         
         if not scenarios:
             print_progress(" Failed to generate any training scenarios")
@@ -531,11 +924,13 @@ def run_robust_aco_optimization(
         best_costs = []
         best_solutions = []
         best_metrics_history = []
-        solution_performance_history = []
+        seed_history = SeedCostHistory([scenario['seed'] for scenario in scenarios])
         
         global_best_cost = float('inf')
         global_best_solution = None
         global_best_metrics = None
+        seed_evaluations = 0
+        full_factorial_evaluations = 0
         
         print_progress(" Starting robust optimization iterations...")
         start_time = time.time()
@@ -555,18 +950,36 @@ def run_robust_aco_optimization(
             
             # Generate ant solutions
             remaining_ants = N_ANTS - (1 if global_best_solution is not None else 0)
-            for ant in range(remaining_ants):
-                solution = generate_robust_ant_solution(n_phases, phase_types, pheromone_matrix, EXPLORATION_RATE)
-                
-                # Evaluate across all training seeds
-                metrics = evaluate_solution_multi_seed(solution, scenarios, paths['temp'])
+            ant_solutions = generate_robust_ant_solutions(remaining_ants, pheromone_matrix, EXPLORATION_RATE)
+            
+            if seed_racing:
+                # Race the ants over the seeds, spending later seeds on survivors only
+                _, seed_metrics, reached = race_solutions_on_seeds(
+                    ant_solutions, scenarios, paths['temp'], EVALUATION_BACKEND, N_WORKERS, cache,
+                    SIMULATION_TIME, COMMON_RANDOM_NUMBERS, racing_initial_seeds, racing_keep_fraction)
+                full_coverage = reached.all(axis=1)
+                iteration_evaluations = int(reached.sum())
+            else:
+                # Evaluate every ant on every training seed as one batch
+                _, seed_metrics = evaluate_batch(ant_solutions, scenarios, paths['temp'], EVALUATION_BACKEND,
+                                                 N_WORKERS, cache, SIMULATION_TIME, COMMON_RANDOM_NUMBERS)
+                full_coverage = [True] * len(ant_solutions)
+                iteration_evaluations = len(ant_solutions) * len(scenarios)
+            seed_evaluations += iteration_evaluations
+            full_factorial_evaluations += len(ant_solutions) * len(scenarios)
+            if seed_racing:
+                print_progress(f"   Seed racing: {iteration_evaluations}/{len(ant_solutions) * len(scenarios)} simulations, "
+                               f"{int(np.sum(full_coverage))} ants raced on all seeds")
+            
+            for ant, (solution, ant_seed_metrics) in enumerate(zip(ant_solutions, seed_metrics)):
+                metrics = aggregate_seed_metrics(ant_seed_metrics, scenarios, keep_vehicle_ids)
                 cost = calculate_robust_cost(metrics)
                 
                 solutions.append(solution)
                 metrics_list.append(metrics)
                 
-                # Update global best
-                if cost < global_best_cost:
+                # Update global best (only from ants simulated on every seed)
+                if cost < global_best_cost and full_coverage[ant]:
                     global_best_cost = cost
                     global_best_solution = solution.copy()
                     global_best_metrics = metrics
@@ -588,20 +1001,10 @@ def run_robust_aco_optimization(
             update_robust_pheromones(pheromone_matrix, solutions, metrics_list, phase_types, EVAPORATION_RATE)
             
             # Adaptive seed weighting (learn which seeds are harder)
-            # Flatten the seed details from all solutions this iteration
-            all_seed_details = []
-            for m in metrics_list:
-                if isinstance(m, dict) and 'seed_details' in m:
-                    all_seed_details.extend(m['seed_details'])
-            
-            solution_performance_history.append({
-                'iteration': iteration,
-                'solutions': solutions,
-                'seed_details': all_seed_details  # Flattened list of seed detail dicts
-            })
+            seed_history.append(metrics_list)
             
             if iteration >= 2:  # Start adapting after a few iterations
-                update_seed_weights(scenarios, solution_performance_history)
+                update_seed_weights(scenarios, seed_history)
             
             # Track progress
             best_costs.append(global_best_cost)
@@ -619,11 +1022,24 @@ def run_robust_aco_optimization(
         duration = time.time() - start_time
         print_progress(f" Robust optimization completed in {duration:.1f} seconds")
         
+        racing_stats = None
+        if seed_racing:
+            saved = full_factorial_evaluations - seed_evaluations
+            racing_stats = {
+                'evaluations': seed_evaluations,
+                'full_factorial_evaluations': full_factorial_evaluations,
+                'evaluations_saved': saved,
+                'saved_fraction': saved / full_factorial_evaluations if full_factorial_evaluations else 0.0
+            }
+            print_progress(f" Seed racing: {seed_evaluations} simulations instead of {full_factorial_evaluations} "
+                           f"({saved} saved, {racing_stats['saved_fraction']:.0%})")
+        
         # Robust baseline comparison
         baseline_comparison = None
         if compare_baseline and global_best_solution is not None:
             baseline_comparison = evaluate_robust_baseline_comparison(
-                global_best_solution, phase_types, scenarios, paths['temp']
+                global_best_solution, phase_types, scenarios, paths['temp'], cache,
+                EVALUATION_BACKEND, N_WORKERS, SIMULATION_TIME, COMMON_RANDOM_NUMBERS
             )
         
         # Create plots
@@ -647,8 +1063,15 @@ def run_robust_aco_optimization(
             sample_route = scenarios[0]['files']['routes']
             launch_sumo_gui_with_solution(global_best_solution, sample_net, sample_route, paths)
         
-        # Cleanup temporary files
+        # Cleanup temporary files and the simulation pools
         cleanup_scenario_files(scenarios)
+        shutdown_simulation_executors()
+        
+        cache_stats = None
+        if cache is not None:
+            cache_stats = cache.stats()
+            print_progress(f" Evaluation cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+            cache.close()
         
         # Return results (compatible with original interface)
         return {
@@ -665,7 +1088,9 @@ def run_robust_aco_optimization(
                 'training_seeds': training_seeds,
                 'scenarios_used': len(scenarios),
                 'final_seed_weights': [s['weight'] for s in scenarios]
-            }
+            },
+            'cache_stats': cache_stats,
+            'seed_racing': racing_stats
         }
         
     except Exception as e:
@@ -676,6 +1101,9 @@ def run_robust_aco_optimization(
         
         if 'scenarios' in locals():
             cleanup_scenario_files(scenarios)
+        shutdown_simulation_executors()
+        if cache is not None:
+            cache.close()
         return {'success': False, 'error': str(e)}
 
 # ============================================================================
@@ -764,7 +1192,8 @@ def create_robust_optimization_plot(best_costs, best_metrics_history, scenarios,
 # VALIDATION FUNCTIONS
 # ============================================================================
 
-def validate_robust_solution(solution, phase_types, base_config, validation_seeds=None, temp_dir=None):
+def validate_robust_solution(solution, phase_types, base_config, validation_seeds=None, temp_dir=None,
+                             backend='subprocess', workers=None, common_random_numbers=False):
     """
     Validate the robust solution on completely new seeds not used in training.
     
@@ -774,6 +1203,7 @@ def validate_robust_solution(solution, phase_types, base_config, validation_seed
         base_config: Base scenario configuration
         validation_seeds: Seeds for validation (if None, generates new ones)
         temp_dir: Temporary directory
+        backend, workers, common_random_numbers: Passed on to evaluate_batch
     
     Returns:
         Validation results
@@ -788,19 +1218,20 @@ def validate_robust_solution(solution, phase_types, base_config, validation_seed
     print_progress(f" Validating solution on {len(validation_seeds)} new seeds...")
     
     # Generate validation scenarios
-    validation_scenarios = generate_multi_seed_scenarios(base_config, validation_seeds)
+    validation_scenarios = generate_multi_seed_scenarios(base_config, validation_seeds, workers)
     
     if not validation_scenarios:
         return {'success': False, 'error': 'Failed to generate validation scenarios'}
     
     try:
-        # Evaluate solution on validation seeds
-        validation_metrics = evaluate_solution_multi_seed(solution, validation_scenarios, temp_dir)
-        validation_cost = calculate_robust_cost(validation_metrics)
-        
-        # Evaluate baseline on same validation seeds
+        # Evaluate solution and baseline on the same validation seeds in one batch
         baseline_solution = create_baseline_solution(phase_types, 30, 4)
-        baseline_val_metrics = evaluate_solution_multi_seed(baseline_solution, validation_scenarios, temp_dir)
+        costs, seed_metrics = evaluate_batch([solution, baseline_solution], validation_scenarios, temp_dir,
+                                             backend, workers, sim_time=base_config.get('simulation_time'),
+                                             common_random_numbers=common_random_numbers)
+        validation_metrics = aggregate_seed_metrics(seed_metrics[0], validation_scenarios)
+        validation_cost = calculate_robust_cost(validation_metrics)
+        baseline_val_metrics = aggregate_seed_metrics(seed_metrics[1], validation_scenarios)
         baseline_val_cost = calculate_robust_cost(baseline_val_metrics)
         
         # Calculate validation improvement
@@ -819,13 +1250,15 @@ def validate_robust_solution(solution, phase_types, base_config, validation_seed
             'improvement_percent': val_improvement,
             'seeds_evaluated': validation_metrics.get('seeds_evaluated', 0),
             'total_validation_seeds': len(validation_seeds),
-            'avg_vehicles_completed': validation_metrics.get('vehicles', 0)
+            'avg_vehicles_completed': validation_metrics.get('vehicles', 0),
+            'paired': paired_difference_stats(costs[0], costs[1])  # Per-seed solution − baseline
         }
         
         print_progress(f" VALIDATION RESULTS:")
         print_progress(f"   Validation Cost: {validation_cost:.1f}")
         print_progress(f"   Baseline Validation: {baseline_val_cost:.1f}")
         print_progress(f"   Validation Improvement: {val_improvement:.1f}%")
+        print_progress(f"   Paired per seed: {describe_paired_difference(results['paired'])}")
         print_progress(f"   Seeds Evaluated: {results['seeds_evaluated']}/{len(validation_seeds)}")
         
         return results
@@ -863,7 +1296,9 @@ class RobustACOTrafficOptimizer:
         # Robust-specific parameters
         training_seeds: int = 5,  # Number of training seeds
         exploration_rate: float = 0.25,  # Higher exploration for robustness
-        validate_solution: bool = True  # Run validation on new seeds
+        validate_solution: bool = True,  # Run validation on new seeds
+        n_workers: int = None,  # Concurrent per-seed simulations (defaults to N_WORKERS)
+        evaluation_backend: str = 'subprocess'
     ) -> None:
         self.sumo_config = sumo_config
         self.n_ants = n_ants
@@ -880,6 +1315,8 @@ class RobustACOTrafficOptimizer:
         self.training_seeds = training_seeds
         self.exploration_rate = exploration_rate
         self.validate_solution = validate_solution
+        self.n_workers = n_workers
+        self.evaluation_backend = evaluation_backend
     
     def optimize(self) -> Tuple[Dict[str, Dict[str, int]], float, List[Dict[str, float]], Optional[Dict]]:
         """
@@ -896,7 +1333,9 @@ class RobustACOTrafficOptimizer:
             'exploration_rate': self.exploration_rate,
             'n_vehicles': self.scenario_vehicles or 30,
             'simulation_time': self.simulation_time,
-            'training_seeds': self.training_seeds
+            'training_seeds': self.training_seeds,
+            'n_workers': self.n_workers or simple_aco.N_WORKERS,
+            'evaluation_backend': self.evaluation_backend
         }
         
         # Run robust optimization
@@ -954,13 +1393,17 @@ class RobustACOTrafficOptimizer:
                 validation_results = validate_robust_solution(
                     durations, phase_types, base_config, 
                     validation_seeds=None,  # Generate fresh seeds
-                    temp_dir=get_project_paths()['temp']
+                    temp_dir=get_project_paths()['temp'],
+                    backend=self.evaluation_backend,
+                    workers=config['n_workers']
                 )
                 
                 if validation_results.get('success'):
                     # Add validation info to baseline comparison
                     if baseline_comparison and isinstance(baseline_comparison, dict):
                         baseline_comparison['validation'] = validation_results
+            
+            shutdown_simulation_executors()
         
         return solution_dict, best_cost, optimization_data, baseline_comparison
 
@@ -25,7 +25,17 @@ import time
 import random
 import json
 import platform
+import heapq
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from typing import NamedTuple, Optional
+
+from ..utils.tls_utils import build_phase_index, write_tls_program_file
+from ..utils.horizon_utils import estimate_simulation_horizon
+from ..utils.tripinfo_utils import iter_tripinfo_chunks, finished_trips, read_waiting_times
 
 # ============================================================================
 # CONFIGURATION PARAMETERS
@@ -45,11 +55,33 @@ EXPLORATION_RATE = 0.15       # Pure exploration probability
 ALPHA = 1.0                   # Pheromone importance weight
 BETA = 2.0                    # Heuristic importance weight  
 WAITING_PENALTY = 2.0         # Penalty weight for waiting time
+UNFINISHED_PENALTY = 600.0    # Cost added per unit share of vehicles still running at the horizon
+ACO_MODE = 'generational'     # 'generational' or 'steady_state' (update pheromones per finished ant)
+RACING = False                # Abort TraCI evaluations once they provably cannot beat the best
+MULTI_FIDELITY = False        # Screen every ant cheaply, confirm only the top-k with the full microsim
+SCREENING_FIDELITY = 'meso'   # 'meso' (SUMO --mesosim) or 'short' (truncated horizon)
+PROMOTE_TOP_K = 5             # Screened ants promoted to the full microscopic run per iteration
+SHORT_HORIZON_FRACTION = 0.25 # Share of the simulation time used by 'short' screening runs
+FIDELITY_WEIGHTS = {'micro': 1.0, 'meso': 0.5, 'short': 0.5}  # Pheromone deposit weight per fidelity
+USE_SURROGATE = False         # Pre-screen over-generated ants with an online regression model
+SURROGATE_OVERSAMPLE = 3      # Candidates constructed per ant slot when the surrogate is active
+SURROGATE_KEEP = 0.5          # Share of ant slots actually sent to SUMO
+SURROGATE_EXPLORATION = 0.2   # Share of the SUMO slots filled with random (non-top) candidates
+COMMON_RANDOM_NUMBERS = False # Simulate every candidate and the baseline on one explicit SUMO seed set
+CRN_REPLICATIONS = 3          # SUMO seeds in the common set (metrics are averaged over them)
+N_WORKERS = 1                 # Concurrent SUMO evaluations per iteration (1 = serial)
+EVALUATION_BACKEND = 'subprocess'  # 'subprocess', 'traci' (persistent workers) or 'libsumo'
+USE_EVALUATION_CACHE = False  # Memoize (solution, scenario) evaluations
+CACHE_SIZE = 4096             # In-memory cache entries
+CACHE_DB_PATH = None          # Optional SQLite file for a cache that survives between runs
+EVALUATION_CACHE = None       # Default EvaluationCache for evaluate_solution calls without one
+TRIP_OUTPUT = 'tripinfo'      # 'tripinfo' (parse per-vehicle XML) or 'statistics' (SUMO aggregates + arrived-only waiting-time pass)
 
 # Scenario Configuration
 GRID_SIZE = 4                  # Grid dimensions (2 = 2x2, 3 = 3x3, etc.)
 N_VEHICLES = 20               # Number of vehicles in simulation
 SIMULATION_TIME = 13200         # Increased to accommodate industrial pattern late departures + extra travel time buffer
+AUTO_HORIZON = False          # Derive a tighter end time from route departures (capped at SIMULATION_TIME)
 
 # Display and Output
 SHOW_PROGRESS = True          # Show detailed progress
@@ -90,6 +122,17 @@ def get_project_paths():
     
     return paths
 
+_temp_counter = itertools.count()
+
+def make_temp_stem(temp_dir, prefix="temp"):
+    """
+    Build a unique temporary file stem inside temp_dir.
+
+    Uses the process id and a counter rather than the global random module so that
+    concurrent evaluations never collide and never perturb the seeded ant sequence.
+    """
+    return os.path.join(temp_dir, f"{prefix}_{os.getpid()}_{next(_temp_counter)}")
+
 # ============================================================================
 # PLOTTING AND VISUALIZATION
 # ============================================================================
@@ -216,80 +259,141 @@ def analyze_traffic_light_phases(net_file):
 # TRADITIONAL ACO ALGORITHM WITH PHEROMONES
 # ============================================================================
 
+class PheromoneMatrix:
+    """
+    Dense pheromone store with one row per phase and one column per duration.
+
+    Column d holds the pheromone for a duration of d seconds. A boolean mask marks
+    the durations allowed for each phase (green/red or yellow ranges), so every
+    operation is a whole-array NumPy expression instead of nested dict loops.
+    """
+
+    def __init__(self, phase_types, initial_level=0.1):
+        self.phase_types = list(phase_types)
+        n_phases = len(self.phase_types)
+        max_duration = max(GREEN_MAX_DURATION, YELLOW_MAX_DURATION)
+
+        self.mask = np.zeros((n_phases, max_duration + 1), dtype=bool)
+        for phase_i, is_green in enumerate(self.phase_types):
+            if is_green:
+                self.mask[phase_i, GREEN_MIN_DURATION:GREEN_MAX_DURATION + 1] = True
+            else:
+                self.mask[phase_i, YELLOW_MIN_DURATION:YELLOW_MAX_DURATION + 1] = True
+
+        self.values = np.where(self.mask, initial_level, 0.0)
+        self._last_valid = self.mask.shape[1] - 1 - np.argmax(self.mask[:, ::-1], axis=1)
+
+    @property
+    def n_phases(self):
+        return self.values.shape[0]
+
+    def sample(self, n_ants, exploration_rate, alpha=1.0, beta=2.0, rng=np.random):
+        """
+        Construct n_ants solutions in one vectorized draw.
+
+        Each (ant, phase) choice is uniform over the valid durations with probability
+        exploration_rate, otherwise proportional to tau^alpha * eta^beta.
+
+        Returns:
+            Integer array of shape (n_ants, n_phases)
+        """
+        if self.n_phases == 0:
+            return np.zeros((n_ants, 0), dtype=int)
+
+        heuristic = 1.0  # Simple heuristic (could be enhanced with traffic flow data)
+        weights = np.where(self.mask, (self.values ** alpha) * (heuristic ** beta), 0.0)
+        totals = weights.sum(axis=1, keepdims=True)
+        uniform = self.mask / self.mask.sum(axis=1, keepdims=True)
+        probabilities = np.where(totals > 0, weights / np.where(totals > 0, totals, 1.0), uniform)
+
+        guided_cdf = np.cumsum(probabilities, axis=1)
+        uniform_cdf = np.cumsum(uniform, axis=1)
+
+        explore = rng.random((n_ants, self.n_phases)) < exploration_rate
+        draws = rng.random((n_ants, self.n_phases))
+
+        cdf = np.where(explore[:, :, None], uniform_cdf[None, :, :], guided_cdf[None, :, :])
+        choices = (draws[:, :, None] >= cdf).sum(axis=2)
+        return np.minimum(choices, self._last_valid[None, :])
+
+    def evaporate(self, rate, floor=0.01):
+        """Decay every valid trail, keeping a minimum level so no duration dies out."""
+        self.values = np.where(self.mask, np.maximum(self.values * (1 - rate), floor), 0.0)
+
+    def deposit(self, solutions, amounts):
+        """
+        Add amounts[k] to every (phase, duration) cell used by solutions[k].
+
+        Durations outside a phase's valid range are ignored.
+        """
+        solutions = np.asarray(solutions, dtype=int).reshape(-1, self.n_phases)
+        amounts = np.broadcast_to(np.asarray(amounts, dtype=float), (len(solutions),))
+
+        rows = np.broadcast_to(np.arange(self.n_phases), solutions.shape)
+        cols = np.clip(solutions, 0, self.mask.shape[1] - 1)
+        valid = self.mask[rows, cols] & (solutions == cols)
+        per_cell = np.broadcast_to(amounts[:, None], solutions.shape)
+
+        np.add.at(self.values, (rows[valid], cols[valid]), per_cell[valid])
+
+    def to_dict(self):
+        """Return the legacy {phase: {duration: pheromone}} representation."""
+        return {
+            phase_i: {int(d): float(self.values[phase_i, d]) for d in np.flatnonzero(self.mask[phase_i])}
+            for phase_i in range(self.n_phases)
+        }
+
 def initialize_pheromone_matrix(n_phases, phase_types):
     """Initialize pheromone matrix with small uniform values."""
-    pheromone_matrix = {}
-    
-    for phase_i in range(n_phases):
-        pheromone_matrix[phase_i] = {}
-        
-        if phase_i < len(phase_types) and phase_types[phase_i]:
-            # Green/red phase
-            duration_range = range(GREEN_MIN_DURATION, GREEN_MAX_DURATION + 1)
-        else:
-            # Yellow phase
-            duration_range = range(YELLOW_MIN_DURATION, YELLOW_MAX_DURATION + 1)
-        
-        # Initialize with small uniform pheromone levels
-        for duration in duration_range:
-            pheromone_matrix[phase_i][duration] = 0.1
-    
-    return pheromone_matrix
+    phase_types = [phase_i < len(phase_types) and bool(phase_types[phase_i]) for phase_i in range(n_phases)]
+    return PheromoneMatrix(phase_types, initial_level=0.1)
+
+def generate_ant_solutions(n_ants, pheromone_matrix, exploration_rate=None, rng=np.random,
+                           alpha=None, beta=None):
+    """
+    Generate a whole iteration of ant solutions from the current pheromone levels.
+
+    Args:
+        n_ants: Number of solutions to construct
+        pheromone_matrix: PheromoneMatrix with levels from previous ants
+        exploration_rate: Pure exploration probability (defaults to EXPLORATION_RATE)
+        rng: Random source with a NumPy-style random(size) method
+        alpha: Pheromone importance weight (defaults to ALPHA)
+        beta: Heuristic importance weight (defaults to BETA)
+
+    Returns:
+        List of solutions, each a list of int phase durations
+    """
+    rate = EXPLORATION_RATE if exploration_rate is None else exploration_rate
+    alpha = ALPHA if alpha is None else alpha
+    beta = BETA if beta is None else beta
+    return pheromone_matrix.sample(n_ants, rate, alpha, beta, rng).tolist()
 
 def generate_ant_solution(n_phases, phase_types, pheromone_matrix):
     """
     Generate a traffic light solution using pheromone-guided probabilistic construction.
     This is true ACO where each ant's choice is influenced by collective wisdom.
 
+    The durations are drawn by PheromoneMatrix.sample from NumPy's global generator,
+    so a seeded run gives different solutions than the earlier per-phase
+    random/np.random.choice construction did.
+
     Args:
-        n_phases: Number of phases
-        phase_types: True=green/red, False=yellow
+        n_phases: Number of phases (must match the pheromone matrix)
+        phase_types: True=green/red, False=yellow (must match the pheromone matrix)
         pheromone_matrix: Pheromone levels from previous ants
 
     Returns:
         List[int]: phase durations
     """
-    solution = []
-
-    for phase_i in range(n_phases):
-        # Determine valid duration options for this phase
-        if phase_i < len(phase_types) and phase_types[phase_i]:
-            duration_options = list(range(GREEN_MIN_DURATION, GREEN_MAX_DURATION + 1))
-        else:
-            duration_options = list(range(YELLOW_MIN_DURATION, YELLOW_MAX_DURATION + 1))
-
-        # Pure exploration with some probability
-        if random.random() < EXPLORATION_RATE:
-            chosen_duration = random.choice(duration_options)
-        else:
-            # Pheromone-guided selection (traditional ACO)
-            probabilities = []
-            
-            for duration in duration_options:
-                # Get pheromone level (with fallback)
-                pheromone = pheromone_matrix.get(phase_i, {}).get(duration, 0.1)
-                
-                # Simple heuristic (could be enhanced with traffic flow data)
-                heuristic = 1.0
-                
-                # ACO probability formula: τ^α × η^β
-                prob = (pheromone ** ALPHA) * (heuristic ** BETA)
-                probabilities.append(prob)
-            
-            # Normalize probabilities
-            total_prob = sum(probabilities)
-            if total_prob > 0:
-                probabilities = [p / total_prob for p in probabilities]
-                # Select duration based on collective ant wisdom
-                chosen_duration = np.random.choice(duration_options, p=probabilities)
-            else:
-                chosen_duration = random.choice(duration_options)
-
-        solution.append(chosen_duration)
-
-    return solution
-
-def update_pheromones(pheromone_matrix, all_solutions, all_costs, phase_types):
+    phase_types = [phase_i < len(phase_types) and bool(phase_types[phase_i]) for phase_i in range(n_phases)]
+    if n_phases != pheromone_matrix.n_phases or phase_types != pheromone_matrix.phase_types:
+        raise ValueError(f"Solution layout ({n_phases} phases) does not match the pheromone matrix "
+                         f"({pheromone_matrix.n_phases} phases)")
+    return generate_ant_solutions(1, pheromone_matrix)[0]
+
+def update_pheromones(pheromone_matrix, all_solutions, all_costs, phase_types, evaporation_rate=None,
+                      partial=None, fidelity=None):
     """
     Update pheromones based on ALL ant solutions (collective intelligence).
     This is where true ACO collaboration happens.
@@ -299,68 +403,365 @@ def update_pheromones(pheromone_matrix, all_solutions, all_costs, phase_types):
         all_solutions: Solutions from all ants
         all_costs: Corresponding costs
         phase_types: Phase type information
+        evaporation_rate: Trail decay per update (defaults to EVAPORATION_RATE)
+        partial: Optional flags marking raced-out ants whose cost is only a lower bound
+        fidelity: Optional fidelity per solution ('micro', 'meso', 'short'). Costs are
+            only comparable within one fidelity, so each level is normalized on its
+            own and its deposits are scaled by FIDELITY_WEIGHTS
     """
     n_phases = len(phase_types)
+    rate = EVAPORATION_RATE if evaporation_rate is None else evaporation_rate
+    partial = partial if partial is not None else [False] * len(all_solutions)
+    fidelity = fidelity if fidelity is not None else ['micro'] * len(all_solutions)
     
-    # 1. EVAPORATION: Pheromones decay over time
-    for phase_i in range(n_phases):
-        if phase_i in pheromone_matrix:
-            for duration in list(pheromone_matrix[phase_i].keys()):
-                pheromone_matrix[phase_i][duration] *= (1 - EVAPORATION_RATE)
-                # Remove very weak pheromone trails
-                if pheromone_matrix[phase_i][duration] < 0.01:
-                    pheromone_matrix[phase_i][duration] = 0.01
+    # 1. EVAPORATION: Pheromones decay over time (weak trails floor at 0.01)
+    pheromone_matrix.evaporate(rate, floor=0.01)
 
     # 2. REINFORCEMENT: All ants contribute (better solutions contribute more)
-    valid_solutions = [(sol, cost) for sol, cost in zip(all_solutions, all_costs) 
-                      if np.isfinite(cost) and len(sol) == n_phases]
-    
-    if not valid_solutions:
-        return
-    
-    # Find best and worst costs for normalization
-    costs = [cost for _, cost in valid_solutions]
-    min_cost = min(costs)
-    max_cost = max(costs)
-    cost_range = max_cost - min_cost if max_cost > min_cost else 1.0
-
-    for solution, cost in valid_solutions:
-        # Better solutions (lower cost) deposit more pheromone
-        if cost_range > 0:
-            # Normalize cost to [0, 1] then invert for pheromone amount
-            normalized_cost = (cost - min_cost) / cost_range
-            pheromone_amount = (1.0 - normalized_cost) + 0.1  # Range: [0.1, 1.1]
-        else:
-            pheromone_amount = 1.0
+    # Raced-out ants were proven worse than the incumbent but their true cost is
+    # unknown, so they get the minimum deposit and never stretch the normalization
+    raced_out = [sol for sol, cost, is_partial in zip(all_solutions, all_costs, partial)
+                 if is_partial and len(sol) == n_phases]
+    if raced_out:
+        pheromone_matrix.deposit(raced_out, 0.1)
+
+    elite = None
+    for level in sorted(set(fidelity), key=lambda f: -FIDELITY_WEIGHTS.get(f, 1.0)):
+        weight = FIDELITY_WEIGHTS.get(level, 1.0)
+        valid_solutions = [(sol, cost) for sol, cost, is_partial, f in zip(all_solutions, all_costs, partial, fidelity)
+                          if f == level and not is_partial and np.isfinite(cost) and len(sol) == n_phases]
         
-        # Deposit pheromone on the path this ant took
-        for phase_i, duration in enumerate(solution):
-            if phase_i >= n_phases:
-                break
-                
-            if phase_i not in pheromone_matrix:
-                pheromone_matrix[phase_i] = {}
-            if duration not in pheromone_matrix[phase_i]:
-                pheromone_matrix[phase_i][duration] = 0.1
-            
-            pheromone_matrix[phase_i][duration] += pheromone_amount
+        if not valid_solutions:
+            continue
+        
+        # Normalize cost to [0, 1] then invert for pheromone amount: range [0.1, 1.1]
+        costs = np.array([cost for _, cost in valid_solutions], dtype=float)
+        min_cost = costs.min()
+        max_cost = costs.max()
+        cost_range = max_cost - min_cost if max_cost > min_cost else 1.0
+        amounts = (1.0 - (costs - min_cost) / cost_range) + 0.1
+
+        pheromone_matrix.deposit([sol for sol, _ in valid_solutions], amounts * weight)
+
+        # The elite comes from the highest fidelity level that has a valid result
+        if elite is None:
+            elite = (valid_solutions[int(np.argmin(costs))][0], weight)
 
     # 3. ELITE REINFORCEMENT: Give extra boost to the best solution
-    if valid_solutions:
-        best_solution, best_cost = min(valid_solutions, key=lambda x: x[1])
+    if elite is not None:
         elite_boost = 2.0  # Elite solutions get double reinforcement
-        
-        for phase_i, duration in enumerate(best_solution):
-            if phase_i >= n_phases:
-                break
-            if phase_i in pheromone_matrix and duration in pheromone_matrix[phase_i]:
-                pheromone_matrix[phase_i][duration] += elite_boost
+        pheromone_matrix.deposit([elite[0]], elite_boost * elite[1])
+
+# ============================================================================
+# ASK/TELL OPTIMIZER
+# ============================================================================
+
+class ACOConfig(NamedTuple):
+    """
+    Immutable settings for one optimization run.
+
+    Build it with ACOConfig.from_dict so missing keys fall back to the module
+    defaults; use config._replace(...) for variants.
+    """
+    grid_size: int
+    n_vehicles: int
+    simulation_time: int
+    n_ants: int
+    n_iterations: int
+    evaporation_rate: float
+    exploration_rate: float
+    alpha: float
+    beta: float
+    waiting_penalty: float
+    n_workers: int
+    evaluation_backend: str
+    use_cache: bool
+    cache_size: int
+    cache_db: Optional[str]
+    seed: Optional[int]
+    mode: str
+    racing: bool
+    auto_horizon: bool
+    multi_fidelity: bool
+    screening_fidelity: str
+    promote_top_k: int
+    surrogate: bool
+    surrogate_oversample: int
+    surrogate_keep: float
+    surrogate_exploration: float
+    sumo_seeds: Optional[tuple]
+    trip_output: str
+
+    @classmethod
+    def from_dict(cls, config=None):
+        """Create a config from the dictionary format used throughout the project."""
+        config = config or {}
+        sumo_seeds = None
+        if config.get('common_random_numbers', COMMON_RANDOM_NUMBERS):
+            sumo_seeds = tuple(config.get('sumo_seeds') or
+                               crn_seed_set(config.get('seed', SEED), config.get('crn_replications', CRN_REPLICATIONS)))
+        return cls(
+            grid_size=config.get('grid_size', GRID_SIZE),
+            n_vehicles=config.get('n_vehicles', N_VEHICLES),
+            simulation_time=config.get('simulation_time', SIMULATION_TIME),
+            n_ants=config.get('n_ants', N_ANTS),
+            n_iterations=config.get('n_iterations', N_ITERATIONS),
+            evaporation_rate=config.get('evaporation_rate', EVAPORATION_RATE),
+            exploration_rate=config.get('exploration_rate', EXPLORATION_RATE),
+            alpha=config.get('pheromone_weight', ALPHA),          # Pheromone importance
+            beta=config.get('heuristic_weight', BETA),            # Heuristic importance
+            waiting_penalty=config.get('stop_penalty', WAITING_PENALTY),  # Cost function penalty
+            n_workers=config.get('n_workers', N_WORKERS),         # Parallel SUMO evaluations
+            evaluation_backend=config.get('evaluation_backend', EVALUATION_BACKEND),
+            use_cache=config.get('use_cache', USE_EVALUATION_CACHE),
+            cache_size=config.get('cache_size', CACHE_SIZE),
+            cache_db=config.get('cache_db', CACHE_DB_PATH),
+            seed=config.get('seed', SEED),
+            mode=config.get('aco_mode', ACO_MODE),
+            racing=config.get('racing', RACING),
+            auto_horizon=config.get('auto_horizon', AUTO_HORIZON),
+            multi_fidelity=config.get('multi_fidelity', MULTI_FIDELITY),
+            screening_fidelity=config.get('screening_fidelity', SCREENING_FIDELITY),
+            promote_top_k=config.get('promote_top_k', PROMOTE_TOP_K),
+            surrogate=config.get('use_surrogate', USE_SURROGATE),
+            surrogate_oversample=config.get('surrogate_oversample', SURROGATE_OVERSAMPLE),
+            surrogate_keep=config.get('surrogate_keep', SURROGATE_KEEP),
+            surrogate_exploration=config.get('surrogate_exploration', SURROGATE_EXPLORATION),
+            sumo_seeds=sumo_seeds,                                 # None unless common random numbers are on
+            trip_output=config.get('trip_output', TRIP_OUTPUT)
+        )
+
+class ACOOptimizer:
+    """
+    Ask/tell driver for the pheromone colony.
+
+    Each optimizer owns its config, pheromone matrix, best-so-far and NumPy random
+    generator, so several optimizations can share a process or run on threads. Any
+    scheduler can drive it: ask() for candidates, evaluate them however it likes,
+    then tell() the metrics back.
+    """
+
+    def __init__(self, phase_types, config=None, seed=None):
+        self.config = config if isinstance(config, ACOConfig) else ACOConfig.from_dict(config)
+        self.phase_types = list(phase_types)
+        self.rng = np.random.default_rng(self.config.seed if seed is None else seed)
+        self.pheromone_matrix = initialize_pheromone_matrix(len(self.phase_types), self.phase_types)
+
+        self.best_cost = float('inf')
+        self.best_solution = None
+        self.best_metrics = None
+        self.iteration = 0
+        self.evaluations = 0
+        self._recent_costs = deque(maxlen=max(1, self.config.n_ants))
+        self._lock = threading.Lock()
+
+    def cost(self, metrics):
+        """Cost of one evaluation under this optimizer's waiting penalty."""
+        return calculate_cost(metrics, self.config.waiting_penalty)
+
+    def ask(self, n_ants=None):
+        """
+        Construct a batch of candidate solutions from the current pheromones.
+
+        By default one slot of the colony is left for the elite solution, which
+        tell() injects without re-evaluation.
+        """
+        if n_ants is None:
+            n_ants = self.config.n_ants - (1 if self.best_solution is not None else 0)
+        with self._lock:
+            return generate_ant_solutions(n_ants, self.pheromone_matrix, self.config.exploration_rate,
+                                          self.rng, self.config.alpha, self.config.beta)
+
+    def tell(self, solutions, metrics):
+        """
+        Report evaluated solutions, update pheromones and the best-so-far.
+
+        Args:
+            solutions: Solutions returned by ask()
+            metrics: One metrics dictionary per solution
+
+        Returns:
+            Dictionary with per-solution costs, the indices that improved the global
+            best (in order), and the iteration/global best
+        """
+        costs = [self.cost(m) for m in metrics]
+
+        with self._lock:
+            all_solutions = [list(sol) for sol in solutions]
+            all_costs = list(costs)
+            all_metrics = list(metrics)
+            all_partial = [bool(m.get('partial')) for m in metrics]
+            all_fidelity = [m.get('fidelity', 'micro') for m in metrics]
+
+            # Elite solution for stability (no re-eval needed)
+            if self.best_solution is not None:
+                all_solutions.insert(0, list(self.best_solution))
+                all_costs.insert(0, self.best_cost)
+                all_metrics.insert(0, self.best_metrics)
+                all_partial.insert(0, False)
+                all_fidelity.insert(0, 'micro')
+
+            improved = []
+            for i, (solution, cost, solution_metrics) in enumerate(zip(solutions, costs, metrics)):
+                # Only full-fidelity results may become the reported best
+                if (cost < self.best_cost and not solution_metrics.get('partial')
+                        and solution_metrics.get('fidelity', 'micro') == 'micro'):
+                    self.best_cost = cost
+                    self.best_solution = list(solution)
+                    self.best_metrics = solution_metrics
+                    improved.append(i)
+
+            update_pheromones(self.pheromone_matrix, all_solutions, all_costs, self.phase_types,
+                              self.config.evaporation_rate, all_partial, all_fidelity)
+            self.iteration += 1
+
+            self.evaluations += len(solutions)
+            self._recent_costs.extend(c for c, m in zip(costs, metrics)
+                                      if np.isfinite(c) and not m.get('partial')
+                                      and m.get('fidelity', 'micro') == 'micro')
+
+            # Iteration best among full-fidelity results (low-fidelity costs are not comparable)
+            ranked = [c if f == 'micro' and not p else float('inf')
+                      for c, f, p in zip(all_costs, all_fidelity, all_partial)]
+            if all_costs and not np.isfinite(min(ranked)):
+                ranked = all_costs
+            iteration_best_idx = int(np.argmin(ranked)) if all_costs else None
+            return {
+                'costs': costs,
+                'improved': improved,
+                'iteration_best_cost': all_costs[iteration_best_idx] if all_costs else float('inf'),
+                'iteration_best_metrics': all_metrics[iteration_best_idx] if all_costs else None,
+                'best_cost': self.best_cost,
+                'best_solution': list(self.best_solution) if self.best_solution is not None else None
+            }
+
+    def tell_one(self, solution, metrics):
+        """
+        Steady-state update for a single finished evaluation.
+
+        One generation's evaporation and elite boost are spread over n_ants updates,
+        and the deposit is normalized against the last n_ants finite costs, so a
+        colony fed one ant at a time sees the same pressure as the generational loop.
+
+        Returns:
+            Dictionary with the cost, whether it improved the global best, and the best
+        """
+        cost = self.cost(metrics)
+        n_ants = max(1, self.config.n_ants)
+
+        with self._lock:
+            step_rate = 1.0 - (1.0 - self.config.evaporation_rate) ** (1.0 / n_ants)
+            self.pheromone_matrix.evaporate(step_rate, floor=0.01)
+
+            is_partial = bool(metrics.get('partial'))
+            improved = cost < self.best_cost and not is_partial
+            if improved:
+                self.best_cost = cost
+                self.best_solution = list(solution)
+                self.best_metrics = metrics
+
+            if is_partial and len(solution) == self.pheromone_matrix.n_phases:
+                self.pheromone_matrix.deposit([solution], 0.1)  # Raced out: minimum deposit
+            elif np.isfinite(cost) and len(solution) == self.pheromone_matrix.n_phases:
+                self._recent_costs.append(cost)
+                min_cost = min(self._recent_costs)
+                max_cost = max(self._recent_costs)
+                cost_range = max_cost - min_cost if max_cost > min_cost else 1.0
+                self.pheromone_matrix.deposit([solution], (1.0 - (cost - min_cost) / cost_range) + 0.1)
+
+            if self.best_solution is not None:
+                self.pheromone_matrix.deposit([self.best_solution], 2.0 / n_ants)
+
+            self.evaluations += 1
+            return {
+                'cost': cost,
+                'improved': improved,
+                'best_cost': self.best_cost,
+                'best_solution': list(self.best_solution) if self.best_solution is not None else None
+            }
+
+def _batch_makespan(durations, n_workers):
+    """Wall time of a batch run on n_workers threads that each take the next task when free."""
+    finish_times = [0.0] * min(max(1, n_workers), max(1, len(durations)))
+    for seconds in durations:
+        heapq.heapreplace(finish_times, finish_times[0] + seconds)
+    return max(finish_times)
+
+def run_steady_state(optimizer, evaluate, n_evaluations, n_workers=1, on_result=None):
+    """
+    Asynchronous steady-state ACO: keep n_workers evaluations in flight and update
+    pheromones as soon as each one finishes, handing the freed worker a fresh ant.
+
+    Args:
+        optimizer: ACOOptimizer to drive
+        evaluate: Callable mapping a solution to a metrics dictionary
+        n_evaluations: Total number of ants to evaluate
+        n_workers: Concurrent evaluations
+        on_result: Optional callback(index, solution, metrics, report) per finished ant
+
+    Returns:
+        Dictionary with wall time, busy time and the worker idle time compared with
+        a generational loop over the same measured evaluation times
+    """
+    workers = max(1, int(n_workers or 1))
+
+    def timed(solution):
+        started = time.time()
+        metrics = evaluate(solution)
+        return metrics, time.time() - started
+
+    durations = []
+    submitted = 0
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = {}
+        while submitted < n_evaluations and len(in_flight) < workers:
+            solution = optimizer.ask(1)[0]
+            in_flight[executor.submit(timed, solution)] = solution
+            submitted += 1
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                solution = in_flight.pop(future)
+                metrics, seconds = future.result()
+                durations.append(seconds)
+                report = optimizer.tell_one(solution, metrics)
+                if on_result is not None:
+                    on_result(len(durations) - 1, solution, metrics, report)
+
+                if submitted < n_evaluations:
+                    new_solution = optimizer.ask(1)[0]
+                    in_flight[executor.submit(timed, new_solution)] = new_solution
+                    submitted += 1
+
+    wall_seconds = time.time() - start_time
+    busy_seconds = float(sum(durations))
+
+    # Replay the same evaluation times as barrier-separated generations of n_ants
+    batch = max(1, optimizer.config.n_ants)
+    generational_seconds = sum(_batch_makespan(durations[i:i + batch], workers)
+                               for i in range(0, len(durations), batch))
+
+    steady_idle = max(0.0, workers * wall_seconds - busy_seconds)
+    generational_idle = max(0.0, workers * generational_seconds - busy_seconds)
+    return {
+        'evaluations': len(durations),
+        'n_workers': workers,
+        'wall_seconds': wall_seconds,
+        'busy_seconds': busy_seconds,
+        'steady_state_idle_seconds': steady_idle,
+        'generational_idle_seconds': generational_idle,
+        'idle_seconds_removed': max(0.0, generational_idle - steady_idle),
+        'estimated_generational_wall_seconds': generational_seconds
+    }
 
 # ============================================================================
 # SUMO GUI VISUALIZATION
 # ============================================================================
 
-def launch_sumo_gui_with_solution(best_solution, net_file, route_file, paths):
+def launch_sumo_gui_with_solution(best_solution, net_file, route_file, paths, sim_time=None):
     """
     Launch SUMO GUI with the optimized traffic light solution applied.
     
@@ -369,6 +770,7 @@ def launch_sumo_gui_with_solution(best_solution, net_file, route_file, paths):
         net_file: Original SUMO network file
         route_file: SUMO route file  
         paths: Project paths dictionary
+        sim_time: Simulation time of the run (defaults to SIMULATION_TIME)
     """
     try:
         print_progress("  Preparing SUMO GUI with optimized solution...")
@@ -386,7 +788,7 @@ def launch_sumo_gui_with_solution(best_solution, net_file, route_file, paths):
         apply_solution_to_network(gui_net_file, best_solution)
         
         # Create SUMO configuration for GUI
-        create_gui_sumo_config(gui_cfg_file, gui_net_file, route_file)
+        create_gui_sumo_config(gui_cfg_file, gui_net_file, route_file, sim_time)
         
         # Check for SUMO GUI binary
         try:
@@ -440,7 +842,7 @@ def launch_sumo_gui_with_solution(best_solution, net_file, route_file, paths):
         print_progress(f"   3. Click play to see your optimized traffic lights!")
         return False
 
-def create_gui_sumo_config(cfg_file, net_file, route_file):
+def create_gui_sumo_config(cfg_file, net_file, route_file, sim_time=None):
     """Create SUMO configuration file optimized for GUI visualization."""
     net_file_abs = os.path.abspath(net_file)
     route_file_abs = os.path.abspath(route_file)
@@ -451,7 +853,8 @@ def create_gui_sumo_config(cfg_file, net_file, route_file):
     vtype_file_abs = os.path.abspath(vtype_file)
     
     # Extended simulation time for better visualization
-    gui_simulation_time = max(SIMULATION_TIME, 1800)  # At least 30 minutes for GUI
+    simulation_time = sim_time if sim_time is not None else SIMULATION_TIME
+    gui_simulation_time = max(simulation_time, 1800)  # At least 30 minutes for GUI
     
     config_content = f'''<?xml version="1.0" encoding="UTF-8"?>
 <configuration>
@@ -484,7 +887,67 @@ def create_gui_sumo_config(cfg_file, net_file, route_file):
 # SUMO SIMULATION AND EVALUATION
 # ============================================================================
 
-def evaluate_solution(solution, net_file, route_file, temp_dir):
+def simulation_horizon(net_file, route_file, max_time=None):
+    """
+    Auto-horizon: end time from the routes' latest departure plus a travel-time bound.
+
+    The bound assumes every vehicle may wait a full worst-case cycle at each signal
+    it passes, but it ignores queueing behind other vehicles and insertion delay,
+    so in congested scenarios some vehicles may still be running at the horizon.
+    Those are counted in metrics['unfinished'] and charged by calculate_cost
+    (UNFINISHED_PENALTY), so cutting them off never makes a solution look
+    cheaper. Never exceeds max_time (defaults to SIMULATION_TIME).
+    """
+    max_time = max_time if max_time is not None else SIMULATION_TIME
+    horizon = estimate_simulation_horizon(net_file, route_file, GREEN_MAX_DURATION, YELLOW_MAX_DURATION)
+    if horizon is None or horizon >= max_time:
+        return max_time
+    print_progress(f"   Auto horizon: {horizon}s instead of {max_time}s")
+    return horizon
+
+def evaluation_settings(backend='subprocess', time_to_teleport=300, sim_time=None, fidelity='micro',
+                        sumo_seed=None):
+    """Simulation settings that influence results (part of the evaluation cache key)."""
+    settings = {
+        'simulation_time': sim_time if sim_time is not None else SIMULATION_TIME,
+        'time_to_teleport': time_to_teleport,
+        'backend': backend
+    }
+    if fidelity != 'micro':
+        settings['fidelity'] = fidelity  # Full-fidelity keys stay as they were
+    if sumo_seed is not None:
+        settings['sumo_seed'] = int(sumo_seed)
+    return settings
+
+def crn_seed_set(seed, n_replications=CRN_REPLICATIONS):
+    """Explicit SUMO seeds shared by every candidate under common random numbers."""
+    base = SEED if seed is None else int(seed)
+    return [base + r for r in range(max(1, int(n_replications)))]
+
+def combine_replications(replications, sumo_seeds):
+    """
+    Average one solution's metrics over its common-random-number replications.
+
+    The per-seed metrics stay available under 'replications' for paired comparisons.
+    A replication in which no vehicle finished fails the whole evaluation, as a single
+    failed run would.
+    """
+    combined = {
+        'sumo_seeds': list(sumo_seeds),
+        'replications': list(replications),
+        'fidelity': replications[0].get('fidelity', 'micro')
+    }
+    if any(m.get('vehicles', 0) == 0 or not np.isfinite(m.get('total_time', float('inf'))) for m in replications):
+        combined.update(total_time=float('inf'), max_stop=0, vehicles=0)
+        return combined
+    for key in ('total_time', 'max_stop', 'avg_wait', 'wait_p95', 'vehicles', 'unfinished'):
+        values = [m[key] for m in replications if key in m]
+        if values:
+            combined[key] = float(np.mean(values))
+    return combined
+
+def evaluate_solution(solution, net_file, route_file, temp_dir, cache=None, sim_time=None, n_vehicles=None,
+                      fidelity='micro', sumo_seed=None, trip_output=None):
     """
     Evaluate a traffic light solution using SUMO simulation.
     
@@ -493,29 +956,69 @@ def evaluate_solution(solution, net_file, route_file, temp_dir):
         net_file: SUMO network file
         route_file: SUMO route file
         temp_dir: Temporary directory for simulation files
+        cache: Optional EvaluationCache (defaults to EVALUATION_CACHE)
+        sim_time: Simulation end time (defaults to SIMULATION_TIME)
+        n_vehicles: Expected vehicle count for completion warnings (defaults to N_VEHICLES)
+        fidelity: 'micro' (full microscopic run), 'meso' (SUMO mesoscopic model) or
+            'short' (first SHORT_HORIZON_FRACTION of the horizon); stored on the metrics
+        sumo_seed: Explicit SUMO --seed (None keeps SUMO's default seed)
+        trip_output: 'tripinfo' or 'statistics' (defaults to TRIP_OUTPUT); both give
+            the same metrics, so it is not part of the cache key
     
     Returns:
         Dictionary with performance metrics
     """
+    cache = cache if cache is not None else EVALUATION_CACHE
+    if cache is None:
+        return run_sumo_evaluation(solution, net_file, route_file, temp_dir, sim_time, n_vehicles, fidelity, sumo_seed,
+                                   trip_output)
+
+    from .evaluation_cache import make_cache_key
+    cache_key = make_cache_key(solution, net_file, route_file,
+                               settings=evaluation_settings(sim_time=sim_time, fidelity=fidelity, sumo_seed=sumo_seed))
+    metrics = cache.get(cache_key)
+    if metrics is None:
+        metrics = run_sumo_evaluation(solution, net_file, route_file, temp_dir, sim_time, n_vehicles, fidelity,
+                                      sumo_seed, trip_output)
+        cache.put(cache_key, metrics)
+    metrics.setdefault('fidelity', fidelity)
+    return metrics
+
+def run_sumo_evaluation(solution, net_file, route_file, temp_dir, sim_time=None, n_vehicles=None, fidelity='micro',
+                        sumo_seed=None, trip_output=None):
+    """Run one SUMO subprocess for a solution and parse its tripinfo (or statistics) output."""
+    expected_vehicles = n_vehicles if n_vehicles is not None else N_VEHICLES
+    trip_output = trip_output or TRIP_OUTPUT
+    if fidelity == 'short':
+        sim_time = max(1, int((sim_time if sim_time is not None else SIMULATION_TIME) * SHORT_HORIZON_FRACTION))
     try:
         # Create temporary files for this evaluation
-        temp_net_file = os.path.join(temp_dir, f"temp_{random.randint(1000,9999)}.net.xml")
-        temp_cfg_file = temp_net_file.replace('.net.xml', '.sumocfg')
-        temp_tripinfo_file = temp_net_file.replace('.net.xml', '_tripinfo.xml')
+        temp_stem = make_temp_stem(temp_dir)
+        temp_tls_file = temp_stem + ".tls.xml"
+        temp_cfg_file = temp_stem + ".sumocfg"
+        temp_tripinfo_file = temp_stem + "_tripinfo.xml"
+        temp_statistics_file = temp_stem + "_stats.xml" if trip_output == 'statistics' else None
         
-        # Copy and modify network file with new traffic light timings
-        shutil.copy2(net_file, temp_net_file)
-        apply_solution_to_network(temp_net_file, solution)
+        # Emit only the candidate tlLogic programs; the network itself is never copied
+        write_solution_program(net_file, solution, temp_tls_file)
         
-        # Create SUMO configuration
-        create_sumo_config(temp_cfg_file, temp_net_file, route_file, temp_tripinfo_file, SIMULATION_TIME)
+        # Create SUMO configuration (statistics mode counts unfinished vehicles from the
+        # aggregates, so the tripinfo pass only needs the arrived ones)
+        create_sumo_config(temp_cfg_file, net_file, route_file, temp_tripinfo_file, sim_time,
+                           additional_files=[temp_tls_file], statistics_file=temp_statistics_file,
+                           write_unfinished=temp_statistics_file is None)
         
         # Run SUMO simulation
-        result = subprocess.run([
+        command = [
             'sumo', '-c', temp_cfg_file,
             '--no-warnings', '--no-step-log',
             '--time-to-teleport', '300'  # Allow more time before teleporting stuck vehicles
-        ], capture_output=True, text=True, timeout=300)  # Increase timeout to 5 minutes
+        ]
+        if fidelity == 'meso':
+            command.append('--mesosim')  # Queue-based model, much cheaper per vehicle
+        if sumo_seed is not None:
+            command += ['--seed', str(int(sumo_seed))]
+        result = subprocess.run(command, capture_output=True, text=True, timeout=300)  # Increase timeout to 5 minutes
         
         # Debug: Check if simulation had errors
         if result.returncode != 0:
@@ -524,8 +1027,10 @@ def evaluate_solution(solution, net_file, route_file, temp_dir):
                 print_progress(f"   SUMO stderr: {result.stderr[:200]}")
         
         # Parse results
-        if os.path.exists(temp_tripinfo_file):
-            metrics = parse_tripinfo_file(temp_tripinfo_file)
+        if temp_statistics_file is not None and os.path.exists(temp_statistics_file):
+            metrics = parse_statistics_output(temp_statistics_file, temp_tripinfo_file, expected_vehicles)
+        elif os.path.exists(temp_tripinfo_file):
+            metrics = parse_tripinfo_file(temp_tripinfo_file, expected_vehicles)
             # Debug: Show vehicle completion info
             vehicles_completed = metrics.get('vehicles', 0)
             if vehicles_completed == 0:
@@ -533,8 +1038,8 @@ def evaluate_solution(solution, net_file, route_file, temp_dir):
                 # Check file size to see if it's empty
                 file_size = os.path.getsize(temp_tripinfo_file)
                 print_progress(f"   Tripinfo file size: {file_size} bytes")
-            elif vehicles_completed < N_VEHICLES:
-                print_progress(f"     Only {vehicles_completed}/{N_VEHICLES} vehicles completed")
+            elif vehicles_completed < expected_vehicles:
+                print_progress(f"     Only {vehicles_completed}/{expected_vehicles} vehicles completed")
                 # Check SUMO output for clues about missing vehicles
                 if result.stderr and ("teleport" in result.stderr.lower() or "collision" in result.stderr.lower()):
                     print_progress(f"   SUMO issues detected: {result.stderr[:100]}...")
@@ -543,18 +1048,146 @@ def evaluate_solution(solution, net_file, route_file, temp_dir):
             metrics = {'total_time': float('inf'), 'max_stop': 0, 'vehicles': 0}
         
         # Cleanup temporary files
-        for temp_file in [temp_net_file, temp_cfg_file, temp_tripinfo_file]:
-            if os.path.exists(temp_file):
+        for temp_file in [temp_tls_file, temp_cfg_file, temp_tripinfo_file, temp_statistics_file]:
+            if temp_file and os.path.exists(temp_file):
                 os.remove(temp_file)
         
+        metrics['fidelity'] = fidelity
         return metrics
         
     except Exception as e:
         print_progress(f"    Evaluation error: {e}")
-        return {'total_time': float('inf'), 'max_stop': 0, 'vehicles': 0}
+        return {'total_time': float('inf'), 'max_stop': 0, 'vehicles': 0, 'fidelity': fidelity}
+
+def evaluate_solutions_parallel(solutions, net_file, route_file, temp_dir, n_workers=None, evaluator=None,
+                                cache=None, sim_time=None, n_vehicles=None, cost_bound=None, fidelity='micro',
+                                sumo_seeds=None, trip_output=None):
+    """
+    Evaluate a batch of solutions, running up to n_workers SUMO processes at once.
+
+    Each evaluation spends its time waiting on a SUMO subprocess, so a thread pool
+    is enough to keep several cores busy. Results are returned in the same order as
+    the input solutions, which keeps downstream processing identical to a serial run.
+
+    Args:
+        solutions: List of phase duration lists
+        net_file: SUMO network file
+        route_file: SUMO route file
+        temp_dir: Temporary directory for simulation files
+        n_workers: Maximum concurrent evaluations (defaults to N_WORKERS)
+        evaluator: Optional persistent backend (e.g. traci_backend.SumoWorkerPool)
+            used instead of starting one SUMO subprocess per solution
+        cache: Optional EvaluationCache (defaults to EVALUATION_CACHE)
+        sim_time: Simulation end time (defaults to SIMULATION_TIME)
+        n_vehicles: Expected vehicle count for completion warnings (defaults to N_VEHICLES)
+        cost_bound: Incumbent cost for racing; an evaluator that supports it stops
+            ants that provably cannot beat it and returns partial metrics
+        fidelity: Evaluation fidelity (see evaluate_solution); persistent evaluators
+            only run the full microsim, so lower fidelities use subprocesses
+        sumo_seeds: Common random numbers; every solution is simulated once per seed
+            (as subprocesses) and gets metrics averaged by combine_replications
+        trip_output: Subprocess output mode (see evaluate_solution)
+
+    Returns:
+        List of metrics dictionaries, one per solution
+    """
+    cache = cache if cache is not None else EVALUATION_CACHE
+    if evaluator is not None and fidelity == 'micro' and not sumo_seeds:
+        return _evaluate_with_backend(solutions, net_file, route_file, evaluator, cache, sim_time, cost_bound)
+
+    seeds = list(sumo_seeds) if sumo_seeds else [None]
+    tasks = [(solution, seed) for solution in solutions for seed in seeds]
+    workers = n_workers if n_workers is not None else N_WORKERS
+    workers = max(1, min(int(workers or 1), len(tasks)))
+
+    def evaluate(task):
+        solution, seed = task
+        return evaluate_solution(solution, net_file, route_file, temp_dir, cache, sim_time, n_vehicles, fidelity, seed,
+                                 trip_output)
+
+    if workers == 1:
+        results = [evaluate(task) for task in tasks]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(evaluate, tasks))
+
+    if not sumo_seeds:
+        return results
+    n_seeds = len(seeds)
+    return [combine_replications(results[i * n_seeds:(i + 1) * n_seeds], seeds) for i in range(len(solutions))]
+
+def _evaluate_with_backend(solutions, net_file, route_file, evaluator, cache=None, sim_time=None, cost_bound=None):
+    """Evaluate solutions on a persistent backend, serving repeats from the cache."""
+    if cache is None:
+        return [dict(metrics, fidelity='micro') for metrics in evaluator.evaluate_many(solutions, cost_bound=cost_bound)]
+
+    from .evaluation_cache import make_cache_key
+    settings = evaluation_settings(backend=getattr(evaluator, 'backend', EVALUATION_BACKEND), sim_time=sim_time)
+    keys = [make_cache_key(solution, net_file, route_file, settings=settings) for solution in solutions]
+    results = [cache.get(key) for key in keys]
+
+    missing = [i for i, metrics in enumerate(results) if metrics is None]
+    if missing:
+        fresh = evaluator.evaluate_many([solutions[i] for i in missing], cost_bound=cost_bound)
+        for i, metrics in zip(missing, fresh):
+            cache.put(keys[i], metrics)
+            results[i] = metrics
+
+    return [dict(metrics, fidelity='micro') for metrics in results]
+
+def screen_and_promote(solutions, net_file, route_file, temp_dir, config, evaluator=None, cache=None,
+                       cost_bound=None):
+    """
+    Multi-fidelity evaluation of one iteration.
+
+    Every ant is first run at config.screening_fidelity; the config.promote_top_k best
+    screened ants are then confirmed with the full microscopic run (on the persistent
+    evaluator if one is given). Ants that were not promoted keep their low-fidelity
+    metrics, marked through their 'fidelity' key.
+
+    Returns:
+        (metrics list in input order, stats dictionary with counts and seconds)
+    """
+    start = time.time()
+    screened = evaluate_solutions_parallel(solutions, net_file, route_file, temp_dir, config.n_workers, None,
+                                           cache, config.simulation_time, config.n_vehicles,
+                                           fidelity=config.screening_fidelity, sumo_seeds=config.sumo_seeds,
+                                           trip_output=config.trip_output)
+    screen_seconds = time.time() - start
+
+    costs = [calculate_cost(metrics, config.waiting_penalty) for metrics in screened]
+    k = min(max(1, int(config.promote_top_k)), len(solutions))
+    promoted = [int(i) for i in np.argsort(costs, kind='stable')[:k]]
+
+    start = time.time()
+    confirmed = evaluate_solutions_parallel([solutions[i] for i in promoted], net_file, route_file, temp_dir,
+                                            config.n_workers, evaluator, cache, config.simulation_time,
+                                            config.n_vehicles, cost_bound, sumo_seeds=config.sumo_seeds,
+                                            trip_output=config.trip_output)
+    micro_seconds = time.time() - start
+
+    metrics = list(screened)
+    for i, full_metrics in zip(promoted, confirmed):
+        metrics[i] = full_metrics
+
+    return metrics, {
+        'screened': len(solutions),
+        'promoted': len(promoted),
+        'screen_seconds': screen_seconds,
+        'micro_seconds': micro_seconds
+    }
+
+def write_solution_program(net_file, solution, tls_file):
+    """
+    Write a solution as an additional tlLogic file for net_file.
+
+    The phase index is built once per network, so each ant only costs a few
+    kilobytes of output instead of a full network copy, parse and rewrite.
+    """
+    write_tls_program_file(build_phase_index(net_file), solution, tls_file)
 
 def apply_solution_to_network(net_file, solution):
-    """Apply traffic light solution to network file."""
+    """Apply traffic light solution to network file (full copy, used for GUI output)."""
     try:
         tree = ET.parse(net_file)
         root = tree.getroot()
@@ -571,8 +1204,14 @@ def apply_solution_to_network(net_file, solution):
     except Exception as e:
         print_progress(f"     Error applying solution: {e}")
 
-def create_sumo_config(cfg_file, net_file, route_file, tripinfo_file, sim_time=None):
-    """Create SUMO configuration file."""
+def create_sumo_config(cfg_file, net_file, route_file, tripinfo_file, sim_time=None, additional_files=None,
+                       statistics_file=None, write_unfinished=True):
+    """
+    Create SUMO configuration file (additional_files are loaded after the vehicle types).
+
+    With statistics_file, SUMO also writes its aggregated --statistic-output there.
+    write_unfinished adds vehicles still running at the end to the tripinfo output.
+    """
     # Use absolute paths to avoid path issues
     net_file_abs = os.path.abspath(net_file)
     route_file_abs = os.path.abspath(route_file)
@@ -582,19 +1221,24 @@ def create_sumo_config(cfg_file, net_file, route_file, tripinfo_file, sim_time=N
     sumo_data_dir = os.path.dirname(route_file_abs)
     vtype_file = os.path.join(sumo_data_dir, 'vtype.add.xml')
     vtype_file_abs = os.path.abspath(vtype_file)
+    additional_value = ','.join([vtype_file_abs] + [os.path.abspath(f) for f in (additional_files or [])])
     
     # Use passed simulation time or global default
     simulation_time = sim_time if sim_time is not None else SIMULATION_TIME
+    statistics_output = ''
+    if statistics_file is not None:
+        statistics_output = f'\n        <statistic-output value="{os.path.abspath(statistics_file)}"/>'
     
     config_content = f'''<?xml version="1.0" encoding="UTF-8"?>
 <configuration>
     <input>
         <net-file value="{net_file_abs}"/>
         <route-files value="{route_file_abs}"/>
-        <additional-files value="{vtype_file_abs}"/>
+        <additional-files value="{additional_value}"/>
     </input>
     <output>
         <tripinfo-output value="{tripinfo_file_abs}"/>
+        <tripinfo-output.write-unfinished value="{str(bool(write_unfinished)).lower()}"/>{statistics_output}
     </output>
     <time>
         <end value="{simulation_time}"/>
@@ -604,54 +1248,113 @@ def create_sumo_config(cfg_file, net_file, route_file, tripinfo_file, sim_time=N
     with open(cfg_file, 'w') as f:
         f.write(config_content)
 
-def parse_tripinfo_file(tripinfo_file):
-    """Parse SUMO tripinfo output to extract performance metrics."""
-    try:
-        tree = ET.parse(tripinfo_file)
-        root = tree.getroot()
+def parse_tripinfo_file(tripinfo_file, n_vehicles=None, with_ids=False):
+    """
+    Parse SUMO tripinfo output (.xml or .xml.gz) to extract performance metrics.
 
+    The file is streamed in chunks (iter_tripinfo_chunks): travel time and the
+    vehicle counts are running sums, and only the finished vehicles' waiting
+    times are kept for the percentiles. Vehicle ids ('completed_ids') are only
+    collected with with_ids.
+    """
+    try:
         total_time = 0.0
-        max_stop = 0.0
-        vehicle_count = 0
-        waiting_times = []
-        completed_vehicle_ids = []
-
-        for trip in root.findall('tripinfo'):
-            duration = float(trip.get('duration', '0'))
-            waiting_time = float(trip.get('waitingTime', '0'))
-            vehicle_id = trip.get('id', 'unknown')
-
-            total_time += duration
-            max_stop = max(max_stop, waiting_time)
-            vehicle_count += 1
-            waiting_times.append(waiting_time)
-            completed_vehicle_ids.append(vehicle_id)
-
-        # Debug info: show which vehicles completed
-        if vehicle_count < N_VEHICLES:
-            print_progress(f"     Only {vehicle_count}/{N_VEHICLES} vehicles completed")
-            # Show some completed IDs for debugging
-            if len(completed_vehicle_ids) > 0:
-                sample_ids = completed_vehicle_ids[:5]  # Show first 5
-                print_progress(f"   Completed vehicles (sample): {', '.join(sample_ids)}")
-
-        wait_p95 = float(np.percentile(waiting_times, 95)) if waiting_times else 0.0
-        avg_wait = float(np.mean(waiting_times)) if waiting_times else 0.0
-        return {
-            'total_time': total_time,
-            'max_stop': max_stop,
-            'wait_p95': wait_p95,
-            'avg_wait': avg_wait,
-            'vehicles': vehicle_count,
-            'completed_ids': completed_vehicle_ids
-        }
+        unfinished = 0
+        waits = []
+        completed_vehicle_ids = [] if with_ids else None
+        for chunk in iter_tripinfo_chunks(tripinfo_file, with_ids=with_ids):
+            if with_ids:
+                chunk, ids = chunk
+            finished = finished_trips(chunk)
+            total_time += float(chunk['duration'][finished].sum())
+            unfinished += int((~finished).sum())
+            waits.append(chunk['waitingTime'][finished])
+            if with_ids:
+                completed_vehicle_ids.extend(vehicle_id for vehicle_id, done in zip(ids, finished) if done)
+        waiting_times = np.concatenate(waits) if waits else np.zeros(0)
+        return trip_metrics_from_totals(total_time, len(waiting_times), waiting_times, completed_vehicle_ids,
+                                        n_vehicles, unfinished)
         
     except Exception as e:
         print_progress(f"     Error parsing tripinfo: {e}")
-        return {'total_time': float('inf'), 'max_stop': 0, 'vehicles': 0}
+        return {'total_time': float('inf'), 'max_stop': 0, 'vehicles': 0, 'unfinished': 0}
+
+def parse_statistics_output(statistics_file, tripinfo_file, n_vehicles=None):
+    """
+    Metrics from SUMO's aggregated --statistic-output plus a lean waiting-time pass.
+
+    total_time, vehicles and unfinished come from the statistics file. SUMO only
+    aggregates means, so max_stop, wait_p95 and avg_wait are taken from the
+    waiting times of the finished trips in tripinfo_file (read_waiting_times, no
+    durations or vehicle ids). The result has the same keys and values as
+    parse_tripinfo_file, without 'completed_ids'.
+    """
+    try:
+        root = ET.parse(statistics_file).getroot()
+        trips = root.find('vehicleTripStatistics')
+        vehicles = root.find('vehicles')
+        count = int(float(trips.get('count', '0'))) if trips is not None else 0
+        running = int(float(vehicles.get('running', '0'))) if vehicles is not None else 0
+        waiting = int(float(vehicles.get('waiting', '0'))) if vehicles is not None else 0
+        mean_duration = float(trips.get('duration', '0')) if trips is not None else 0.0
+        total_time = float(trips.get('totalTravelTime', count * mean_duration)) if trips is not None else 0.0
+
+        waits = read_waiting_times(tripinfo_file, capacity=count)
+        return trip_metrics_from_totals(total_time if count else 0.0, count, waits, None, n_vehicles,
+                                        running + waiting)
+
+    except Exception as e:
+        print_progress(f"     Error parsing statistics output: {e}")
+        return {'total_time': float('inf'), 'max_stop': 0, 'vehicles': 0, 'unfinished': 0}
+
+def build_trip_metrics(durations, waiting_times, completed_vehicle_ids, n_vehicles=None, unfinished=0):
+    """
+    Build the standard metrics dictionary from per-vehicle trip data.
+
+    Shared by the tripinfo parser and the TraCI backend so both produce identical keys.
+    'unfinished' counts vehicles still in the network when the horizon was reached.
+    completed_vehicle_ids may be None (streaming readers), which omits 'completed_ids'.
+    """
+    total_time = float(np.sum(durations)) if len(durations) else 0.0
+    return trip_metrics_from_totals(total_time, len(durations), waiting_times, completed_vehicle_ids,
+                                    n_vehicles, unfinished)
+
+def trip_metrics_from_totals(total_time, vehicle_count, waiting_times, completed_vehicle_ids=None, n_vehicles=None,
+                             unfinished=0):
+    """build_trip_metrics from the summed travel time and the finished vehicles' waiting times."""
+    expected_vehicles = n_vehicles if n_vehicles is not None else N_VEHICLES
+    max_stop = float(np.max(waiting_times)) if len(waiting_times) else 0.0
+
+    # Debug info: show which vehicles completed
+    if vehicle_count < expected_vehicles:
+        print_progress(f"     Only {vehicle_count}/{expected_vehicles} vehicles completed"
+                       + (f" ({unfinished} still running at the horizon)" if unfinished else ""))
+        # Show some completed IDs for debugging
+        if completed_vehicle_ids:
+            sample_ids = completed_vehicle_ids[:5]  # Show first 5
+            print_progress(f"   Completed vehicles (sample): {', '.join(sample_ids)}")
+
+    wait_p95 = float(np.percentile(waiting_times, 95)) if len(waiting_times) else 0.0
+    avg_wait = float(np.mean(waiting_times)) if len(waiting_times) else 0.0
+    metrics = {
+        'total_time': float(total_time),
+        'max_stop': max_stop,
+        'wait_p95': wait_p95,
+        'avg_wait': avg_wait,
+        'vehicles': int(vehicle_count),
+        'unfinished': int(unfinished)
+    }
+    if completed_vehicle_ids is not None:
+        metrics['completed_ids'] = list(completed_vehicle_ids)
+    return metrics
+
+def calculate_cost(metrics, waiting_penalty=None):
+    """Calculate cost function from simulation metrics (waiting_penalty defaults to WAITING_PENALTY)."""
+    penalty = WAITING_PENALTY if waiting_penalty is None else waiting_penalty
+    # Raced-out evaluations only carry a proven lower bound on their cost
+    if metrics.get('partial'):
+        return metrics.get('lower_bound_cost', float('inf'))
 
-def calculate_cost(metrics):
-    """Calculate cost function from simulation metrics."""
     total_time = metrics.get('total_time', float('inf'))
     # Prefer robust 95th percentile waiting time
     wait_p95 = metrics.get('wait_p95', None)
@@ -666,7 +1369,116 @@ def calculate_cost(metrics):
     wait_component = wait_p95 if wait_p95 is not None else max_stop
     # Cap waiting contribution to reduce outlier impact
     wait_component = min(wait_component, 60.0)
-    return avg_time + WAITING_PENALTY * wait_component
+    return avg_time + penalty * wait_component + unfinished_cost(metrics)
+
+def unfinished_cost(metrics):
+    """
+    Cost term for vehicles still running when the simulation ended.
+
+    Unfinished vehicles drop out of the travel-time average, so without this term
+    a solution that leaves vehicles stuck (or a shortened horizon that cuts them
+    off) would look cheaper. Never negative, so cost_lower_bound stays a bound.
+    """
+    unfinished = metrics.get('unfinished', 0) or 0
+    vehicles = metrics.get('vehicles', 0)
+    if unfinished <= 0:
+        return 0.0
+    return UNFINISHED_PENALTY * unfinished / (vehicles + unfinished)
+
+def cost_lower_bound(durations, waiting_times, elapsed_times, n_pending, waiting_penalty=None):
+    """
+    Lower bound on the final calculate_cost of a simulation that is still running.
+
+    Vehicles that never arrive drop out of the metrics, so the bound minimizes over
+    every subset of unfinished vehicles that could still arrive: each running vehicle
+    will take at least its elapsed time and wait at least as long as it has waited so
+    far, and a vehicle that has not departed yet is bounded by zero.
+
+    Args:
+        durations: Travel times of vehicles that already arrived
+        waiting_times: Waiting times of vehicles that already arrived
+        elapsed_times: Time spent in the network so far by each running vehicle
+        n_pending: Vehicles that have not departed yet
+        waiting_penalty: Cost function penalty (defaults to WAITING_PENALTY)
+
+    Returns:
+        Cost that no completion of the simulation can go below
+    """
+    penalty = WAITING_PENALTY if waiting_penalty is None else waiting_penalty
+    if len(durations) == 0:
+        return 0.0
+
+    # Average time: add unfinished vehicles (cheapest first) while they lower the mean
+    candidates = np.sort(np.concatenate([np.asarray(elapsed_times, dtype=float), np.zeros(int(n_pending))]))
+    n_done = len(durations)
+    running_sums = float(np.sum(durations)) + np.concatenate([[0.0], np.cumsum(candidates)])
+    avg_bound = float(np.min(running_sums / (n_done + np.arange(len(candidates) + 1))))
+
+    # Waiting percentile: treating every unfinished vehicle as zero wait can only lower it
+    n_unfinished = len(elapsed_times) + int(n_pending)
+    wait_bound = float(np.percentile(np.concatenate([np.asarray(waiting_times, dtype=float),
+                                                     np.zeros(n_unfinished)]), 95))
+    return avg_bound + penalty * min(wait_bound, 60.0)
+
+# Two-sided 95% Student t quantiles; missing degrees of freedom use the next lower entry
+T_CRITICAL_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+                 9: 2.262, 10: 2.228, 15: 2.131, 20: 2.086, 30: 2.042}
+
+def paired_difference_stats(costs_a, costs_b):
+    """
+    Paired comparison of two solutions simulated on the same seeds.
+
+    Differences are a - b per seed, so a negative mean favours a. Pairs where either
+    cost is not finite are dropped. The variance reduction compares var(a - b) with
+    var(a) + var(b), i.e. what pairing saved over independent runs.
+
+    Returns:
+        Dictionary with n, mean_difference, std_difference, standard_error, ci95
+        (low, high), t_statistic, wins (pairs where a < b) and variance_reduction
+    """
+    a = np.asarray(costs_a, dtype=float)
+    b = np.asarray(costs_b, dtype=float)
+    keep = np.isfinite(a) & np.isfinite(b)
+    a, b = a[keep], b[keep]
+    differences = a - b
+    n = len(differences)
+
+    stats = {
+        'n': n,
+        'mean_difference': float(differences.mean()) if n else float('nan'),
+        'std_difference': float('nan'),
+        'standard_error': float('nan'),
+        'ci95': (float('nan'), float('nan')),
+        't_statistic': float('nan'),
+        'wins': int((differences < 0).sum()),
+        'variance_reduction': float('nan')
+    }
+    if n < 2:
+        return stats
+
+    mean = stats['mean_difference']
+    std = float(differences.std(ddof=1))
+    standard_error = float(std / np.sqrt(n))
+    df = n - 1
+    t_critical = T_CRITICAL_95[max(k for k in T_CRITICAL_95 if k <= df)] if df <= 30 else 1.96
+    independent_variance = a.var(ddof=1) + b.var(ddof=1)
+
+    stats.update(
+        std_difference=std,
+        standard_error=standard_error,
+        ci95=(mean - t_critical * standard_error, mean + t_critical * standard_error),
+        t_statistic=mean / standard_error if standard_error > 0 else float('nan'),
+        variance_reduction=float(1.0 - std ** 2 / independent_variance) if independent_variance > 0 else float('nan')
+    )
+    return stats
+
+def describe_paired_difference(stats):
+    """One-line summary of paired_difference_stats for progress output."""
+    low, high = stats['ci95']
+    text = f"Δ = {stats['mean_difference']:+.1f} (95% CI {low:+.1f} to {high:+.1f}, n={stats['n']}, wins {stats['wins']}"
+    if np.isfinite(stats['variance_reduction']):
+        text += f", variance reduced {stats['variance_reduction']:.0%}"
+    return text + ")"
 
 # ============================================================================
 # BASELINE COMPARISON FUNCTIONS
@@ -730,7 +1542,7 @@ def create_baseline_solution(phase_types, green_duration=30, yellow_duration=4):
     
     return baseline_solution
 
-def evaluate_baseline_comparison(best_solution, phase_types, net_file, route_file, temp_dir):
+def evaluate_baseline_comparison(best_solution, phase_types, net_file, route_file, temp_dir, config=None, cache=None):
     """
     Compare the optimized solution against a baseline uniform timing.
     
@@ -740,24 +1552,31 @@ def evaluate_baseline_comparison(best_solution, phase_types, net_file, route_fil
         net_file: SUMO network file
         route_file: SUMO route file
         temp_dir: Temporary directory
+        config: Optional ACOConfig supplying simulation time and cost penalty
+        cache: Optional EvaluationCache
     
     Returns:
         Dictionary with comparison results
     """
     print_progress(" Evaluating baseline comparison...")
+    config = config if isinstance(config, ACOConfig) else ACOConfig.from_dict(config)
     
     # Create baseline solution (30s green, 4s yellow)
     baseline_solution = create_baseline_solution(phase_types, green_duration=30, yellow_duration=4)
     
     # Evaluate baseline solution
     print_progress("   Evaluating baseline (30s green, 4s yellow)...")
-    baseline_metrics = evaluate_solution(baseline_solution, net_file, route_file, temp_dir)
-    baseline_cost = calculate_cost(baseline_metrics)
+    baseline_metrics = evaluate_solutions_parallel([baseline_solution], net_file, route_file, temp_dir, 1, None, cache,
+                                                   config.simulation_time, config.n_vehicles,
+                                                   sumo_seeds=config.sumo_seeds, trip_output=config.trip_output)[0]
+    baseline_cost = calculate_cost(baseline_metrics, config.waiting_penalty)
     
-    # Evaluate optimized solution
+    # Evaluate optimized solution (on the same SUMO seeds under common random numbers)
     print_progress("   Evaluating optimized solution...")
-    optimized_metrics = evaluate_solution(best_solution, net_file, route_file, temp_dir)
-    optimized_cost = calculate_cost(optimized_metrics)
+    optimized_metrics = evaluate_solutions_parallel([best_solution], net_file, route_file, temp_dir, 1, None, cache,
+                                                    config.simulation_time, config.n_vehicles,
+                                                    sumo_seeds=config.sumo_seeds, trip_output=config.trip_output)[0]
+    optimized_cost = calculate_cost(optimized_metrics, config.waiting_penalty)
     
     # Calculate improvement
     if baseline_cost != float('inf') and optimized_cost != float('inf'):
@@ -783,11 +1602,19 @@ def evaluate_baseline_comparison(best_solution, phase_types, net_file, route_fil
             'absolute': absolute_improvement
         }
     }
+    if config.sumo_seeds:
+        comparison_results['paired'] = paired_difference_stats(
+            [calculate_cost(m, config.waiting_penalty) for m in optimized_metrics.get('replications', [])],
+            [calculate_cost(m, config.waiting_penalty) for m in baseline_metrics.get('replications', [])]
+        )
     
     # Print comparison results
     print_progress(f"📊 BASELINE COMPARISON RESULTS:")
     print_progress(f"   Baseline (30s/4s): Cost = {baseline_cost:.1f}")
     print_progress(f"   Optimized solution: Cost = {optimized_cost:.1f}")
+    if 'paired' in comparison_results:
+        print_progress(f"   Paired over {len(config.sumo_seeds)} common SUMO seeds (optimized − baseline): "
+                       f"{describe_paired_difference(comparison_results['paired'])}")
     
     if improvement_percent > 0:
         print_progress(f"    Improvement: {improvement_percent:.1f}% better ({absolute_improvement:.1f} cost units)")
@@ -849,37 +1676,43 @@ def run_traditional_aco_optimization(config=None, show_plots_override=None, show
     print("🐜 TRUE ANT COLONY OPTIMIZATION")
     print("=" * 50)
     
-    # Apply configuration if provided
+    # Settings for this run only; module defaults are never modified
+    aco_config = ACOConfig.from_dict(config)
     if config:
-        global GRID_SIZE, N_VEHICLES, SIMULATION_TIME, N_ANTS, N_ITERATIONS
-        global EVAPORATION_RATE, EXPLORATION_RATE, ALPHA, BETA, WAITING_PENALTY
-
-        GRID_SIZE = config.get('grid_size', GRID_SIZE)
-        N_VEHICLES = config.get('n_vehicles', N_VEHICLES)
-        SIMULATION_TIME = config.get('simulation_time', SIMULATION_TIME)
-        N_ANTS = config.get('n_ants', N_ANTS)
-        N_ITERATIONS = config.get('n_iterations', N_ITERATIONS)
-
-        # ACO-specific parameters
-        EVAPORATION_RATE = config.get('evaporation_rate', EVAPORATION_RATE)
-        EXPLORATION_RATE = config.get('exploration_rate', EXPLORATION_RATE)
-        ALPHA = config.get('pheromone_weight', ALPHA)  # Pheromone importance
-        BETA = config.get('heuristic_weight', BETA)    # Heuristic importance
-        WAITING_PENALTY = config.get('stop_penalty', WAITING_PENALTY)  # Cost function penalty
-
         print_progress(f"   Applied custom parameters:")
-        print_progress(f"   Evaporation: {EVAPORATION_RATE}, Exploration: {EXPLORATION_RATE}, Penalty: {ALPHA}")
+        print_progress(f"   Evaporation: {aco_config.evaporation_rate}, Exploration: {aco_config.exploration_rate}, "
+                       f"Penalty: {aco_config.waiting_penalty}")
+
+    # Racing needs the TraCI step loop, so it implies a persistent backend
+    if aco_config.racing and aco_config.evaluation_backend not in ('traci', 'libsumo'):
+        print_progress("   Racing requires a step-wise backend, switching evaluation to TraCI")
+        aco_config = aco_config._replace(evaluation_backend='traci')
+
+    # Common random numbers put an explicit --seed on every run, one SUMO subprocess per seed
+    if aco_config.sumo_seeds and (aco_config.evaluation_backend != 'subprocess' or aco_config.racing):
+        print_progress("   Common random numbers evaluate through SUMO subprocesses, racing and persistent workers are off")
+        aco_config = aco_config._replace(evaluation_backend='subprocess', racing=False)
     
     # Control plot display and GUI launch
     show_plot = show_plots_override if show_plots_override is not None else SHOW_PLOTS
     launch_gui = show_gui_override if show_gui_override is not None else LAUNCH_SUMO_GUI
     
     paths = get_project_paths()
+    evaluator = None
+    cache = None
+    if aco_config.use_cache:
+        from .evaluation_cache import EvaluationCache
+        cache = EvaluationCache(aco_config.cache_size, aco_config.cache_db)
     
+    grid_size = aco_config.grid_size
+    n_vehicles = aco_config.n_vehicles
     print_progress(f" Configuration:")
-    print_progress(f"   Grid: {GRID_SIZE}x{GRID_SIZE}, Vehicles: {N_VEHICLES}, Time: {SIMULATION_TIME}s")
-    print_progress(f"   ACO: {N_ANTS} ants × {N_ITERATIONS} iterations")
+    print_progress(f"   Grid: {grid_size}x{grid_size}, Vehicles: {n_vehicles}, Time: {aco_config.simulation_time}s")
+    print_progress(f"   ACO: {aco_config.n_ants} ants × {aco_config.n_iterations} iterations ({aco_config.mode}), "
+                   f"{aco_config.n_workers} {aco_config.evaluation_backend} worker(s)")
     print_progress(f"   Constraints: Green {GREEN_MIN_DURATION}-{GREEN_MAX_DURATION}s, Yellow {YELLOW_MIN_DURATION}-{YELLOW_MAX_DURATION}s")
+    if aco_config.sumo_seeds:
+        print_progress(f"   Common random numbers: SUMO seeds {list(aco_config.sumo_seeds)} for every ant and the baseline")
     
     try:
         # Setup scenario files
@@ -893,10 +1726,10 @@ def run_traditional_aco_optimization(config=None, show_plots_override=None, show
         
         # Fallback to default file path logic if no config provided or extraction failed
         if not net_file or not route_file or not os.path.exists(net_file) or not os.path.exists(route_file):
-            net_file = os.path.join(paths['sumo_data'], f'grid_{GRID_SIZE}x{GRID_SIZE}.net.xml')
-            route_file = os.path.join(paths['sumo_data'], f'grid_{GRID_SIZE}x{GRID_SIZE}.rou.xml')
+            net_file = os.path.join(paths['sumo_data'], f'grid_{grid_size}x{grid_size}.net.xml')
+            route_file = os.path.join(paths['sumo_data'], f'grid_{grid_size}x{grid_size}.rou.xml')
             if not os.path.exists(route_file):
-                alt = os.path.join(paths['sumo_data'], f'grid_{GRID_SIZE}x{GRID_SIZE}.rou.alt.xml')
+                alt = os.path.join(paths['sumo_data'], f'grid_{grid_size}x{grid_size}.rou.alt.xml')
                 if os.path.exists(alt):
                     route_file = alt
 
@@ -915,93 +1748,205 @@ def run_traditional_aco_optimization(config=None, show_plots_override=None, show
         phase_types, default_durations = analyze_traffic_light_phases(net_file)
         n_phases = len(phase_types)
 
-        # Initialize pheromone matrix for traditional ACO
-        pheromone_matrix = initialize_pheromone_matrix(n_phases, phase_types)
+        # Tight end time: latest departure plus a travel-time bound from the network
+        if aco_config.auto_horizon:
+            aco_config = aco_config._replace(
+                simulation_time=simulation_horizon(net_file, route_file, aco_config.simulation_time)
+            )
+
+        # The optimizer owns the pheromone matrix, RNG and best-so-far for this run
+        optimizer = ACOOptimizer(phase_types, aco_config)
+
+        # Persistent SUMO workers keep the network loaded across all ants
+        if aco_config.evaluation_backend in ('traci', 'libsumo'):
+            from .traci_backend import SumoWorkerPool
+            evaluator = SumoWorkerPool(net_file, route_file, aco_config.n_workers, aco_config.simulation_time,
+                                       use_libsumo=(aco_config.evaluation_backend == 'libsumo'),
+                                       temp_dir=paths['temp'], waiting_penalty=aco_config.waiting_penalty)
 
         # Track optimization progress
         best_costs = []
-        best_solutions = []
         best_metrics_history = []
         overall_best_cost = float('inf')
         overall_best_solution = None
-        overall_best_metrics = None
-
-        # Track the absolute best
-        global_best_cost = float('inf')
-        global_best_solution = None
-        global_best_metrics = None
 
         print_progress(" Starting optimization iterations...")
         start_time = time.time()
-
-        # Main ACO loop
-        for iteration in range(N_ITERATIONS):
-            print_progress(f"Iteration {iteration + 1}/{N_ITERATIONS}")
-
-            # Generate ant solutions
-            solutions = []
-            scores = []
-            metrics_list = []
-
-            # Optional: include elite solution for stability (no re-eval needed)
-            if global_best_solution is not None:
-                solutions.append(global_best_solution.copy())
-                scores.append(global_best_cost)
-                metrics_list.append(global_best_metrics)
-                print_progress(f"   Elite solution injected: cost {global_best_cost:.1f}")
-
-            # Generate remaining ant solutions
-            remaining_ants = N_ANTS - (1 if global_best_solution is not None else 0)
-            for ant in range(remaining_ants):
-                solution = generate_ant_solution(n_phases, phase_types, pheromone_matrix)
-                metrics = evaluate_solution(solution, net_file, route_file, paths['temp'])
-                cost = calculate_cost(metrics)
-
-                solutions.append(solution)
-                scores.append(cost)
-                metrics_list.append(metrics)
-
-                # Update global best immediately when found
-                if cost < global_best_cost:
-                    global_best_cost = cost
-                    global_best_solution = solution.copy()
-                    global_best_metrics = metrics
-                    print_progress(f"   *** NEW GLOBAL BEST: Ant {ant+1}, cost: {cost:.1f}")
-
-                completion = metrics.get('vehicles', 0)
-                if completion > 0:
-                    avg_time = metrics['total_time'] / completion
-                    print_progress(f"   Ant {ant+1}: {completion}/{N_VEHICLES} vehicles completed, "
-                                   f"avg time: {avg_time:.1f}s, cost: {cost:.1f}")
+        idle_report = None
+        fidelity_stats = None
+        if aco_config.multi_fidelity:
+            fidelity_stats = {'screening_fidelity': aco_config.screening_fidelity, 'screened': 0,
+                              'promoted': 0, 'screen_seconds': 0.0, 'micro_seconds': 0.0}
+
+        # Online regression model that decides which constructed ants are worth a SUMO run
+        surrogate = None
+        surrogate_stats = None
+        if aco_config.surrogate and aco_config.mode != 'steady_state':
+            from .surrogate import RidgeSurrogate
+            surrogate = RidgeSurrogate(n_phases, GREEN_MAX_DURATION, seed=aco_config.seed or 0)
+            surrogate_stats = {'candidates': 0, 'evaluated': 0, 'sumo_calls_saved': 0, 'rank_correlation': []}
+
+        def report_ant(ant, metrics, cost):
+            completion = metrics.get('vehicles', 0)
+            if metrics.get('partial'):
+                print_progress(f"   Ant {ant+1}: raced out at t={metrics.get('aborted_at', 0):.0f}s, "
+                               f"cost ≥ {cost:.1f}")
+            elif completion > 0:
+                avg_time = metrics['total_time'] / completion
+                fidelity = metrics.get('fidelity', 'micro')
+                print_progress(f"   Ant {ant+1}: {completion}/{n_vehicles} vehicles completed, "
+                               f"avg time: {avg_time:.1f}s, cost: {cost:.1f}"
+                               + (f" [{fidelity}]" if fidelity != 'micro' else ""))
+            else:
+                print_progress(f"   Ant {ant+1}: 0/{n_vehicles} vehicles completed, cost: ∞")
+
+        if aco_config.mode == 'steady_state':
+            if aco_config.multi_fidelity:
+                print_progress("   Multi-fidelity screening needs whole iterations, using full fidelity only")
+                fidelity_stats = None
+            if aco_config.surrogate:
+                print_progress("   Surrogate pre-screening needs whole iterations, evaluating every ant")
+
+            # Same evaluation budget as the generational loop with elite injection
+            n_ants = aco_config.n_ants
+            n_evaluations = n_ants + max(0, aco_config.n_iterations - 1) * max(0, n_ants - 1)
+            block = {'best_cost': float('inf'), 'best_metrics': None}
+
+            def evaluate_one(solution):
+                cost_bound = optimizer.best_cost if aco_config.racing else None
+                return evaluate_solutions_parallel([solution], net_file, route_file, paths['temp'], 1,
+                                                   evaluator, cache, aco_config.simulation_time, n_vehicles,
+                                                   cost_bound, sumo_seeds=aco_config.sumo_seeds,
+                                                   trip_output=aco_config.trip_output)[0]
+
+            def on_result(index, solution, metrics, report):
+                if report['improved']:
+                    print_progress(f"   *** NEW GLOBAL BEST: Ant {index+1}, cost: {report['cost']:.1f}")
+                report_ant(index, metrics, report['cost'])
+
+                if report['cost'] < block['best_cost'] or block['best_metrics'] is None:
+                    block['best_cost'] = report['cost']
+                    block['best_metrics'] = metrics
+
+                # Record progress once per n_ants finished evaluations (or at the end)
+                if (index + 1) % n_ants == 0 or index + 1 == n_evaluations:
+                    best_costs.append(report['best_cost'])
+                    best_metrics_history.append(block['best_metrics'])
+                    block['best_cost'] = float('inf')
+                    block['best_metrics'] = None
+
+            idle_report = run_steady_state(optimizer, evaluate_one, n_evaluations, aco_config.n_workers, on_result)
+            print_progress(f" Steady-state: {idle_report['evaluations']} evaluations, worker idle "
+                           f"{idle_report['steady_state_idle_seconds']:.1f}s vs "
+                           f"{idle_report['generational_idle_seconds']:.1f}s generational "
+                           f"({idle_report['idle_seconds_removed']:.1f}s removed)")
+
+            if optimizer.best_solution is not None:
+                overall_best_cost = optimizer.best_cost
+                overall_best_solution = list(optimizer.best_solution)
+        else:
+            # Main ACO loop (generational)
+            for iteration in range(aco_config.n_iterations):
+                print_progress(f"Iteration {iteration + 1}/{aco_config.n_iterations}")
+
+                # Elite solution is injected by tell() without re-evaluation
+                if optimizer.best_solution is not None:
+                    print_progress(f"   Elite solution injected: cost {optimizer.best_cost:.1f}")
+
+                # Construct every ant in one vectorized draw: the pheromone matrix is fixed
+                # within an iteration, so ants do not depend on each other's evaluations
+                ant_solutions = optimizer.ask()
+                predicted = None
+                if surrogate is not None and surrogate.ready:
+                    # Over-generate, then send the most promising ants plus an exploration quota
+                    from .surrogate import select_candidates
+                    n_slots = len(ant_solutions)
+                    candidates = ant_solutions + optimizer.ask(n_slots * max(0, aco_config.surrogate_oversample - 1))
+                    scores = surrogate.predict(candidates)
+                    n_evaluate = max(1, int(np.ceil(n_slots * aco_config.surrogate_keep)))
+                    picks = select_candidates(candidates, scores, n_evaluate,
+                                              aco_config.surrogate_exploration, optimizer.rng)
+                    ant_solutions = [candidates[i] for i in picks]
+                    predicted = scores[picks]
+                    surrogate_stats['candidates'] += len(candidates)
+                    surrogate_stats['sumo_calls_saved'] += n_slots - len(ant_solutions)
+
+                cost_bound = optimizer.best_cost if aco_config.racing else None
+                if fidelity_stats is not None:
+                    # Cheap screening for every ant, full microsim only for the top-k
+                    ant_metrics, stats = screen_and_promote(ant_solutions, net_file, route_file, paths['temp'],
+                                                            aco_config, evaluator, cache, cost_bound)
+                    for key in ('screened', 'promoted', 'screen_seconds', 'micro_seconds'):
+                        fidelity_stats[key] += stats[key]
+                    print_progress(f"   Screened {stats['screened']} ants ({aco_config.screening_fidelity}) in "
+                                   f"{stats['screen_seconds']:.1f}s, promoted top {stats['promoted']} to microsim "
+                                   f"in {stats['micro_seconds']:.1f}s")
                 else:
-                    print_progress(f"   Ant {ant+1}: 0/{N_VEHICLES} vehicles completed, cost: ∞")
-
-            # Update pheromones based on ALL ant solutions (collective intelligence)
-            update_pheromones(pheromone_matrix, solutions, scores, phase_types)
-
-            # Track best solution with stability checks
-            iteration_best_idx = int(np.argmin(scores))
-            iteration_best_cost = scores[iteration_best_idx]
-            iteration_best_metrics = metrics_list[iteration_best_idx]
-
-            # Always track the global best (not iteration best) for stability
-            best_costs.append(global_best_cost)
-            best_metrics_history.append(iteration_best_metrics or {'total_time': 0, 'max_stop': 0, 'vehicles': 0})
-
-            # Update overall tracking (legacy compatibility)
-            if global_best_cost < overall_best_cost:
-                overall_best_cost = global_best_cost
-                overall_best_solution = global_best_solution.copy()
-                overall_best_metrics = iteration_best_metrics
+                    ant_metrics = evaluate_solutions_parallel(ant_solutions, net_file, route_file, paths['temp'],
+                                                              aco_config.n_workers, evaluator, cache,
+                                                              aco_config.simulation_time, n_vehicles, cost_bound,
+                                                              sumo_seeds=aco_config.sumo_seeds,
+                                                              trip_output=aco_config.trip_output)
+
+                # Update pheromones based on ALL ant solutions (collective intelligence)
+                incumbent_metrics = optimizer.best_metrics
+                report = optimizer.tell(ant_solutions, ant_metrics)
+
+                if surrogate is not None:
+                    # Train only on full, comparable costs
+                    trusted = [i for i, metrics in enumerate(ant_metrics)
+                               if not metrics.get('partial') and metrics.get('fidelity', 'micro') == 'micro']
+                    if predicted is not None:
+                        from .surrogate import rank_correlation
+                        actual = np.array(report['costs'], dtype=float)[trusted]
+                        expected = predicted[trusted]
+                        finite = np.isfinite(actual)
+                        correlation = rank_correlation(expected, actual)
+                        mae = float(np.mean(np.abs(expected[finite] - actual[finite]))) if finite.any() else float('nan')
+                        surrogate_stats['rank_correlation'].append(correlation)
+                        print_progress(f"   Surrogate: {len(ant_solutions)} of {len(candidates)} candidates sent to SUMO "
+                                       f"({n_slots - len(ant_solutions)} calls saved), "
+                                       f"rank corr {correlation:.2f}, MAE {mae:.1f}")
+                    surrogate_stats['evaluated'] += len(ant_solutions)
+                    surrogate.add([ant_solutions[i] for i in trusted], [report['costs'][i] for i in trusted])
+
+                # Report in ant order so the log matches a serial run
+                improved = set(report['improved'])
+                for ant, (metrics, cost) in enumerate(zip(ant_metrics, report['costs'])):
+                    if ant in improved:
+                        print_progress(f"   *** NEW GLOBAL BEST: Ant {ant+1}, cost: {cost:.1f}")
+                    report_ant(ant, metrics, cost)
+
+                # Always track the global best (not iteration best) for stability
+                iteration_best_metrics = report['iteration_best_metrics']
+                if (aco_config.sumo_seeds and incumbent_metrics is not None and iteration_best_metrics is not None
+                        and iteration_best_metrics is not incumbent_metrics):
+                    # Same SUMO seeds for both, so the per-seed differences are paired
+                    paired = paired_difference_stats(
+                        [optimizer.cost(m) for m in iteration_best_metrics.get('replications', [])],
+                        [optimizer.cost(m) for m in incumbent_metrics.get('replications', [])]
+                    )
+                    print_progress(f"   Iteration best vs previous best: {describe_paired_difference(paired)}")
+                best_costs.append(optimizer.best_cost)
+                best_metrics_history.append(iteration_best_metrics or {'total_time': 0, 'max_stop': 0, 'vehicles': 0})
+
+                # Update overall tracking (legacy compatibility)
+                if optimizer.best_cost < overall_best_cost:
+                    overall_best_cost = optimizer.best_cost
+                    overall_best_solution = list(optimizer.best_solution)
 
         duration = time.time() - start_time
         print_progress(f" Optimization completed in {duration:.1f} seconds")
 
+        if evaluator is not None:
+            evaluator.close()
+            evaluator = None
+
         # Baseline comparison if requested
         baseline_comparison = None
         if compare_baseline and overall_best_solution is not None:
             baseline_comparison = evaluate_baseline_comparison(
-                overall_best_solution, phase_types, net_file, route_file, paths['temp']
+                overall_best_solution, phase_types, net_file, route_file, paths['temp'], aco_config, cache
             )
 
         # Create optimization plot
@@ -1011,7 +1956,15 @@ def run_traditional_aco_optimization(config=None, show_plots_override=None, show
         # Launch SUMO GUI with optimized solution if requested
         if launch_gui and overall_best_solution is not None:
             print_progress("")
-            launch_sumo_gui_with_solution(overall_best_solution, net_file, route_file, paths)
+            launch_sumo_gui_with_solution(overall_best_solution, net_file, route_file, paths,
+                                          aco_config.simulation_time)
+
+        # Report and release the evaluation cache
+        cache_stats = None
+        if cache is not None:
+            cache_stats = cache.stats()
+            print_progress(f" Evaluation cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+            cache.close()
 
         # Return results
         return {
@@ -1023,11 +1976,20 @@ def run_traditional_aco_optimization(config=None, show_plots_override=None, show
             'phase_types': phase_types,
             'n_phases': n_phases,
             'duration': duration,
-            'baseline_comparison': baseline_comparison
+            'baseline_comparison': baseline_comparison,
+            'cache_stats': cache_stats,
+            'idle_report': idle_report,
+            'fidelity_stats': fidelity_stats,
+            'surrogate_stats': surrogate_stats,
+            'config': aco_config._asdict()
         }
         
     except Exception as e:
         print_progress(f" Optimization failed: {e}")
+        if evaluator is not None:
+            evaluator.close()
+        if cache is not None:
+            cache.close()
         return {'success': False, 'error': str(e)}
 
 if __name__ == "__main__":
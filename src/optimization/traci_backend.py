@@ -0,0 +1,469 @@
+"""
+Persistent TraCI/libsumo Evaluation Backend
+
+The subprocess path in simple_aco copies the network, writes a config and starts a
+fresh SUMO process for every ant. This module keeps long-lived SUMO workers instead:
+each worker loads the network and routes once, then for every solution it resets the
+scenario, installs the phase durations with trafficlight.setProgramLogic and steps
+the simulation to completion.
+
+Key features:
+- One SUMO instance per worker, reused across evaluations
+- Scenario reset through saveState/loadState (or a full in-process reload)
+- Same metrics dictionary as parse_tripinfo_file
+- Built-in benchmark against the subprocess path
+
+Author: Traffic Optimization System
+Date: August 2025
+"""
+
+import os
+import math
+import time
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import simple_aco
+from .simple_aco import (
+    print_progress, make_temp_stem, build_trip_metrics, evaluate_solutions_parallel,
+    analyze_traffic_light_phases, get_project_paths, cost_lower_bound, calculate_cost
+)
+from .evaluation_cache import EvaluationCache
+from ..utils.tls_utils import build_phase_index
+from ..utils.horizon_utils import count_route_vehicles
+
+# ============================================================================
+# BACKEND CONFIGURATION
+# ============================================================================
+
+SUMO_BINARY = 'sumo'
+TIME_TO_TELEPORT = 300         # Same teleport setting as the subprocess path
+BENCHMARK_METRICS = ('total_time', 'vehicles', 'wait_p95', 'max_stop', 'unfinished')
+BENCHMARK_TOLERANCE = 0.01     # Largest relative metric deviation between backends accepted by the benchmark
+HALTING_SPEED = 0.1            # Speed (m/s) below which SUMO counts waiting time
+DEFAULT_RESET_MODE = 'state'   # 'state' (saveState/loadState) or 'load' (traci.load)
+RACING_CHECK_INTERVAL = 60     # Simulated seconds between lower-bound checks when racing
+
+FAILED_METRICS = {'total_time': float('inf'), 'max_stop': 0, 'vehicles': 0}
+
+def _import_traci(use_libsumo=False):
+    """Return the TraCI-compatible module to drive SUMO with."""
+    if use_libsumo:
+        try:
+            import libsumo
+            return libsumo
+        except ImportError:
+            print_progress("  libsumo not available, falling back to TraCI")
+    import traci
+    return traci
+
+def read_tls_phase_layout(net_file):
+    """
+    Read traffic light ids and phase counts in network file order.
+
+    The ACO solution vector is laid out in the order tlLogic elements appear in the
+    net file, which is not necessarily the order TraCI reports them in.
+    """
+    return [(tls['id'], len(tls['phases'])) for tls in build_phase_index(net_file)]
+
+# ============================================================================
+# PERSISTENT SUMO WORKER
+# ============================================================================
+
+class SumoWorker:
+    """
+    A single long-lived SUMO instance that evaluates solutions one after another.
+    """
+
+    def __init__(self, net_file, route_file, label="worker_0", sim_time=None,
+                 use_libsumo=False, reset_mode=DEFAULT_RESET_MODE, temp_dir=None, waiting_penalty=None,
+                 sumo_seed=None, n_vehicles=None):
+        self.net_file = os.path.abspath(net_file)
+        self.route_file = os.path.abspath(route_file)
+        self.label = label
+        self.sim_time = sim_time if sim_time is not None else simple_aco.SIMULATION_TIME
+        self.use_libsumo = use_libsumo
+        self.reset_mode = reset_mode
+        self.temp_dir = temp_dir or get_project_paths()['temp']
+        self.waiting_penalty = waiting_penalty
+        self.sumo_seed = sumo_seed
+        # SUMO loads routes lazily, so getMinExpectedNumber() misses vehicles that are
+        # not loaded yet; the route file tells how many will be inserted in total
+        self.n_vehicles = n_vehicles if n_vehicles is not None else count_route_vehicles(self.route_file)
+
+        self.traci = _import_traci(use_libsumo)
+        self.conn = None
+        self.state_file = None
+        self.base_logics = {}
+        self.phase_layout = read_tls_phase_layout(self.net_file)
+        self.evaluations = 0
+
+    def _sumo_command(self):
+        """Build the SUMO command line (without binary for traci.load)."""
+        args = [
+            '-n', self.net_file,
+            '-r', self.route_file,
+            '--end', str(self.sim_time),
+            '--no-warnings', '--no-step-log',
+            '--time-to-teleport', str(TIME_TO_TELEPORT),
+        ]
+        if self.sumo_seed is not None:
+            args += ['--seed', str(int(self.sumo_seed))]
+        vtype_file = os.path.join(os.path.dirname(self.route_file), 'vtype.add.xml')
+        if os.path.exists(vtype_file):
+            args += ['-a', vtype_file]
+        return args
+
+    def start(self):
+        """Start SUMO, load the network and routes once and remember the base programs."""
+        command = [SUMO_BINARY] + self._sumo_command()
+        if self.use_libsumo and self.traci.__name__ == 'libsumo':
+            self.traci.start(command)
+            self.conn = self.traci
+        else:
+            self.traci.start(command, label=self.label)
+            self.conn = self.traci.getConnection(self.label)
+        self._capture_base()
+
+    def _capture_base(self):
+        """Remember the loaded scenario's base programs (and save its t=0 state)."""
+        self.base_logics = {}
+        for tls_id, _ in self.phase_layout:
+            current_program = self.conn.trafficlight.getProgram(tls_id)
+            logics = self.conn.trafficlight.getAllProgramLogics(tls_id)
+            self.base_logics[tls_id] = next(
+                (logic for logic in logics if logic.programID == current_program), logics[0]
+            )
+
+        if self.reset_mode == 'state':
+            if self.state_file is None:
+                self.state_file = make_temp_stem(self.temp_dir, f"{self.label}_state") + ".xml"
+            self.conn.simulation.saveState(self.state_file)
+
+    def retarget(self, net_file, route_file, sumo_seed=None, n_vehicles=None):
+        """
+        Switch the worker to another scenario.
+
+        A running SUMO instance reloads the new network and routes in place
+        (traci.load), so no new process or libsumo instance is started.
+        """
+        self.net_file = os.path.abspath(net_file)
+        self.route_file = os.path.abspath(route_file)
+        self.sumo_seed = sumo_seed
+        self.n_vehicles = n_vehicles if n_vehicles is not None else count_route_vehicles(self.route_file)
+        self.phase_layout = read_tls_phase_layout(self.net_file)
+        if self.conn is not None:
+            self.conn.load(self._sumo_command())
+            self._capture_base()
+            self.evaluations = 0  # Freshly loaded, nothing to reset before the next run
+
+    def _reset(self):
+        """Return the scenario to t=0 without starting a new process."""
+        if self.evaluations == 0:
+            return
+        if self.reset_mode == 'state':
+            self.conn.simulation.loadState(self.state_file)
+        else:
+            self.conn.load(self._sumo_command())
+
+    def _install_solution(self, solution):
+        """Install the phase durations of one solution on every traffic light."""
+        phase_idx = 0
+        for tls_id, _ in self.phase_layout:
+            base = self.base_logics[tls_id]
+            phases = []
+            for phase in base.phases:
+                duration = float(solution[phase_idx]) if phase_idx < len(solution) else phase.duration
+                phases.append(self.traci.trafficlight.Phase(duration, phase.state, duration, duration))
+                phase_idx += 1
+            logic = self.traci.trafficlight.Logic(base.programID, base.type, 0, phases)
+            self.conn.trafficlight.setProgramLogic(tls_id, logic)
+            self.conn.trafficlight.setPhase(tls_id, 0)
+
+    def evaluate(self, solution, cost_bound=None):
+        """
+        Simulate one solution and return the same metrics dict as parse_tripinfo_file.
+
+        Waiting time is accumulated per vehicle from speed subscriptions, matching the
+        tripinfo definition (time spent at or below the halting speed).
+
+        When cost_bound is finite the run is raced against it: every
+        RACING_CHECK_INTERVAL simulated seconds a lower bound on the final cost is
+        computed, and once it reaches cost_bound the run stops and returns metrics
+        flagged 'partial' with the bound as 'lower_bound_cost'.
+        """
+        import traci.constants as tc
+
+        if self.conn is None:
+            self.start()
+
+        self._reset()
+        self._install_solution(solution)
+        self.evaluations += 1
+
+        step_length = self.conn.simulation.getDeltaT()
+        expected = self.n_vehicles
+        depart_times = {}
+        waiting = {}
+        durations = []
+        waiting_times = []
+        completed_ids = []
+        n_arrived = 0
+        racing = cost_bound is not None and cost_bound != float('inf')
+        next_check = RACING_CHECK_INTERVAL
+        best_bound = 0.0
+        now = self.conn.simulation.getTime()
+
+        while now < self.sim_time:
+            if expected is not None:
+                if n_arrived >= expected:
+                    break
+            elif self.conn.simulation.getMinExpectedNumber() == 0:
+                break
+
+            self.conn.simulationStep()
+            now = self.conn.simulation.getTime()
+
+            for veh_id in self.conn.simulation.getDepartedIDList():
+                depart_times[veh_id] = now
+                waiting[veh_id] = 0.0
+                self.conn.vehicle.subscribe(veh_id, [tc.VAR_SPEED])
+
+            for veh_id, values in self.conn.vehicle.getAllSubscriptionResults().items():
+                if values.get(tc.VAR_SPEED, 1.0) <= HALTING_SPEED:
+                    waiting[veh_id] = waiting.get(veh_id, 0.0) + step_length
+
+            for veh_id in self.conn.simulation.getArrivedIDList():
+                n_arrived += 1
+                if veh_id in depart_times:
+                    durations.append(now - depart_times.pop(veh_id))
+                    waiting_times.append(waiting.pop(veh_id, 0.0))
+                    completed_ids.append(veh_id)
+
+            if racing and now >= next_check:
+                next_check = now + RACING_CHECK_INTERVAL
+                elapsed = [now - departed for departed in depart_times.values()]
+                if expected is not None:
+                    n_pending = max(0, expected - n_arrived - len(depart_times))
+                else:
+                    n_pending = max(0, self.conn.simulation.getMinExpectedNumber() - len(depart_times))
+                bound = cost_lower_bound(durations, waiting_times, elapsed, n_pending, self.waiting_penalty)
+                best_bound = max(best_bound, bound)
+                if bound >= cost_bound:
+                    metrics = build_trip_metrics(durations, waiting_times, completed_ids, expected)
+                    metrics.update({'partial': True, 'lower_bound_cost': bound, 'aborted_at': now})
+                    return metrics
+
+        # Stopped at the horizon rather than because every vehicle arrived
+        if expected is not None:
+            unfinished = max(0, expected - n_arrived)
+        else:
+            unfinished = max(len(depart_times), self.conn.simulation.getMinExpectedNumber())
+        metrics = build_trip_metrics(durations, waiting_times, completed_ids, expected, unfinished=unfinished)
+
+        # A run that was allowed to finish must never cost less than a bound proven along the way
+        if racing and best_bound > 0 and calculate_cost(metrics, self.waiting_penalty) < best_bound - 1e-9:
+            print_progress(f"    Warning: {self.label} finished at cost "
+                           f"{calculate_cost(metrics, self.waiting_penalty):.2f} below its racing bound "
+                           f"{best_bound:.2f}")
+        return metrics
+
+    def close(self):
+        """Shut the SUMO instance down and remove the saved state."""
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
+        if self.state_file and os.path.exists(self.state_file):
+            os.remove(self.state_file)
+        self.state_file = None
+
+# ============================================================================
+# WORKER POOL
+# ============================================================================
+
+class SumoWorkerPool:
+    """
+    A pool of persistent SUMO workers for one (network, routes) scenario.
+
+    libsumo runs in-process and supports a single simulation per process, so the
+    pool is limited to one worker when libsumo is requested.
+    """
+
+    def __init__(self, net_file, route_file, n_workers=1, sim_time=None,
+                 use_libsumo=False, reset_mode=DEFAULT_RESET_MODE, temp_dir=None, waiting_penalty=None,
+                 sumo_seed=None, n_vehicles=None):
+        if use_libsumo and n_workers > 1:
+            print_progress("  libsumo supports one simulation per process, using 1 worker")
+            n_workers = 1
+
+        self.n_workers = max(1, int(n_workers))
+        self.backend = 'libsumo' if use_libsumo else 'traci'
+        # Last in, first out: already started workers are reused before idle ones are started
+        self._idle = queue.LifoQueue()
+        self._workers = []
+        self._lock = threading.Lock()
+        if n_vehicles is None:
+            n_vehicles = count_route_vehicles(route_file)
+
+        for i in range(self.n_workers):
+            worker = SumoWorker(net_file, route_file, label=f"worker_{os.getpid()}_{id(self)}_{i}",
+                                sim_time=sim_time, use_libsumo=use_libsumo,
+                                reset_mode=reset_mode, temp_dir=temp_dir,
+                                waiting_penalty=waiting_penalty, sumo_seed=sumo_seed,
+                                n_vehicles=n_vehicles)
+            self._workers.append(worker)
+            self._idle.put(worker)
+
+    def evaluate(self, solution, cost_bound=None):
+        """Evaluate one solution on the next idle worker (raced against cost_bound if given)."""
+        worker = self._idle.get()
+        try:
+            return worker.evaluate(solution, cost_bound)
+        except Exception as e:
+            print_progress(f"    TraCI evaluation error on {worker.label}: {e}")
+            worker.close()  # Restart on next use
+            return dict(FAILED_METRICS)
+        finally:
+            self._idle.put(worker)
+
+    def evaluate_many(self, solutions, cost_bound=None):
+        """Evaluate solutions concurrently, returning metrics in input order."""
+        if self.n_workers == 1 or len(solutions) <= 1:
+            return [self.evaluate(solution, cost_bound) for solution in solutions]
+        with ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+            return list(executor.map(lambda solution: self.evaluate(solution, cost_bound), solutions))
+
+    def retarget(self, net_file, route_file, sumo_seed=None):
+        """Switch every (idle) worker to another scenario, see SumoWorker.retarget."""
+        n_vehicles = count_route_vehicles(route_file)
+        for worker in self._workers:
+            worker.retarget(net_file, route_file, sumo_seed, n_vehicles)
+
+    def close(self):
+        """Close every worker."""
+        for worker in self._workers:
+            worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def metric_deviations(reference, candidate, keys=BENCHMARK_METRICS):
+    """
+    Largest relative deviation per metric between two lists of metrics dictionaries.
+
+    Deviations are |a - b| / max(|a|, 1), so small counts are compared absolutely.
+    Two infinite values (failed evaluations) agree; one infinite value does not.
+    """
+    deviations = {}
+    for key in keys:
+        worst = 0.0
+        for ref, cand in zip(reference, candidate):
+            a, b = float(ref.get(key, 0)), float(cand.get(key, 0))
+            if a == b:
+                continue
+            if math.isinf(a) or math.isinf(b):
+                worst = float('inf')
+                break
+            worst = max(worst, abs(a - b) / max(abs(a), 1.0))
+        deviations[key] = worst
+    return deviations
+
+def benchmark_backends(net_file, route_file, n_evaluations=10, n_workers=1, sim_time=None,
+                       use_libsumo=False, reset_mode=DEFAULT_RESET_MODE, seed=42,
+                       tolerance=BENCHMARK_TOLERANCE, fail_on_mismatch=True):
+    """
+    Compare evaluation throughput of the subprocess path and the persistent workers.
+
+    Both backends evaluate the same random solutions, and their metrics
+    (BENCHMARK_METRICS) are compared solution by solution: a speedup only counts
+    if the persistent workers reproduce the subprocess results. Worker startup is
+    reported separately since it is paid once per optimization run.
+
+    Raises:
+        RuntimeError: If fail_on_mismatch and a metric deviates by more than tolerance
+
+    Returns:
+        Dictionary with evaluations per second for each backend, the speedup and
+        the largest relative deviation per metric ('max_deviation')
+    """
+    phase_types, _ = analyze_traffic_light_phases(net_file)
+    rng = random.Random(seed)
+    solutions = [
+        [rng.randint(simple_aco.GREEN_MIN_DURATION, simple_aco.GREEN_MAX_DURATION) if is_green
+         else rng.randint(simple_aco.YELLOW_MIN_DURATION, simple_aco.YELLOW_MAX_DURATION)
+         for is_green in phase_types]
+        for _ in range(n_evaluations)
+    ]
+    temp_dir = get_project_paths()['temp']
+
+    print_progress(f" Benchmarking {n_evaluations} evaluations with {n_workers} worker(s)...")
+
+    # Fresh cache so every subprocess evaluation really runs SUMO
+    start = time.time()
+    subprocess_metrics = evaluate_solutions_parallel(solutions, net_file, route_file, temp_dir, n_workers,
+                                                     cache=EvaluationCache(), sim_time=sim_time)
+    subprocess_seconds = time.time() - start
+
+    start = time.time()
+    with SumoWorkerPool(net_file, route_file, n_workers, sim_time, use_libsumo, reset_mode, temp_dir) as pool:
+        for worker in pool._workers:
+            worker.start()
+        startup_seconds = time.time() - start
+
+        start = time.time()
+        traci_metrics = pool.evaluate_many(solutions)
+        traci_seconds = time.time() - start
+
+    deviations = metric_deviations(subprocess_metrics, traci_metrics)
+    results = {
+        'n_evaluations': n_evaluations,
+        'n_workers': n_workers,
+        'subprocess_evals_per_sec': n_evaluations / subprocess_seconds if subprocess_seconds > 0 else float('inf'),
+        'traci_evals_per_sec': n_evaluations / traci_seconds if traci_seconds > 0 else float('inf'),
+        'traci_startup_seconds': startup_seconds,
+        'max_deviation': deviations,
+    }
+    results['speedup'] = results['traci_evals_per_sec'] / results['subprocess_evals_per_sec']
+
+    print_progress(f"   Subprocess: {results['subprocess_evals_per_sec']:.2f} evals/s")
+    print_progress(f"   TraCI:      {results['traci_evals_per_sec']:.2f} evals/s "
+                   f"(startup {startup_seconds:.1f}s)")
+    print_progress(f"   Speedup:    {results['speedup']:.2f}x")
+    print_progress("   Max metric deviation: " +
+                   ", ".join(f"{key} {value:.2%}" for key, value in deviations.items()))
+
+    mismatched = [key for key, value in deviations.items() if value > tolerance]
+    if mismatched and fail_on_mismatch:
+        raise RuntimeError(f"Backends disagree beyond {tolerance:.2%} on: {', '.join(mismatched)}")
+
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark subprocess vs persistent TraCI evaluation")
+    parser.add_argument('--net', required=True, help="SUMO network file")
+    parser.add_argument('--routes', required=True, help="SUMO route file")
+    parser.add_argument('--evaluations', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--sim-time', type=int, default=None)
+    parser.add_argument('--libsumo', action='store_true')
+    parser.add_argument('--reset-mode', choices=['state', 'load'], default=DEFAULT_RESET_MODE)
+    parser.add_argument('--tolerance', type=float, default=BENCHMARK_TOLERANCE,
+                        help="Largest accepted relative metric deviation between backends")
+    args = parser.parse_args()
+
+    benchmark_backends(args.net, args.routes, args.evaluations, args.workers,
+                       args.sim_time, args.libsumo, args.reset_mode, tolerance=args.tolerance)
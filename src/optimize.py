@@ -76,20 +76,9 @@ def run_complete_optimization(config):
         'n_iterations': config.get('n_iterations', 10)
     }
     
-    # Temporarily update paths for ACO to find generated files
-    from .optimization import simple_aco as aco
-    original_values = {}
-    for key, value in aco_config.items():
-        if hasattr(aco, key.upper()):
-            original_values[key.upper()] = getattr(aco, key.upper())
-            setattr(aco, key.upper(), value)
-    
+    # The config travels with the run; simple_aco's module defaults stay untouched
     optimization_result = run_traditional_aco_optimization(aco_config)
     
-    # Restore original values
-    for key, value in original_values.items():
-        setattr(aco, key, value)
-    
     if not optimization_result['success']:
         print(f" Optimization failed: {optimization_result['error']}")
         return {'success': False, 'error': 'Optimization failed'}
@@ -13,10 +13,11 @@ import os
 import sys
 import json
 import time
+import hashlib
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from functools import partial
 from typing import Dict, List, Any, Tuple, Optional, Union
 
@@ -26,6 +27,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from .simplified_traffic import generate_network_and_routes
 from .optimization.simple_aco import run_traditional_aco_optimization
 
+RUN_LOG_NAME = "sensitivity_runs.jsonl"  # Append-only log of finished runs, one JSON object per line
+
 
 def run_sensitivity_analysis(
     parameter_ranges: Dict[str, List],
@@ -45,7 +48,9 @@ def run_sensitivity_analysis(
             Example: {'n_ants': [10, 20, 30], 'n_iterations': [5, 10, 15]}
         base_config: Base configuration dict with default values
         n_replications: Number of replications per parameter combination
-        output_dir: Directory to save results (default: results/sensitivity_analysis)
+        output_dir: Directory to save results (default: results/sensitivity_analysis).
+            Every finished run is appended to sensitivity_runs.jsonl there, and
+            rerunning with the same directory skips runs already recorded.
         parallel: Whether to run parameter combinations in parallel
         max_workers: Maximum number of parallel workers
         show_individual_plots: Show plots for each individual optimization run
@@ -85,11 +90,17 @@ def run_sensitivity_analysis(
     param_combinations = _generate_parameter_combinations(parameter_ranges)
     total_runs = len(param_combinations) * n_replications
     
+    # Resume: successful runs already in the run log are not repeated
+    run_log = os.path.join(output_dir, RUN_LOG_NAME)
+    completed_runs = _load_completed_runs(run_log, _config_hash(base_config))
+    
     print(f" Analysis Configuration:")
     print(f"   Parameters: {list(parameter_ranges.keys())}")
     print(f"   Combinations: {len(param_combinations)}")
     print(f"   Replications per combination: {n_replications}")
     print(f"   Total optimization runs: {total_runs}")
+    if completed_runs:
+        print(f"   Already completed (resuming): {len(completed_runs)}")
     print()
     
     # Run sensitivity analysis
@@ -99,12 +110,12 @@ def run_sensitivity_analysis(
         print(" Running analysis in parallel...")
         results = _run_parallel_analysis(
             param_combinations, base_config, n_replications, 
-            output_dir, max_workers, show_individual_plots
+            output_dir, max_workers, show_individual_plots, completed_runs
         )
     else:
         print(" Running analysis sequentially...")
         results = _run_sequential_analysis(
-            param_combinations, base_config, n_replications, output_dir, show_individual_plots
+            param_combinations, base_config, n_replications, output_dir, show_individual_plots, completed_runs
         )
     
     analysis_time = time.time() - start_time
@@ -117,10 +128,10 @@ def run_sensitivity_analysis(
     summary_file = os.path.join(output_dir, "analysis_summary.json")
     
     with open(results_file, 'w') as f:
-        json.dump(results, f, indent=2)
+        json.dump(results, f, indent=2, default=_json_default)
     
     with open(summary_file, 'w') as f:
-        json.dump(summary, f, indent=2)
+        json.dump(summary, f, indent=2, default=_json_default)
     
     # Generate visualizations
     plot_files = _generate_sensitivity_plots(results, parameter_ranges, output_dir, show_final_plot)
@@ -195,8 +206,81 @@ def _generate_parameter_combinations(parameter_ranges: Dict[str, List]) -> List[
     return combinations
 
 
-def _run_sequential_analysis(param_combinations, base_config, n_replications, output_dir, show_individual_plots=False):
-    """Run sensitivity analysis sequentially."""
+def _json_default(value):
+    """JSON fallback for NumPy scalars (and anything else, as a string)."""
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+
+def _config_hash(base_config: Dict) -> str:
+    """Short content hash of the base configuration shared by every run of an analysis."""
+    payload = json.dumps(base_config, sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _run_key(params: Dict, replication: int, config_hash: str) -> str:
+    """Identity of one run in the run log: base configuration, parameters and replication index."""
+    return json.dumps({'base_config': config_hash, 'parameters': params, 'replication': replication},
+                      sort_keys=True, default=_json_default)
+
+
+def _replication_seed(params: Dict, replication: int) -> int:
+    """Scenario seed of one run, stable across processes (unlike hash()) so resumed runs match."""
+    return int(hashlib.sha256(f"{params}_{replication}".encode('utf-8')).hexdigest(), 16) % 10000
+
+
+def _load_completed_runs(run_log: str, config_hash: str) -> Dict[str, Dict]:
+    """
+    Read the successful runs recorded in a run log, keyed by _run_key.
+    
+    Only runs made with the same base configuration (config_hash) are reused;
+    runs from a different base_config (or logged without one) are repeated. A
+    line cut short by a crash is ignored, so that run is simply repeated.
+    """
+    completed = {}
+    if not os.path.exists(run_log):
+        return completed
+    
+    other_config = 0
+    with open(run_log) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not record.get('success'):
+                continue
+            if record.get('base_config_hash') != config_hash:
+                other_config += 1
+                continue
+            completed[_run_key(record['parameters'], record['replication'], config_hash)] = record
+    if other_config:
+        print(f"   Ignoring {other_config} logged runs made with a different base configuration")
+    return completed
+
+
+def _append_run(run_log: str, result: Dict) -> None:
+    """
+    Append one finished run to the run log and flush it to disk.
+    
+    A line left without its newline by a crash is terminated first, so the new
+    record does not merge into it.
+    """
+    with open(run_log, 'a+b') as f:
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+        f.write((json.dumps(result, default=_json_default) + '\n').encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _run_sequential_analysis(param_combinations, base_config, n_replications, output_dir, show_individual_plots=False,
+                             completed_runs=None):
+    """Run sensitivity analysis sequentially, logging each run as it finishes."""
+    completed_runs = completed_runs or {}
+    run_log = os.path.join(output_dir, RUN_LOG_NAME)
+    config_hash = _config_hash(base_config)
     results = []
     
     for i, params in enumerate(param_combinations):
@@ -209,19 +293,29 @@ def _run_sequential_analysis(param_combinations, base_config, n_replications, ou
         combination_results = []
         
         for rep in range(n_replications):
+            key = _run_key(params, rep, config_hash)
+            if key in completed_runs:
+                print(f"   Replication {rep+1}/{n_replications} already completed")
+                combination_results.append(completed_runs[key])
+                continue
+            
             print(f"   Replication {rep+1}/{n_replications}...")
             
             # Add replication seed for reproducibility
-            config['seed'] = hash(f"{params}_{rep}") % 10000
+            config['seed'] = _replication_seed(params, rep)
             
             try:
                 result = _run_single_optimization(config, show_plots=show_individual_plots)
                 result['replication'] = rep
                 result['parameters'] = params.copy()
+                result['base_config_hash'] = config_hash
                 combination_results.append(result)
+                _append_run(run_log, result)
                 
             except Exception as e:
                 print(f"    Replication {rep+1} failed: {e}")
+                _append_run(run_log, {'success': False, 'error': str(e), 'replication': rep,
+                                      'parameters': params.copy(), 'base_config_hash': config_hash})
                 continue
         
         results.extend(combination_results)
@@ -229,21 +323,32 @@ def _run_sequential_analysis(param_combinations, base_config, n_replications, ou
     return results
 
 
-def _run_parallel_analysis(param_combinations, base_config, n_replications, output_dir, max_workers, show_individual_plots=False):
-    """Run sensitivity analysis in parallel."""
+def _run_parallel_analysis(param_combinations, base_config, n_replications, output_dir, max_workers, show_individual_plots=False,
+                           completed_runs=None):
+    """Run sensitivity analysis in parallel, logging each run in completion order."""
+    completed_runs = completed_runs or {}
+    run_log = os.path.join(output_dir, RUN_LOG_NAME)
+    config_hash = _config_hash(base_config)
+    results = []
     
-    # Prepare all individual runs
+    # Prepare all individual runs that are not already recorded
     run_configs = []
     for params in param_combinations:
         config = base_config.copy()
         config.update(params)
         
         for rep in range(n_replications):
+            key = _run_key(params, rep, config_hash)
+            if key in completed_runs:
+                results.append(completed_runs[key])
+                continue
+            
             run_config = config.copy()
-            run_config['seed'] = hash(f"{params}_{rep}") % 10000
+            run_config['seed'] = _replication_seed(params, rep)
             run_config['_meta'] = {
                 'parameters': params.copy(),
-                'replication': rep
+                'replication': rep,
+                'base_config_hash': config_hash
             }
             run_configs.append(run_config)
     
@@ -255,23 +360,23 @@ def _run_parallel_analysis(param_combinations, base_config, n_replications, outp
             for config in run_configs
         }
         
-        results = []
         completed = 0
         
-        for future in future_to_config:
+        for future in as_completed(future_to_config):
+            config = future_to_config[future]
             try:
                 result = future.result()
-                config = future_to_config[future]
                 
-                result['replication'] = config['_meta']['replication']
-                result['parameters'] = config['_meta']['parameters']
+                result.update(config['_meta'])
                 results.append(result)
+                _append_run(run_log, result)
                 
                 completed += 1
                 print(f"    Completed {completed}/{len(run_configs)} runs")
                 
             except Exception as e:
                 print(f"    Run failed: {e}")
+                _append_run(run_log, {'success': False, 'error': str(e), **config['_meta']})
                 continue
     
     return results
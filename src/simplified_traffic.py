@@ -14,8 +14,14 @@ import subprocess
 import os
 import random
 import json
+import hashlib
+import shutil
+import uuid
+import numpy as np
 from datetime import datetime
 
+from .utils.grid_router import route_trips_file
+
 # ============================================================================
 # TRAFFIC PATTERN CONFIGURATIONS
 # ============================================================================
@@ -46,14 +52,36 @@ TRAFFIC_PATTERNS = {
     }
 }
 
+# Content-addressed scenario store (see get_cached_scenario)
+USE_SCENARIO_CACHE = True
+SCENARIO_CACHE_VERSION = 3     # Bump when generation logic changes so stale scenarios are not reused
+
+# Trip router: 'duarouter' (SUMO subprocess) or 'grid' (in-process, see utils.grid_router)
+ROUTER = 'duarouter'
+
+# Demand encoding: 'trips' (one <trip> per vehicle) or 'flows' (flows from the pattern's expected rates per time slice)
+DEMAND_MODE = 'trips'
+FLOW_SLICE_SECONDS = 60        # Time slice length for 'flows'
+
 # ============================================================================
 # CORE TRAFFIC GENERATION FUNCTIONS
 # ============================================================================
 
-def generate_network_and_routes(grid_size, n_vehicles, sim_time, pattern='commuter', seed=None, output_dir=None):
+def get_default_sumo_data_dir():
+    """The project's sumo_data directory."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))  # src/
+    project_root = os.path.dirname(script_dir)  # my_grid_simulation/
+    return os.path.join(project_root, 'sumo_data')
+
+def generate_network_and_routes(grid_size, n_vehicles, sim_time, pattern='commuter', seed=None, output_dir=None,
+                                use_cache=None):
     """
     Generate SUMO network and route files with specified traffic pattern.
     
+    Seeded scenarios come from the scenario store (get_cached_scenario) and are
+    copied into output_dir, so netgenerate and duarouter only run the first time
+    a scenario is requested.
+    
     Args:
         grid_size: Size of grid network (e.g., 3 for 3x3)
         n_vehicles: Number of vehicles to generate
@@ -61,22 +89,28 @@ def generate_network_and_routes(grid_size, n_vehicles, sim_time, pattern='commut
         pattern: Traffic pattern name from TRAFFIC_PATTERNS
         seed: Random seed for reproducible results
         output_dir: Directory to save files (defaults to sumo_data)
+        use_cache: Use the scenario store (defaults to USE_SCENARIO_CACHE)
     
     Returns:
         Dictionary with file paths and generation info
     """
-    # Set random seed for reproducibility
-    if seed is not None:
-        random.seed(seed)
-    
     # Setup output directory
     if output_dir is None:
-        script_dir = os.path.dirname(os.path.abspath(__file__))  # src/
-        project_root = os.path.dirname(script_dir)  # my_grid_simulation/
-        output_dir = os.path.join(project_root, 'sumo_data')
+        output_dir = get_default_sumo_data_dir()
     
     os.makedirs(output_dir, exist_ok=True)
     
+    use_cache = USE_SCENARIO_CACHE if use_cache is None else use_cache
+    if use_cache and seed is not None:
+        cached = get_cached_scenario(grid_size, n_vehicles, sim_time, pattern, seed)
+        if not cached['success']:
+            return cached
+        return copy_scenario(cached, output_dir)
+    
+    # Set random seed for reproducibility
+    if seed is not None:
+        random.seed(seed)
+    
     # Define file paths
     net_file = os.path.join(output_dir, f'grid_{grid_size}x{grid_size}.net.xml')
     route_file = os.path.join(output_dir, f'grid_{grid_size}x{grid_size}.rou.xml') 
@@ -160,27 +194,213 @@ def create_traffic_scenario(grid_size, n_vehicles, simulation_time, pattern='com
         'simulation_time': result.get('sim_time'),
     }
 
+# ============================================================================
+# SCENARIO STORE
+# ============================================================================
+
+def get_scenario_cache_dir():
+    """Root of the scenario store (sumo_data/cache)."""
+    return os.path.join(get_default_sumo_data_dir(), 'cache')
+
+def _content_hash(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def _build_in_store(final_dir, build):
+    """
+    Run build(tmp_dir) and publish tmp_dir as final_dir in one rename.
+
+    A directory in the store is therefore either complete or absent. If another
+    process published the same entry first, its copy is kept.
+    """
+    tmp_dir = f"{final_dir}.tmp_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp_dir)
+    try:
+        if not build(tmp_dir):
+            return False
+        try:
+            os.rename(tmp_dir, final_dir)
+        except OSError:
+            if not os.path.isdir(final_dir):
+                raise
+        return True
+    finally:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def get_cached_scenario(grid_size, n_vehicles, sim_time, pattern='commuter', seed=None):
+    """
+    Get a scenario from the content-addressed store under sumo_data/cache/.
+    
+    The network is stored once per grid (net_<hash>/) and shared by every demand
+    built on it; each (network, pattern, n_vehicles, sim_time, seed) demand has its
+    own <hash>/ directory with trips, routes, vehicle types and a .sumocfg. Only
+    missing pieces are generated. Stored files are never modified afterwards, so the
+    returned paths can be shared between runs but must not be written to.
+    Unseeded scenarios are random and bypass the store.
+    
+    Returns:
+        Same dictionary as generate_network_and_routes, plus 'cache_hit'
+    """
+    if seed is None:
+        return generate_network_and_routes(grid_size, n_vehicles, sim_time, pattern, seed, use_cache=False)
+    
+    cache_dir = get_scenario_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    name = f'grid_{grid_size}x{grid_size}'
+    pattern_config = TRAFFIC_PATTERNS.get(pattern, TRAFFIC_PATTERNS['random'])
+    
+    try:
+        # Network: shared by every pattern, size and seed on this grid
+        network_key = _content_hash({'version': SCENARIO_CACHE_VERSION, 'netgenerate': _netgenerate_args(grid_size)})
+        network_dir = os.path.join(cache_dir, f'net_{network_key}')
+        net_file = os.path.join(network_dir, f'{name}.net.xml')
+        network_hit = os.path.isdir(network_dir)
+        if not network_hit:
+            if not _build_in_store(network_dir,
+                                   lambda tmp: generate_grid_network(grid_size, os.path.join(tmp, f'{name}.net.xml'))):
+                return {'success': False, 'error': 'Network generation failed'}
+        
+        # Demand: routes depend on the network and every generation parameter
+        demand_key = _content_hash({
+            'version': SCENARIO_CACHE_VERSION,
+            'network': network_key,
+            'pattern': pattern_config,
+            'n_vehicles': n_vehicles,
+            'sim_time': sim_time,
+            'seed': seed,
+            'router': ROUTER,
+            'demand': [DEMAND_MODE, FLOW_SLICE_SECONDS] if DEMAND_MODE == 'flows' else DEMAND_MODE
+        })
+        scenario_dir = os.path.join(cache_dir, demand_key)
+        demand_hit = os.path.isdir(scenario_dir)
+        
+        def build_demand(tmp_dir):
+            # Relative .sumocfg paths stay valid after the rename (tmp_dir is a sibling of scenario_dir)
+            return generate_seed_routes(net_file, tmp_dir, grid_size, n_vehicles, sim_time, pattern, seed)['success']
+        
+        if not demand_hit:
+            print(f"Generating {grid_size}x{grid_size} grid with {n_vehicles} vehicles ({pattern} pattern) into the scenario store")
+            if not _build_in_store(scenario_dir, build_demand):
+                return {'success': False, 'error': 'Traffic generation failed'}
+        
+        return {
+            'success': True,
+            'files': {
+                'network': net_file,
+                'routes': os.path.join(scenario_dir, f'{name}.rou.xml'),
+                'trips': os.path.join(scenario_dir, f'{name}.trips.xml'),
+                'config': os.path.join(scenario_dir, f'{name}.sumocfg'),
+                'vtypes': os.path.join(scenario_dir, 'vtype.add.xml')
+            },
+            'pattern': pattern,
+            'seed': seed,
+            'grid_size': grid_size,
+            'n_vehicles': n_vehicles,
+            'sim_time': sim_time,
+            'cache_hit': network_hit and demand_hit
+        }
+        
+    except Exception as e:
+        print(f"Error generating scenario: {e}")
+        return {'success': False, 'error': str(e)}
+
+def generate_seed_routes(net_file, output_dir, grid_size, n_vehicles, sim_time, pattern='commuter', seed=None):
+    """
+    Generate one seed's demand against an existing network.
+    
+    Writes vehicle types, trips, routes and a .sumocfg into output_dir; the
+    network file is referenced, not copied. All randomness comes from generators
+    seeded with seed, so several seeds can be generated concurrently.
+    
+    Returns:
+        Same dictionary as generate_network_and_routes, with 'network' pointing at net_file
+    """
+    name = f'grid_{grid_size}x{grid_size}'
+    files = {
+        'network': net_file,
+        'routes': os.path.join(output_dir, f'{name}.rou.xml'),
+        'trips': os.path.join(output_dir, f'{name}.trips.xml'),
+        'config': os.path.join(output_dir, f'{name}.sumocfg'),
+        'vtypes': os.path.join(output_dir, 'vtype.add.xml')
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    
+    try:
+        create_vehicle_types_file(files['vtypes'])
+        
+        pattern_config = TRAFFIC_PATTERNS.get(pattern, TRAFFIC_PATTERNS['random'])
+        if not generate_traffic_pattern(net_file, files['trips'], n_vehicles, sim_time, pattern_config, seed):
+            return {'success': False, 'error': 'Traffic generation failed'}
+        
+        if not convert_trips_to_routes(net_file, files['trips'], files['routes']):
+            return {'success': False, 'error': 'Route conversion failed'}
+        
+        create_sumocfg_file(files['config'], net_file, files['routes'], files['vtypes'], sim_time)
+        
+    except Exception as e:
+        print(f"Error generating routes for seed {seed}: {e}")
+        return {'success': False, 'error': str(e)}
+    
+    return {
+        'success': True,
+        'files': files,
+        'pattern': pattern,
+        'seed': seed,
+        'grid_size': grid_size,
+        'n_vehicles': n_vehicles,
+        'sim_time': sim_time
+    }
+
+def copy_scenario(scenario, output_dir):
+    """
+    Copy a stored scenario into output_dir under the usual grid_NxN.* names.
+    
+    Callers that edit or delete their scenario files get a private copy, which
+    keeps the store immutable.
+    """
+    grid_size = scenario['grid_size']
+    name = f'grid_{grid_size}x{grid_size}'
+    files = {
+        'network': os.path.join(output_dir, f'{name}.net.xml'),
+        'routes': os.path.join(output_dir, f'{name}.rou.xml'),
+        'trips': os.path.join(output_dir, f'{name}.trips.xml'),
+        'config': os.path.join(output_dir, f'{name}.sumocfg'),
+        'vtypes': os.path.join(output_dir, 'vtype.add.xml')
+    }
+    for key in ('network', 'routes', 'trips', 'vtypes'):
+        shutil.copyfile(scenario['files'][key], files[key])
+    create_sumocfg_file(files['config'], files['network'], files['routes'], files['vtypes'], scenario['sim_time'])
+    
+    if scenario.get('cache_hit'):
+        print(f"✅ Reused stored scenario: {files['config']}")
+    else:
+        print(f"✅ Generated complete scenario: {files['config']}")
+    return dict(scenario, files=files)
+
+def _netgenerate_args(grid_size):
+    """netgenerate arguments for a grid (everything except the output file)."""
+    # Create junction names for traffic light placement
+    junction_names = []
+    for row in range(grid_size):
+        for col in range(grid_size):
+            junction_names.append(f"{chr(65 + col)}{row}")
+    
+    return [
+        '--grid',
+        '--grid.number', str(grid_size),
+        '--grid.length', '200',  # 200m edges
+        '--default.lanenumber', '1',
+        '--default.speed', '13.89',  # 50 km/h
+        '--tls.set', ','.join(junction_names),  # Add traffic lights
+        '--tls.default-type', 'static'
+    ]
+
 def generate_grid_network(grid_size, output_file):
     """Generate a grid network using SUMO's netgenerate."""
     try:
-        # Create junction names for traffic light placement
-        junction_names = []
-        for row in range(grid_size):
-            for col in range(grid_size):
-                junction_names.append(f"{chr(65 + col)}{row}")
-        
         # Generate grid network with traffic lights
-        result = subprocess.run([
-            'netgenerate',
-            '--grid',
-            '--grid.number', str(grid_size),
-            '--grid.length', '200',  # 200m edges
-            '--default.lanenumber', '1',
-            '--default.speed', '13.89',  # 50 km/h
-            '--output-file', output_file,
-            '--tls.set', ','.join(junction_names),  # Add traffic lights
-            '--tls.default-type', 'static'
-        ], capture_output=True, text=True)
+        result = subprocess.run(['netgenerate'] + _netgenerate_args(grid_size) + ['--output-file', output_file],
+                                capture_output=True, text=True)
         
         if result.returncode == 0:
             print(f"Network generated: {output_file}")
@@ -193,17 +413,37 @@ def generate_grid_network(grid_size, output_file):
         print(f"Error generating network: {e}")
         return False
 
-def generate_traffic_pattern(net_file, trips_file, n_vehicles, sim_time, pattern_config, seed):
-    """Generate traffic trips based on specified pattern."""
+def generate_traffic_pattern(net_file, trips_file, n_vehicles, sim_time, pattern_config, seed, demand_mode=None):
+    """
+    Generate traffic trips based on specified pattern.
+    
+    With demand_mode 'flows' (default DEMAND_MODE) the pattern is written as
+    <flow> definitions built from its expected rates instead of one <trip> per
+    vehicle, see build_rate_flows.
+    """
+    demand_mode = demand_mode or DEMAND_MODE
     try:
-        # Parse network to get available edges
-        edges = get_network_edges(net_file)
-        if len(edges) < 2:
-            print(f"Insufficient edges found: {len(edges)}")
+        # Categorize edges by location (cached per network) and build the pattern's sampling tables
+        edge_categories = categorize_edges(net_file)
+        if len(edge_categories['edges']) < 2:
+            print(f"Insufficient edges found: {len(edge_categories['edges'])}")
             return False
         
-        # Categorize edges by location
-        edge_categories = categorize_edges(edges)
+        source_table = get_edge_sampling_table(edge_categories, pattern_config['source_weights'])
+        sink_table = get_edge_sampling_table(edge_categories, pattern_config['sink_weights'])
+        
+        # Flows are built from the pattern's expected rates, without per-vehicle trips
+        if demand_mode == 'flows':
+            flows = build_rate_flows(source_table, sink_table, n_vehicles, sim_time, pattern_config, seed,
+                                     FLOW_SLICE_SECONDS)
+            write_flows_file(trips_file, flows)
+            print(f"Generated {n_vehicles} vehicles as {len(flows)} flows: {trips_file}")
+            return True
+        
+        # Draw every source and destination at once
+        rng = np.random.default_rng(seed)
+        from_edges, to_edges = sample_od_pairs(source_table, sink_table, n_vehicles, rng)
+        departure_rng = random.Random(seed)
         
         # Generate trips based on pattern
         trips = []
@@ -211,23 +451,13 @@ def generate_traffic_pattern(net_file, trips_file, n_vehicles, sim_time, pattern
         
         for i in range(n_vehicles):
             # Calculate departure time based on pattern
-            depart_time = calculate_departure_time(i, n_vehicles, departure_window, pattern_config)
-            
-            # Select source and destination based on pattern weights
-            from_edge = select_weighted_edge(edge_categories, pattern_config['source_weights'])
-            to_edge = select_weighted_edge(edge_categories, pattern_config['sink_weights'])
-            
-            # Ensure different source and destination
-            attempts = 0
-            while from_edge == to_edge and attempts < 10:
-                to_edge = select_weighted_edge(edge_categories, pattern_config['sink_weights'])
-                attempts += 1
+            depart_time = calculate_departure_time(i, n_vehicles, departure_window, pattern_config, departure_rng)
             
             trips.append({
                 'id': f'trip_{i}',
                 'depart': f'{depart_time:.2f}',
-                'from': from_edge,
-                'to': to_edge
+                'from': from_edges[i],
+                'to': to_edges[i]
             })
         
         # Write trips file
@@ -258,259 +488,207 @@ def get_network_edges(net_file):
         print(f"Error parsing network: {e}")
         return []
 
-def categorize_edges(edges):
-    """Categorize edges by their location and function for pattern generation."""
-    categories = {
-        'all': edges,
-        'perimeter': [],
-        'center': [],
-        'perimeter_only': [],      # Edges that ONLY touch perimeter (for strict commuter pattern)
-        'center_only': [],         # Edges that are ONLY internal (for strict commuter pattern)
-        'column_0_only': [],       # Edges that start ONLY from column 0 (for strict industrial)
-        'rightmost_column_only': [], # Edges that end ONLY at rightmost column (for strict industrial)
-        'left_edge': [],
-        'right_edge': [],
-        'leftmost_edge': [],    # Edges involving leftmost column
-        'rightmost_edge': [],   # Edges involving rightmost column
-        'leftmost_column': [],  # Edges strictly from column 0 only
-        'rightmost_column': [], # Edges strictly to rightmost column only
-        'top_edge': [],
-        'bottom_edge': [],
-        'outer_ring': [],
-        'inner_core': []
+def network_key(net_file):
+    """Cache key of a network file version: (absolute path, size, mtime), without reading it."""
+    stat = os.stat(net_file)
+    return (os.path.abspath(net_file), stat.st_size, stat.st_mtime_ns)
+
+def read_grid_positions(net_file):
+    """
+    Read every usable edge with the grid position of its start and end junction.
+    
+    Positions are ranks of the junctions' x/y coordinates, so they do not depend
+    on junction or edge naming. 'row' is the x rank and 'col' the y rank, which
+    matches the letter/digit of netgenerate's grid ids (A0 = x 0, y 0; B0 = x 1, y 0).
+    
+    Returns:
+        (edge ids array, dict of int arrays 'start_row', 'start_col', 'end_row', 'end_col')
+    """
+    junctions = {}
+    edges = []
+    for _, elem in ET.iterparse(net_file, events=('end',)):
+        if elem.tag == 'junction':
+            if elem.get('type') != 'internal':
+                junctions[elem.get('id')] = (float(elem.get('x', '0')), float(elem.get('y', '0')))
+            elem.clear()
+        elif elem.tag == 'edge':
+            edge_id = elem.get('id')
+            # Skip internal junction edges
+            if edge_id and not edge_id.startswith(':') and elem.get('function') != 'internal':
+                edges.append((edge_id, elem.get('from'), elem.get('to')))
+            elem.clear()
+        elif elem.tag in ('connection', 'tlLogic'):
+            elem.clear()
+    
+    names = sorted(junctions)
+    index = {name: i for i, name in enumerate(names)}
+    coords = np.array([junctions[name] for name in names], dtype=float).reshape(-1, 2)
+    _, x_rank = np.unique(np.round(coords[:, 0], 2), return_inverse=True)
+    _, y_rank = np.unique(np.round(coords[:, 1], 2), return_inverse=True)
+    
+    start = np.array([index.get(f, 0) for _, f, _ in edges], dtype=int)
+    end = np.array([index.get(t, 0) for _, _, t in edges], dtype=int)
+    positions = {
+        'start_row': x_rank[start] if len(edges) else start,
+        'start_col': y_rank[start] if len(edges) else start,
+        'end_row': x_rank[end] if len(edges) else end,
+        'end_col': y_rank[end] if len(edges) else end
     }
+    return np.array([edge_id for edge_id, _, _ in edges]), positions
+
+# Edge categories per network content hash, see categorize_edges
+_edge_category_cache = {}
+
+def categorize_edges(net_file):
+    """
+    Categorize edges by their location and function for pattern generation.
     
-    # Detect grid size by finding max coordinates in edges
-    max_row_idx = 0
-    max_col_idx = 0
-    
-    for edge in edges:
-        if len(edge) == 4:
-            start_row, start_col, end_row, end_col = edge[0], edge[1], edge[2], edge[3]
-            if start_row.isalpha() and start_col.isdigit() and end_row.isalpha() and end_col.isdigit():
-                start_row_idx = ord(start_row) - ord('A')
-                end_row_idx = ord(end_row) - ord('A')
-                start_col_idx = int(start_col)
-                end_col_idx = int(end_col)
-                
-                max_row_idx = max(max_row_idx, start_row_idx, end_row_idx)
-                max_col_idx = max(max_col_idx, start_col_idx, end_col_idx)
-    
-    for edge in edges:
-        # SUMO grid edges follow pattern like "A0B0", "B1C1", etc.
-        # Format: [StartRow][StartCol][EndRow][EndCol]
-        # A=top, B=middle, C=bottom (rows)
-        # 0=left, 1=middle, 2=right (cols)
-        
-        if len(edge) == 4:
-            start_row, start_col, end_row, end_col = edge[0], edge[1], edge[2], edge[3]
-            
-            # Convert to coordinates for easier analysis
-            # A=0, B=1, C=2, D=3... (row indices)
-            # 0, 1, 2, 3... (column indices)
-            start_row_idx = ord(start_row) - ord('A') if start_row.isalpha() else 0
-            end_row_idx = ord(end_row) - ord('A') if end_row.isalpha() else 0
-            start_col_idx = int(start_col) if start_col.isdigit() else 0
-            end_col_idx = int(end_col) if end_col.isdigit() else 0
-            
-            # Determine edge type based on start and end positions
-            
-            # STRICT COLUMN 0 ONLY: Edges that start from column 0 AND don't go to inner areas
-            if start_col_idx == 0:
-                categories['column_0_only'].append(edge)
-                categories['leftmost_column'].append(edge)
-                categories['leftmost_edge'].append(edge)
-                categories['left_edge'].append(edge)
-            
-            # STRICT RIGHTMOST COLUMN ONLY: Edges that end at the rightmost column AND come from appropriate sources
-            if end_col_idx == max_col_idx:
-                categories['rightmost_column_only'].append(edge)
-                categories['rightmost_column'].append(edge)
-                categories['rightmost_edge'].append(edge)
-                categories['right_edge'].append(edge)
-            
-            # LEFT EDGES: Any edge involving leftmost column (broader definition)
-            if start_col_idx == 0 or end_col_idx == 0:
-                if edge not in categories['left_edge']:
-                    categories['left_edge'].append(edge)
-            
-            # RIGHT EDGES: Any edge involving rightmost column (broader definition)  
-            if start_col_idx == max_col_idx or end_col_idx == max_col_idx:
-                if edge not in categories['right_edge']:
-                    categories['right_edge'].append(edge)
-            
-            # TOP EDGES: Start from or go to top row (A)
-            if start_row_idx == 0 or end_row_idx == 0:
-                categories['top_edge'].append(edge)
-            
-            # BOTTOM EDGES: Start from or go to bottom row
-            if start_row_idx == max_row_idx or end_row_idx == max_row_idx:
-                categories['bottom_edge'].append(edge)
-            
-            # PERIMETER EDGES: Any edge touching the grid boundary
-            is_perimeter = (start_row_idx == 0 or start_row_idx == max_row_idx or 
-                           start_col_idx == 0 or start_col_idx == max_col_idx or
-                           end_row_idx == 0 or end_row_idx == max_row_idx or 
-                           end_col_idx == 0 or end_col_idx == max_col_idx)
-                           
-            # STRICT PERIMETER ONLY: Edges that START from boundary (for origins)
-            is_boundary_start = (start_row_idx == 0 or start_row_idx == max_row_idx or 
-                                start_col_idx == 0 or start_col_idx == max_col_idx)
-            is_boundary_end = (end_row_idx == 0 or end_row_idx == max_row_idx or 
-                              end_col_idx == 0 or end_col_idx == max_col_idx)
-            
-            if is_perimeter:
-                categories['perimeter'].append(edge)
-                categories['outer_ring'].append(edge)
-            
-            # Add to perimeter_only ONLY if it starts from boundary (for commuter origins)
-            if is_boundary_start:
-                categories['perimeter_only'].append(edge)
-            
-            # STRICT CENTER ONLY: Different rules for origins vs destinations
-            start_is_internal = (0 < start_row_idx < max_row_idx and 0 < start_col_idx < max_col_idx)
-            end_is_internal = (0 < end_row_idx < max_row_idx and 0 < end_col_idx < max_col_idx)
-            
-            # Center category (broad)
-            if start_is_internal and end_is_internal:
-                categories['center'].append(edge)
-                categories['inner_core'].append(edge)
-            elif start_is_internal or end_is_internal:
-                categories['center'].append(edge)
-                
-            # Center_only category (strict - for destinations, edges that END in center)
-            if end_is_internal:
-                categories['center_only'].append(edge)
-    
-    # Ensure no empty categories - use fallback distributions
-    total_edges = len(edges)
-    if total_edges > 0:
-        # Strict fallbacks for new categories
-        if not categories['perimeter_only']:
-            # Fallback: edges that start from boundary rows/columns only
-            for edge in edges:
-                if len(edge) == 4 and edge[0].isalpha() and edge[1].isdigit():
-                    start_row_idx = ord(edge[0]) - ord('A')
-                    start_col_idx = int(edge[1])
-                    if (start_row_idx == 0 or start_row_idx == max_row_idx or 
-                        start_col_idx == 0 or start_col_idx == max_col_idx):
-                        categories['perimeter_only'].append(edge)
-            
-        if not categories['center_only']:
-            # Fallback: edges that end in internal positions
-            for edge in edges:
-                if len(edge) == 4 and edge[2].isalpha() and edge[3].isdigit():
-                    end_row_idx = ord(edge[2]) - ord('A')
-                    end_col_idx = int(edge[3])
-                    if (0 < end_row_idx < max_row_idx and 0 < end_col_idx < max_col_idx):
-                        categories['center_only'].append(edge)
-                        
-        if not categories['column_0_only']:
-            # Fallback: edges that start with column 0
-            categories['column_0_only'] = [e for e in edges if len(e) >= 2 and e[1] == '0'][:max(1, total_edges//4)]
-            
-        if not categories['rightmost_column_only']:
-            # Fallback: edges that end with max column index
-            max_col_str = str(max_col_idx)
-            categories['rightmost_column_only'] = [e for e in edges if len(e) >= 4 and e[3] == max_col_str][:max(1, total_edges//4)]
-            
-        # Existing fallbacks
-        if not categories['leftmost_column']:
-            categories['leftmost_column'] = [e for e in edges if len(e) >= 2 and e[1] == '0'][:max(1, total_edges//4)]
-            
-        if not categories['rightmost_column']:
-            max_col_str = str(max_col_idx)
-            categories['rightmost_column'] = [e for e in edges if len(e) >= 4 and e[3] == max_col_str][:max(1, total_edges//4)]
-            
-        if not categories['leftmost_edge']:
-            categories['leftmost_edge'] = [e for e in edges if len(e) >= 2 and e[1] == '0'][:max(1, total_edges//4)]
-            
-        if not categories['rightmost_edge']:
-            max_col_str = str(max_col_idx)
-            categories['rightmost_edge'] = [e for e in edges if len(e) >= 4 and e[3] == max_col_str][:max(1, total_edges//4)]
-            
-        if not categories['center']:
-            mid_start = total_edges // 3
-            mid_end = 2 * total_edges // 3
-            categories['center'] = edges[mid_start:mid_end] if mid_end > mid_start else [edges[total_edges//2]]
-            
-        if not categories['perimeter']:
-            categories['perimeter'] = []
-            for edge in edges:
-                if len(edge) == 4 and edge[0].isalpha() and edge[1].isdigit():
-                    start_row_idx = ord(edge[0]) - ord('A')
-                    start_col_idx = int(edge[1])
-                    end_row_idx = ord(edge[2]) - ord('A') 
-                    end_col_idx = int(edge[3])
-                    
-                    if (start_row_idx == 0 or start_row_idx == max_row_idx or start_col_idx == 0 or start_col_idx == max_col_idx or
-                        end_row_idx == 0 or end_row_idx == max_row_idx or end_col_idx == 0 or end_col_idx == max_col_idx):
-                        categories['perimeter'].append(edge)
-            
-            if not categories['perimeter']:  # Ultimate fallback
-                categories['perimeter'] = edges[:total_edges//2] + edges[-total_edges//2:]
+    Categories are boolean masks over the network's edge array, computed in one
+    vectorized pass from junction coordinates and cached per network file version
+    (network_key).
+    
+    Returns:
+        Dict with 'network' (the network_key, also used to key sampling tables),
+        'edges' (edge ids array) and 'masks' (category name -> bool array)
+    """
+    key = network_key(net_file)
+    if key in _edge_category_cache:
+        return _edge_category_cache[key]
+    
+    edges, pos = read_grid_positions(net_file)
+    n_edges = len(edges)
+    sr, sc, er, ec = pos['start_row'], pos['start_col'], pos['end_row'], pos['end_col']
+    max_row_idx = int(max(sr.max(), er.max())) if n_edges else 0
+    max_col_idx = int(max(sc.max(), ec.max())) if n_edges else 0
     
-    # Final fallback - ensure no completely empty categories
-    for category in categories:
-        if category != 'all' and not categories[category]:
-            categories[category] = edges.copy()
+    def on_boundary(row, col):
+        return (row == 0) | (row == max_row_idx) | (col == 0) | (col == max_col_idx)
     
+    def is_internal(row, col):
+        return (row > 0) & (row < max_row_idx) & (col > 0) & (col < max_col_idx)
+    
+    starts_left = sc == 0                  # Edges that start from column 0
+    ends_right = ec == max_col_idx         # Edges that end at the rightmost column
+    start_internal = is_internal(sr, sc)
+    end_internal = is_internal(er, ec)
+    perimeter = on_boundary(sr, sc) | on_boundary(er, ec)
+    
+    masks = {
+        'all': np.ones(n_edges, dtype=bool),
+        'perimeter': perimeter,
+        'center': start_internal | end_internal,
+        'perimeter_only': on_boundary(sr, sc),    # Edges that START from the boundary (commuter origins)
+        'center_only': end_internal,              # Edges that END in the center (commuter destinations)
+        'column_0_only': starts_left,             # Strict industrial origins
+        'rightmost_column_only': ends_right,      # Strict industrial destinations
+        'left_edge': starts_left | (ec == 0),
+        'right_edge': (sc == max_col_idx) | ends_right,
+        'leftmost_edge': starts_left,
+        'rightmost_edge': ends_right,
+        'leftmost_column': starts_left,
+        'rightmost_column': ends_right,
+        'top_edge': (sr == 0) | (er == 0),
+        'bottom_edge': (sr == max_row_idx) | (er == max_row_idx),
+        'outer_ring': perimeter.copy(),
+        'inner_core': start_internal & end_internal
+    }
+    
+    # Ensure no empty categories (e.g. 2x2 grids have no center) - use fallback distributions
+    if n_edges and not masks['center'].any():
+        masks['center'][n_edges // 3:max(2 * n_edges // 3, n_edges // 3 + 1)] = True
+    for category, mask in masks.items():
+        if not mask.any():
+            mask[:] = True
+    
+    categories = {'network': key, 'edges': edges, 'masks': masks}
+    _edge_category_cache[key] = categories
     return categories
 
-def select_weighted_edge(edge_categories, weights):
-    """Select an edge based on weighted categories with exclusive selection."""
-    # Create weighted pool of edges with exclusive selection
-    weighted_edges = []
+# Sampling tables per (network key, weights), see get_edge_sampling_table
+_sampling_table_cache = {}
+
+def build_edge_sampling_table(edge_categories, weights):
+    """
+    Turn a pattern's category weights into a cumulative sampling table.
+    
+    Every edge of a weighted category gets int(weight * 10) tickets, and
+    perimeter_only is first restricted to edges outside the center categories.
+    Drawing from the table is therefore the same as drawing uniformly from a pool
+    that repeats each edge once per ticket, without building it.
+    
+    Returns:
+        (edge ids array, cumulative probabilities array)
+    """
+    edges = edge_categories['edges']
+    masks = edge_categories['masks']
+    tickets = np.zeros(len(edges))
     
     # Process weights to handle exclusive categories
     for category, weight in weights.items():
-        if category in edge_categories and weight > 0:
-            category_edges = edge_categories[category]
+        if category in masks and weight > 0:
+            category_mask = masks[category]
             
             # For exclusive patterns, remove edges that might be in overlapping categories
             if category == 'perimeter_only':
                 # Ensure edges are ONLY from perimeter, not also in center categories
-                exclusive_edges = [e for e in category_edges 
-                                 if e not in edge_categories.get('center_only', []) 
-                                 and e not in edge_categories.get('center', [])]
-                if exclusive_edges:
-                    category_edges = exclusive_edges
-                    
-            elif category == 'center_only':
-                # Ensure edges are ONLY for center, not also in perimeter origin categories  
-                exclusive_edges = category_edges  # center_only is already exclusive for destinations
-                
-            elif category == 'column_0_only':
-                # Ensure edges are ONLY from column 0
-                exclusive_edges = [e for e in category_edges 
-                                 if len(e) >= 2 and e[1] == '0']
-                if exclusive_edges:
-                    category_edges = exclusive_edges
-                    
-            elif category == 'rightmost_column_only':
-                # Already exclusive by definition
-                exclusive_edges = category_edges
+                exclusive_mask = category_mask & ~masks['center_only'] & ~masks['center']
+                if exclusive_mask.any():
+                    category_mask = exclusive_mask
             
-            # Add edges multiple times based on weight
-            for edge in category_edges:
-                weighted_edges.extend([edge] * int(weight * 10))
+            tickets += int(weight * 10) * category_mask
     
-    if not weighted_edges:
+    if not tickets.any():
         # For exclusive patterns, avoid falling back to 'all'
         # Try to find any available edges from exclusive categories first
+        tickets = masks['all'].astype(float)
         for category in ['column_0_only', 'rightmost_column_only', 'perimeter_only', 'center_only']:
-            if category in edge_categories and edge_categories[category]:
-                weighted_edges = edge_categories[category]
+            if masks[category].any():
+                tickets = masks[category].astype(float)
                 break
-        
-        # If still no edges, then fall back to 'all'
-        if not weighted_edges:
-            weighted_edges = edge_categories.get('all', ['edge1', 'edge2'])
     
-    return random.choice(weighted_edges)
+    keep = tickets > 0
+    cumulative = np.cumsum(tickets[keep])
+    return edges[keep], cumulative / cumulative[-1]
+
+def get_edge_sampling_table(edge_categories, weights):
+    """build_edge_sampling_table, computed once per network and weights."""
+    key = (edge_categories['network'], json.dumps(weights, sort_keys=True))
+    if key not in _sampling_table_cache:
+        _sampling_table_cache[key] = build_edge_sampling_table(edge_categories, weights)
+    return _sampling_table_cache[key]
 
-def calculate_departure_time(vehicle_idx, total_vehicles, departure_window, pattern_config):
-    """Calculate departure time based on pattern distribution."""
+def sample_edges(table, n, rng):
+    """Draw n edge ids from a sampling table (O(log E) each, vectorized)."""
+    edge_ids, cumulative = table
+    picks = np.searchsorted(cumulative, rng.random(n), side='right')
+    return edge_ids[np.minimum(picks, len(edge_ids) - 1)]
+
+def sample_od_pairs(source_table, sink_table, n, rng, max_attempts=10):
+    """
+    Draw n (source, destination) pairs, redrawing destinations that equal their
+    source up to max_attempts times.
+    """
+    from_edges = sample_edges(source_table, n, rng)
+    to_edges = sample_edges(sink_table, n, rng)
+    
+    # Ensure different source and destination
+    for _ in range(max_attempts):
+        same = np.flatnonzero(from_edges == to_edges)
+        if len(same) == 0:
+            break
+        to_edges[same] = sample_edges(sink_table, len(same), rng)
+    
+    return from_edges.tolist(), to_edges.tolist()
+
+def select_weighted_edge(edge_categories, weights):
+    """Select a single edge based on weighted categories with exclusive selection."""
+    edge_ids, cumulative = build_edge_sampling_table(edge_categories, weights)
+    pick = int(np.searchsorted(cumulative, random.random(), side='right'))
+    return str(edge_ids[min(pick, len(edge_ids) - 1)])
+
+def calculate_departure_time(vehicle_idx, total_vehicles, departure_window, pattern_config, rng=None):
+    """Calculate departure time based on pattern distribution (rng defaults to the random module)."""
+    rng = rng or random
     time_dist = pattern_config.get('time_distribution', 'uniform')
     
     if time_dist == 'uniform':
@@ -536,12 +714,12 @@ def calculate_departure_time(vehicle_idx, total_vehicles, departure_window, patt
         # Industrial shift pattern - concentrated at shift times
         shift_starts = [0.1 * departure_window, 0.6 * departure_window]
         closest_shift = min(shift_starts, key=lambda x: abs(x - vehicle_idx * departure_window / total_vehicles))
-        base_time = closest_shift + random.uniform(-departure_window * 0.05, departure_window * 0.05)
+        base_time = closest_shift + rng.uniform(-departure_window * 0.05, departure_window * 0.05)
         return max(1.0, base_time)
     
     else:  # 'normal' or unknown - use uniform with slight randomization
         base_time = vehicle_idx * (departure_window / total_vehicles)
-        randomization = random.uniform(-departure_window * 0.02, departure_window * 0.02)
+        randomization = rng.uniform(-departure_window * 0.02, departure_window * 0.02)
         return max(1.0, base_time + randomization)  # Ensure minimum 1 second
 
 def write_trips_file(trips_file, trips):
@@ -558,8 +736,147 @@ def write_trips_file(trips_file, trips):
     with open(trips_file, 'w') as f:
         f.write('\n'.join(content))
 
-def convert_trips_to_routes(net_file, trips_file, route_file):
-    """Convert trips to routes using SUMO's duarouter."""
+def slice_departure_counts(n_vehicles, sim_time, pattern_config, seed, slice_seconds):
+    """
+    Number of departures per time slice for a pattern's time distribution.
+    
+    Uses the same departure times (and seed) as per-trip generation, but only
+    counts them, so the per-slice totals match generate_traffic_pattern's trips.
+    
+    Returns:
+        Dict of slice index -> departure count
+    """
+    departure_window = sim_time * 0.8  # Use first 80% for departures
+    departure_rng = random.Random(seed)
+    counts = {}
+    for i in range(n_vehicles):
+        depart_time = calculate_departure_time(i, n_vehicles, departure_window, pattern_config, departure_rng)
+        slice_idx = int(round(depart_time, 2) // slice_seconds)
+        counts[slice_idx] = counts.get(slice_idx, 0) + 1
+    return counts
+
+def split_count(total, probabilities, rng):
+    """
+    Split an integer total over categories in proportion to probabilities.
+    
+    Every category gets the integer part of its expected count; the remaining
+    units go to categories drawn without replacement in proportion to the
+    fractional parts, so the counts always sum to total.
+    """
+    expected = total * np.asarray(probabilities, dtype=float)
+    counts = np.floor(expected).astype(int)
+    remainder = int(total - counts.sum())
+    if remainder > 0:
+        fractions = expected - counts
+        picks = rng.choice(len(counts), size=remainder, replace=False, p=fractions / fractions.sum())
+        counts[picks] += 1
+    return counts
+
+def table_probabilities(table):
+    """Per-edge probabilities of a sampling table (edge ids array, probabilities array)."""
+    edge_ids, cumulative = table
+    return edge_ids, np.diff(cumulative, prepend=0.0)
+
+def pair_counts(source_edges, source_counts, sink_edges, sink_counts, rng):
+    """
+    Pair per-edge origin and destination counts of one slice into OD counts.
+    
+    Origins and destinations are visited in random order and matched greedily
+    (north-west corner rule), so every edge keeps its origin and destination
+    count and a slice produces at most (origins + destinations - 1) pairs. A
+    destination equal to the current origin is swapped with the next one when
+    possible.
+    
+    Returns:
+        List of (source index, sink index, count)
+    """
+    sources = [i for i in rng.permutation(len(source_counts)) if source_counts[i] > 0]
+    sinks = [j for j in rng.permutation(len(sink_counts)) if sink_counts[j] > 0]
+    remaining_sources = {i: int(source_counts[i]) for i in sources}
+    remaining_sinks = {j: int(sink_counts[j]) for j in sinks}
+    
+    pairs = []
+    si = di = 0
+    while si < len(sources) and di < len(sinks):
+        if source_edges[sources[si]] == sink_edges[sinks[di]] and di + 1 < len(sinks):
+            sinks[di], sinks[di + 1] = sinks[di + 1], sinks[di]
+        source, sink = sources[si], sinks[di]
+        number = min(remaining_sources[source], remaining_sinks[sink])
+        pairs.append((source, sink, number))
+        remaining_sources[source] -= number
+        remaining_sinks[sink] -= number
+        if remaining_sources[source] == 0:
+            si += 1
+        if remaining_sinks[sink] == 0:
+            di += 1
+    return pairs
+
+def build_rate_flows(source_table, sink_table, n_vehicles, sim_time, pattern_config, seed, slice_seconds):
+    """
+    Build a pattern's demand as flows from its expected rates.
+    
+    Each time slice's departure count (slice_departure_counts) is split over the
+    source and sink sampling tables in proportion to their probabilities
+    (split_count), and the per-edge counts are paired into OD flows
+    (pair_counts). Per-slice totals and per-edge origin/destination counts
+    therefore follow the same distributions as per-trip generation, while the
+    number of flows is bounded by slices x (source + sink edges) instead of
+    growing with the number of vehicles. SUMO spreads a flow's vehicles evenly
+    over its slice.
+    
+    Returns:
+        List of flow dicts sorted by begin time
+    """
+    rng = np.random.default_rng(seed)
+    source_edges, source_probs = table_probabilities(source_table)
+    sink_edges, sink_probs = table_probabilities(sink_table)
+    
+    flows = []
+    for slice_idx, count in sorted(slice_departure_counts(n_vehicles, sim_time, pattern_config, seed,
+                                                          slice_seconds).items()):
+        source_counts = split_count(count, source_probs, rng)
+        sink_counts = split_count(count, sink_probs, rng)
+        begin = slice_idx * slice_seconds
+        end = min(begin + slice_seconds, sim_time)
+        for source, sink, number in pair_counts(source_edges, source_counts, sink_edges, sink_counts, rng):
+            flows.append({
+                'id': f'flow_{slice_idx}_{len(flows)}',
+                'begin': f'{begin:.2f}',
+                'end': f'{end:.2f}',
+                'number': number,
+                'from': source_edges[source],
+                'to': sink_edges[sink]
+            })
+    return flows
+
+def write_flows_file(trips_file, flows):
+    """Write flows to a SUMO demand XML file (same role as a trips file)."""
+    content = ['<?xml version="1.0" encoding="UTF-8"?>']
+    content.append('<routes>')
+    
+    for flow in flows:
+        content.append(f'    <flow id="{flow["id"]}" begin="{flow["begin"]}" end="{flow["end"]}" '
+                      f'number="{flow["number"]}" from="{flow["from"]}" to="{flow["to"]}"/>')
+    
+    content.append('</routes>')
+    
+    with open(trips_file, 'w') as f:
+        f.write('\n'.join(content))
+
+def convert_trips_to_routes(net_file, trips_file, route_file, router=None):
+    """Convert trips to routes using SUMO's duarouter or the in-process grid router (defaults to ROUTER)."""
+    router = router or ROUTER
+    if router == 'grid':
+        try:
+            routed, dropped = route_trips_file(net_file, trips_file, route_file)
+            if dropped:
+                print(f"Skipped {dropped} unroutable trips")
+            print(f"Routes generated: {route_file}")
+            return routed > 0
+        except Exception as e:
+            print(f"Error routing trips: {e}")
+            return False
+    
     try:
         result = subprocess.run([
             'duarouter',
@@ -624,13 +941,16 @@ def create_vehicle_types_file(vtype_file):
         f.write(content)
 
 def create_sumocfg_file(sumocfg_file, net_file, route_file, vtype_file, sim_time):
-    """Create SUMO configuration file."""
+    """Create SUMO configuration file (paths are written relative to the config)."""
+    cfg_dir = os.path.dirname(os.path.abspath(sumocfg_file))
+    net_path, route_path, vtype_path = (os.path.relpath(os.path.abspath(f), cfg_dir)
+                                        for f in (net_file, route_file, vtype_file))
     content = f'''<?xml version="1.0" encoding="UTF-8"?>
 <configuration>
     <input>
-        <net-file value="{os.path.basename(net_file)}"/>
-        <route-files value="{os.path.basename(route_file)}"/>
-        <additional-files value="{os.path.basename(vtype_file)}"/>
+        <net-file value="{net_path}"/>
+        <route-files value="{route_path}"/>
+        <additional-files value="{vtype_path}"/>
     </input>
     <output>
         <tripinfo-output value="tripinfo.xml"/>
@@ -723,8 +1043,8 @@ def evaluate_solution_with_new_seed(solution_file, new_seed, n_vehicles=None, si
     
     print(f"Re-evaluating solution with new seed {new_seed}")
     
-    # Generate new scenario with different seed
-    scenario_result = generate_network_and_routes(
+    # Scenario with the new seed (read-only paths from the scenario store)
+    scenario_result = get_cached_scenario(
         grid_size, n_vehicles, sim_time, pattern, new_seed
     )
     
@@ -740,44 +1060,37 @@ def evaluate_solution_with_new_seed(solution_file, new_seed, n_vehicles=None, si
         
         # Create temporary directory for simulation
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Set simulation time in the ACO module's global variable
-            import src.optimization.simple_aco as aco_module
-            original_sim_time = aco_module.SIMULATION_TIME
-            aco_module.SIMULATION_TIME = sim_time
+            # Run evaluation with this scenario's simulation time
+            metrics = evaluate_solution(
+                solution=solution,
+                net_file=scenario_result['files']['network'],
+                route_file=scenario_result['files']['routes'],
+                temp_dir=temp_dir,
+                sim_time=sim_time,
+                n_vehicles=n_vehicles
+            )
+            
+            # Calculate cost using the same function as optimization
+            cost = calculate_cost(metrics)
+            
+            # Average travel time per vehicle
+            avg_time = metrics.get('total_time', 0) / max(metrics.get('vehicles', 1), 1)
+            
+            print(f"   Evaluation completed:")
+            print(f"      • Vehicles: {metrics.get('vehicles', 0)}/{n_vehicles}")
+            print(f"      • Avg travel time: {avg_time:.1f}s")
+            print(f"      • Cost: {cost:.1f}")
             
-            try:
-                # Run evaluation
-                metrics = evaluate_solution(
-                    solution=solution,
-                    net_file=scenario_result['files']['network'],
-                    route_file=scenario_result['files']['routes'],
-                    temp_dir=temp_dir
-                )
-                
-                # Calculate cost using the same function as optimization
-                cost = calculate_cost(metrics)
-                
-                # Average travel time per vehicle
-                avg_time = metrics.get('total_time', 0) / max(metrics.get('vehicles', 1), 1)
-                
-                print(f"   Evaluation completed:")
-                print(f"      • Vehicles: {metrics.get('vehicles', 0)}/{n_vehicles}")
-                print(f"      • Avg travel time: {avg_time:.1f}s")
-                print(f"      • Cost: {cost:.1f}")
-                
-                return {
-                    'success': True,
-                    'original_seed': metadata.get('seed'),
-                    'new_seed': new_seed,
-                    'solution': solution,
-                    'scenario_files': scenario_result['files'],
-                    'metrics': metrics,
-                    'cost': cost,
-                    'avg_travel_time': avg_time
-                }
-            finally:
-                # Restore original simulation time
-                aco_module.SIMULATION_TIME = original_sim_time
+            return {
+                'success': True,
+                'original_seed': metadata.get('seed'),
+                'new_seed': new_seed,
+                'solution': solution,
+                'scenario_files': scenario_result['files'],
+                'metrics': metrics,
+                'cost': cost,
+                'avg_travel_time': avg_time
+            }
             
     except Exception as e:
         print(f"   Evaluation failed: {e}")
@@ -0,0 +1,248 @@
+import xml.etree.ElementTree as ET
+import heapq
+import os
+import time
+from xml.sax.saxutils import quoteattr
+import numpy as np
+
+_router_cache = {}
+
+class GridRouter:
+    """
+    In-process shortest-travel-time router for generated networks.
+
+    Edges are nodes of the search graph and <connection> elements its arcs, so
+    turn restrictions (and netgenerate's turnarounds) are respected like in
+    duarouter. A shortest-path tree is computed once per source edge and every
+    (from-edge, to-edge) route is memoized, so a demand with many vehicles per OD
+    pair routes each pair only once.
+    """
+
+    def __init__(self, net_file):
+        edge_ids = []
+        costs = []
+        connections = []
+        for _, elem in ET.iterparse(net_file, events=('end',)):
+            if elem.tag == 'edge':
+                edge_id = elem.get('id')
+                if edge_id and not edge_id.startswith(':') and elem.get('function') != 'internal':
+                    lanes = elem.findall('lane')
+                    # Free-flow travel time on the fastest lane
+                    seconds = min((float(lane.get('length', '0')) / max(float(lane.get('speed', '13.89')), 0.1)
+                                   for lane in lanes), default=0.0)
+                    edge_ids.append(edge_id)
+                    costs.append(seconds)
+                elem.clear()
+            elif elem.tag == 'connection':
+                if not elem.get('from', ':').startswith(':'):
+                    connections.append((elem.get('from'), elem.get('to')))
+                elem.clear()
+            elif elem.tag in ('junction', 'tlLogic'):
+                elem.clear()
+
+        self.edge_ids = edge_ids
+        self.index = {edge_id: i for i, edge_id in enumerate(edge_ids)}
+        self.costs = np.array(costs, dtype=float)
+        successors = [set() for _ in edge_ids]
+        for from_edge, to_edge in connections:
+            if from_edge in self.index and to_edge in self.index:
+                successors[self.index[from_edge]].add(self.index[to_edge])
+        self.successors = [sorted(s) for s in successors]
+        self._trees = {}
+        self._routes = {}
+
+    def _shortest_path_tree(self, source):
+        """Predecessor array of the fastest paths from one source edge (Dijkstra)."""
+        if source in self._trees:
+            return self._trees[source]
+
+        dist = np.full(len(self.edge_ids), np.inf)
+        pred = np.full(len(self.edge_ids), -1, dtype=np.int32)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v in self.successors[u]:
+                nd = d + self.costs[v]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+
+        self._trees[source] = pred
+        return pred
+
+    def route(self, from_edge, to_edge):
+        """Space-separated edge list of the fastest route, or None if unreachable."""
+        key = (from_edge, to_edge)
+        if key in self._routes:
+            return self._routes[key]
+
+        route = None
+        if from_edge in self.index and to_edge in self.index:
+            source, target = self.index[from_edge], self.index[to_edge]
+            pred = self._shortest_path_tree(source)
+            if source == target or pred[target] >= 0:
+                path = [target]
+                while path[-1] != source:
+                    path.append(int(pred[path[-1]]))
+                route = ' '.join(self.edge_ids[i] for i in reversed(path))
+
+        self._routes[key] = route
+        return route
+
+def get_grid_router(net_file):
+    """GridRouter for a network file, built once per file version."""
+    stat = os.stat(net_file)
+    key = (os.path.abspath(net_file), stat.st_size, stat.st_mtime_ns)
+    if key not in _router_cache:
+        _router_cache[key] = GridRouter(net_file)
+    return _router_cache[key]
+
+class _DepartureOrderError(Exception):
+    """Raised while streaming a trips file that is not sorted by departure."""
+
+def departure_time(item):
+    """Departure of a (tag, attributes) pair from read_trips (a flow's begin)."""
+    tag, attributes = item
+    return float(attributes.get('depart' if tag == 'trip' else 'begin', '0'))
+
+def iter_trips(trips_file):
+    """Yield <trip> and <flow> elements as (tag, attribute dict) pairs in file order."""
+    for _, elem in ET.iterparse(trips_file, events=('end',)):
+        if elem.tag in ('trip', 'flow'):
+            yield elem.tag, dict(elem.attrib)
+            elem.clear()
+
+def read_trips(trips_file):
+    """All trips and flows of a file, sorted (stably) by departure time."""
+    return sorted(iter_trips(trips_file), key=departure_time)
+
+def _in_departure_order(trips):
+    """Pass trips through, raising _DepartureOrderError at the first earlier departure."""
+    latest = float('-inf')
+    for item in trips:
+        depart = departure_time(item)
+        if depart < latest:
+            raise _DepartureOrderError()
+        latest = depart
+        yield item
+
+def _write_routes(router, trips, route_file):
+    routed = 0
+    dropped = 0
+    with open(route_file, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n\n<routes>\n')
+        for tag, trip in trips:
+            edges = router.route(trip.pop('from', None), trip.pop('to', None))
+            if edges is None:
+                dropped += 1
+                continue
+            element = 'vehicle' if tag == 'trip' else 'flow'
+            attributes = ' '.join(f'{name}={quoteattr(value)}' for name, value in trip.items())
+            f.write(f'    <{element} {attributes}>\n        <route edges="{edges}"/>\n    </{element}>\n')
+            routed += 1
+        f.write('</routes>\n')
+    return routed, dropped
+
+def route_trips_file(net_file, trips_file, route_file):
+    """
+    Route a trips file in process and write a SUMO route file.
+
+    write_trips_file already writes trips in departure order, so trips are
+    streamed from the parser straight into the route file. If a departure
+    earlier than its predecessor turns up, the file is read again, sorted and
+    the route file rewritten (routes are memoized, so only parsing repeats).
+    Flows keep their attributes and get a route like trips. Like duarouter
+    --ignore-errors, trips without a route are dropped.
+
+    Returns:
+        (routed trips and flows, dropped trips and flows)
+    """
+    router = get_grid_router(net_file)
+    try:
+        return _write_routes(router, _in_departure_order(iter_trips(trips_file)), route_file)
+    except _DepartureOrderError:
+        return _write_routes(router, read_trips(trips_file), route_file)
+
+def route_travel_times(net_file, route_file):
+    """Free-flow travel time of every routed vehicle, keyed by vehicle id."""
+    router = get_grid_router(net_file)
+    times = {}
+    for _, elem in ET.iterparse(route_file, events=('end',)):
+        if elem.tag in ('vehicle', 'flow'):
+            route = elem.find('route')
+            if route is not None:
+                times[elem.get('id')] = sum(router.costs[router.index[e]] for e in route.get('edges', '').split()
+                                            if e in router.index)
+            elem.clear()
+    return times
+
+def benchmark_routers(net_file, trips_file, output_dir, repeats=3):
+    """
+    Compare duarouter (plus the departure-time sort) with the in-process router.
+
+    The grid router is timed cold (fresh shortest-path trees) and warm (trees and
+    routes memoized, as for further seeds on the same network). Route quality is
+    compared as the mean free-flow travel time over vehicles routed by both.
+
+    Returns:
+        Dictionary with seconds per routing run for each router and the speedups
+    """
+    from ..simplified_traffic import convert_trips_to_routes
+
+    dua_file = os.path.join(output_dir, 'benchmark_duarouter.rou.xml')
+    grid_file = os.path.join(output_dir, 'benchmark_grid.rou.xml')
+
+    start = time.time()
+    for _ in range(repeats):
+        convert_trips_to_routes(net_file, trips_file, dua_file, router='duarouter')
+    duarouter_seconds = (time.time() - start) / repeats
+
+    _router_cache.clear()
+    start = time.time()
+    route_trips_file(net_file, trips_file, grid_file)
+    cold_seconds = time.time() - start
+
+    start = time.time()
+    for _ in range(repeats):
+        route_trips_file(net_file, trips_file, grid_file)
+    warm_seconds = (time.time() - start) / repeats
+
+    dua_times = route_travel_times(net_file, dua_file)
+    grid_times = route_travel_times(net_file, grid_file)
+    common = sorted(set(dua_times) & set(grid_times))
+
+    results = {
+        'vehicles': len(grid_times),
+        'duarouter_seconds': duarouter_seconds,
+        'grid_cold_seconds': cold_seconds,
+        'grid_warm_seconds': warm_seconds,
+        'cold_speedup': duarouter_seconds / cold_seconds if cold_seconds > 0 else float('inf'),
+        'warm_speedup': duarouter_seconds / warm_seconds if warm_seconds > 0 else float('inf'),
+        'duarouter_mean_route_time': float(np.mean([dua_times[v] for v in common])) if common else 0.0,
+        'grid_mean_route_time': float(np.mean([grid_times[v] for v in common])) if common else 0.0,
+    }
+
+    print(f"   duarouter:         {duarouter_seconds:.3f}s per run")
+    print(f"   grid router cold:  {cold_seconds:.3f}s ({results['cold_speedup']:.1f}x)")
+    print(f"   grid router warm:  {warm_seconds:.3f}s ({results['warm_speedup']:.1f}x)")
+    print(f"   Mean free-flow route time: duarouter {results['duarouter_mean_route_time']:.1f}s, "
+          f"grid {results['grid_mean_route_time']:.1f}s over {len(common)} vehicles")
+
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Benchmark duarouter vs the in-process grid router")
+    parser.add_argument('--net', required=True, help="SUMO network file")
+    parser.add_argument('--trips', required=True, help="SUMO trips file")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        benchmark_routers(args.net, args.trips, temp_dir, args.repeats)
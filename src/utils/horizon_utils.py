@@ -0,0 +1,123 @@
+import xml.etree.ElementTree as ET
+import os
+
+# Multiplier on free-flow travel time and fixed safety margin (seconds)
+HORIZON_SLACK = 2.0
+HORIZON_MARGIN = 120
+
+_network_cache = {}
+
+def read_network_timing(net_file, green_max, yellow_max):
+    """
+    Read (once per network file) what the horizon bound needs from a network.
+
+    Returns a dict with 'edges' mapping each normal edge id to
+    (free-flow seconds, destination junction) and 'max_cycle' mapping each
+    traffic light junction to the longest cycle any candidate can produce,
+    where green/red phases last at most green_max and yellow phases yellow_max.
+    """
+    stat = os.stat(net_file)
+    key = (os.path.abspath(net_file), stat.st_size, stat.st_mtime_ns, green_max, yellow_max)
+    if key in _network_cache:
+        return _network_cache[key]
+
+    edges = {}
+    max_cycle = {}
+    for _, elem in ET.iterparse(net_file, events=('end',)):
+        if elem.tag == 'edge':
+            if elem.get('function') != 'internal':
+                lanes = elem.findall('lane')
+                if lanes:
+                    seconds = max(float(lane.get('length', '0')) / max(float(lane.get('speed', '13.89')), 0.1)
+                                  for lane in lanes)
+                    edges[elem.get('id')] = (seconds, elem.get('to'))
+            elem.clear()
+        elif elem.tag == 'tlLogic':
+            cycle = 0
+            for phase in elem.findall('phase'):
+                cycle += yellow_max if 'y' in phase.get('state', '').lower() else green_max
+            max_cycle[elem.get('id')] = max(max_cycle.get(elem.get('id'), 0), cycle)
+            elem.clear()
+        elif elem.tag in ('junction', 'connection'):
+            elem.clear()
+
+    timing = {'edges': edges, 'max_cycle': max_cycle}
+    _network_cache[key] = timing
+    return timing
+
+def route_time_bound(edge_ids, timing, slack=HORIZON_SLACK):
+    """Travel-time bound for one route: slowed-down free flow plus a full cycle at every signal."""
+    free_flow = 0.0
+    signal_wait = 0.0
+    for edge_id in edge_ids:
+        seconds, to_junction = timing['edges'].get(edge_id, (0.0, None))
+        free_flow += seconds
+        signal_wait += timing['max_cycle'].get(to_junction, 0)
+    return slack * free_flow + signal_wait
+
+def count_route_vehicles(route_file):
+    """
+    Number of vehicles a route file will insert: every vehicle and trip plus each
+    flow's 'number' (or (end - begin) / period).
+
+    Returns:
+        Vehicle count, or None if a flow's size cannot be determined (probability flows)
+    """
+    count = 0
+    for _, elem in ET.iterparse(route_file, events=('end',)):
+        if elem.tag in ('vehicle', 'trip'):
+            count += 1
+            elem.clear()
+        elif elem.tag == 'flow':
+            if elem.get('number') is not None:
+                count += int(float(elem.get('number')))
+            elif elem.get('period') is not None:
+                span = float(elem.get('end', '3600')) - float(elem.get('begin', '0'))
+                count += int(-(-span // float(elem.get('period'))))
+            else:
+                return None
+            elem.clear()
+    return count
+
+def estimate_simulation_horizon(net_file, route_file, green_max, yellow_max,
+                                slack=HORIZON_SLACK, margin=HORIZON_MARGIN):
+    """
+    Derive a simulation end time from the routes' departures and the network.
+
+    Every vehicle gets depart + route_time_bound(route); the horizon is the
+    latest of these plus margin. Vehicles referencing named routes and
+    routeDistribution alternatives (.rou.alt.xml) use their slowest route;
+    flows depart at the latest at their end time. Queueing behind other vehicles
+    and insertion delay are not modelled, so this is an estimate rather than a
+    guarantee that every vehicle arrives.
+
+    Returns:
+        Horizon in whole seconds, or None if the route file holds no vehicles
+    """
+    timing = read_network_timing(net_file, green_max, yellow_max)
+    named_routes = {}
+    latest = None
+
+    for _, elem in ET.iterparse(route_file, events=('end',)):
+        if elem.tag == 'route' and elem.get('id') and elem.get('edges'):
+            named_routes[elem.get('id')] = elem.get('edges').split()
+        elif elem.tag in ('vehicle', 'trip', 'flow'):
+            routes = [route.get('edges').split() for route in elem.iter('route') if route.get('edges')]
+            if elem.get('route') in named_routes:
+                routes.append(named_routes[elem.get('route')])
+            bound = max((route_time_bound(route, timing, slack) for route in routes), default=0.0)
+            if not routes and elem.get('from') and elem.get('to'):
+                # Unrouted trip: fall back to the slowest path any signal sequence allows
+                bound = route_time_bound(list(timing['edges']), timing, slack)
+
+            try:
+                depart = float(elem.get('end', '0') if elem.tag == 'flow' else elem.get('depart', '0'))
+            except ValueError:
+                depart = 0.0  # 'triggered', 'now', ...
+            finish = depart + bound
+            latest = finish if latest is None else max(latest, finish)
+            elem.clear()
+
+    if latest is None:
+        return None
+    return int(latest + margin + 0.999)
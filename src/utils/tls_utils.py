@@ -1,6 +1,72 @@
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
 import subprocess
 import csv
+import os
+
+from .tripinfo_utils import iter_tripinfo_chunks, total_travel_time
+
+# programID used for candidate programs loaded through additional-files
+TLS_PROGRAM_ID = 'candidate'
+
+_phase_index_cache = {}
+
+def build_phase_index(net_file):
+    """
+    Build (once per network file) an index of every tlLogic and its phases.
+
+    Returns a list of {'id', 'type', 'offset', 'phases'} dicts in net file order,
+    where 'phases' holds each phase's attributes except its duration. This is the
+    same phase order used for ACO solution vectors.
+    """
+    stat = os.stat(net_file)
+    key = (os.path.abspath(net_file), stat.st_size, stat.st_mtime_ns)
+    if key in _phase_index_cache:
+        return _phase_index_cache[key]
+
+    index = []
+    for _, elem in ET.iterparse(net_file, events=('end',)):
+        if elem.tag == 'tlLogic':
+            phases = []
+            for phase in elem.findall('phase'):
+                attrs = {k: v for k, v in phase.attrib.items() if k != 'duration'}
+                phases.append({'attrs': attrs, 'default_duration': phase.get('duration', '30')})
+            index.append({
+                'id': elem.get('id'),
+                'type': elem.get('type', 'static'),
+                'offset': elem.get('offset', '0'),
+                'phases': phases
+            })
+            elem.clear()
+        elif elem.tag in ('edge', 'junction', 'connection'):
+            elem.clear()
+
+    _phase_index_cache[key] = index
+    return index
+
+def write_tls_program_file(phase_index, durations, output_file, program_id=TLS_PROGRAM_ID):
+    """
+    Write a small additional file holding one tlLogic program per traffic light.
+
+    SUMO switches to the program loaded last, so adding this file through
+    additional-files runs the candidate durations without touching the network.
+    Phases beyond len(durations) keep their default duration.
+    """
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<additional>']
+    idx = 0
+    for tls in phase_index:
+        lines.append(f'    <tlLogic id={quoteattr(tls["id"])} type={quoteattr(tls["type"])} '
+                     f'programID={quoteattr(program_id)} offset={quoteattr(tls["offset"])}>')
+        for phase in tls['phases']:
+            duration = durations[idx] if idx < len(durations) else phase['default_duration']
+            attrs = ''.join(f' {k}={quoteattr(v)}' for k, v in phase['attrs'].items())
+            lines.append(f'        <phase duration="{duration}"{attrs}/>')
+            idx += 1
+        lines.append('    </tlLogic>')
+    lines.append('</additional>')
+
+    with open(output_file, 'w') as f:
+        f.write('\n'.join(lines))
 
 def get_default_durations(net_file):
     tree = ET.parse(net_file)
@@ -12,19 +78,19 @@ def get_default_durations(net_file):
     return durations
 
 def evaluate_tls_settings(net_file, sumocfg_file, durations, tag="default"):
-    # Write temp net file with given durations
-    net_copy = f'eval_{tag}.net.xml'
-    write_tls_durations(net_file, durations, net_copy)
-    # Make a config file pointing to this net
-    with open(sumocfg_file) as f:
-        cfg_data = f.read()
-    cfg_data = cfg_data.replace('grid_final.net.xml', net_copy)
-    cfg_copy = f'eval_{tag}.sumocfg'
-    with open(cfg_copy, 'w') as f:
-        f.write(cfg_data)
+    # Load the durations as an extra tlLogic program instead of rewriting the net
+    tls_file = os.path.abspath(f'eval_{tag}.tls.xml')
+    write_tls_program_file(build_phase_index(net_file), durations, tls_file)
+    # Keep any additional files the config already references (e.g. vehicle types)
+    cfg_dir = os.path.dirname(os.path.abspath(sumocfg_file))
+    additional = []
+    elem = ET.parse(sumocfg_file).getroot().find('.//additional-files')
+    if elem is not None and elem.get('value'):
+        additional = [os.path.join(cfg_dir, f) for f in elem.get('value').split(',')]
     tripinfo_file = f'eval_{tag}_tripinfo.xml'
     subprocess.run([
-        'sumo', '-c', cfg_copy,
+        'sumo', '-c', sumocfg_file,
+        '--additional-files', ','.join(additional + [tls_file]),
         '--tripinfo-output', tripinfo_file,
         '--no-warnings', 'true'
     ], check=True)
@@ -67,12 +133,7 @@ def write_tls_durations(input_xml, durations, output_file):
 def parse_tripinfo(tripinfo_file):
     # Returns total travel time for all vehicles
     try:
-        tree = ET.parse(tripinfo_file)
-        root = tree.getroot()
-        total_time = 0
-        for trip in root.findall('tripinfo'):
-            total_time += float(trip.get('duration'))
-        return total_time
+        return sum(total_travel_time(chunk) for chunk in iter_tripinfo_chunks(tripinfo_file))
     except Exception as e:
         print(f"Error parsing {tripinfo_file}: {e}")
         return float('inf')
\ No newline at end of file
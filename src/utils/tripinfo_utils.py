@@ -0,0 +1,88 @@
+import xml.etree.ElementTree as ET
+import gzip
+import numpy as np
+
+# One record per <tripinfo>; 'index' is the trip's position in the file
+TRIP_DTYPE = np.dtype([
+    ('index', np.int32),
+    ('depart', np.float64),
+    ('arrival', np.float64),
+    ('duration', np.float64),
+    ('waitingTime', np.float64),
+    ('timeLoss', np.float64),
+    ('stopTime', np.float64),
+])
+TRIP_FIELDS = TRIP_DTYPE.names[1:]
+TRIPINFO_CHUNK_SIZE = 65536    # Trips per chunk when streaming
+
+def open_tripinfo(tripinfo_file):
+    """Open a tripinfo file for parsing; SUMO writes gzip output for names ending in .gz."""
+    if str(tripinfo_file).endswith('.gz'):
+        return gzip.open(tripinfo_file, 'rb')
+    return open(tripinfo_file, 'rb')
+
+def _iter_trip_elements(tripinfo_file):
+    """Yield each <tripinfo> element, clearing it (and the root) once the caller is done."""
+    with open_tripinfo(tripinfo_file) as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event == 'end' and elem.tag == 'tripinfo':
+                yield elem
+                root.clear()
+
+def _fill_record(record, index, elem):
+    record['index'] = index
+    for field in TRIP_FIELDS:
+        value = elem.get(field)
+        record[field] = float(value) if value is not None else 0.0
+
+def iter_tripinfo_chunks(tripinfo_file, chunk_size=TRIPINFO_CHUNK_SIZE, with_ids=False):
+    """
+    Stream a tripinfo file as TRIP_DTYPE arrays of at most chunk_size trips.
+
+    Memory stays at one chunk however many vehicles the file holds. Unfinished
+    vehicles (written with arrival -1) are included; filter with finished_trips.
+    With with_ids, each chunk comes with the list of its vehicle ids.
+    """
+    chunk = np.zeros(chunk_size, dtype=TRIP_DTYPE)
+    ids = [] if with_ids else None
+    filled = 0
+    for index, elem in enumerate(_iter_trip_elements(tripinfo_file)):
+        _fill_record(chunk[filled], index, elem)
+        if with_ids:
+            ids.append(elem.get('id', 'unknown'))
+        filled += 1
+        if filled == chunk_size:
+            yield (chunk, ids) if with_ids else chunk
+            chunk = np.zeros(chunk_size, dtype=TRIP_DTYPE)
+            ids = [] if with_ids else None
+            filled = 0
+    if filled:
+        yield (chunk[:filled], ids) if with_ids else chunk[:filled]
+
+def read_waiting_times(tripinfo_file, capacity=0):
+    """
+    Waiting times of the finished trips in a tripinfo file, as one float array.
+
+    The lean per-vehicle pass for statistics mode: only 'arrival' and
+    'waitingTime' are read from each element.
+    """
+    waits = np.zeros(max(1, int(capacity)), dtype=np.float64)
+    count = 0
+    for elem in _iter_trip_elements(tripinfo_file):
+        if float(elem.get('arrival', '-1')) < 0:
+            continue
+        if count == len(waits):
+            waits = np.resize(waits, 2 * count)
+        waits[count] = float(elem.get('waitingTime', '0'))
+        count += 1
+    return waits[:count]
+
+def finished_trips(trips):
+    """Mask of trips that arrived (unfinished vehicles are written with arrival -1)."""
+    return trips['arrival'] >= 0
+
+def total_travel_time(trips):
+    """Sum of the durations of all trips in the array."""
+    return float(trips['duration'].sum()) if len(trips) else 0.0
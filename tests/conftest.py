@@ -0,0 +1,28 @@
+import pytest
+
+def write_grid_net(path, size):
+    """Minimal netgenerate-style grid (edge ids like A0B0) with the elements read by categorize_edges."""
+    lines = ['<net>']
+    for i in range(size):
+        for j in range(size):
+            lines.append(f'    <junction id="{chr(65 + i)}{j}" type="traffic_light" x="{i * 200}.00" y="{j * 200}.00"/>')
+    for i in range(size):
+        for j in range(size):
+            for di, dj in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                a, b = i + di, j + dj
+                if 0 <= a < size and 0 <= b < size:
+                    start, end = f'{chr(65 + i)}{j}', f'{chr(65 + a)}{b}'
+                    lines.append(f'    <edge id="{start}{end}" from="{start}" to="{end}"/>')
+    lines.append('</net>')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines))
+
+@pytest.fixture(scope='session')
+def grid_net(tmp_path_factory):
+    """Factory for synthetic grid networks: grid_net(size) -> net file path."""
+    def make(size):
+        path = tmp_path_factory.getbasetemp() / f'grid_{size}x{size}.net.xml'
+        if not path.exists():
+            write_grid_net(str(path), size)
+        return str(path)
+    return make
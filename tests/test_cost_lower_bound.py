@@ -0,0 +1,38 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.optimization.simple_aco import build_trip_metrics, calculate_cost, cost_lower_bound
+
+def _synthetic_trips(n_vehicles, seed):
+    rng = np.random.default_rng(seed)
+    departs = np.sort(rng.uniform(0, 600, n_vehicles))
+    # A departure gap, as produced by sparse demand patterns
+    departs[n_vehicles // 2:] += 400
+    durations = rng.uniform(60, 400, n_vehicles)
+    waits = durations * rng.uniform(0, 0.5, n_vehicles)
+    return departs, durations, waits
+
+def test_bound_never_exceeds_final_cost():
+    n_vehicles = 80
+    for seed in range(5):
+        departs, durations, waits = _synthetic_trips(n_vehicles, seed)
+        arrivals = departs + durations
+        final = calculate_cost(build_trip_metrics(durations, waits, None, n_vehicles))
+
+        for now in np.arange(60, arrivals.max(), 60):
+            arrived = arrivals <= now
+            running = (departs <= now) & ~arrived
+            # Pending vehicles come from the known vehicle count, not from what SUMO has loaded
+            n_pending = n_vehicles - int(arrived.sum()) - int(running.sum())
+            bound = cost_lower_bound(durations[arrived], waits[arrived], now - departs[running], n_pending)
+            assert bound <= final + 1e-9, (seed, now, bound, final)
+
+def test_bound_of_finished_run_is_its_cost():
+    durations = np.array([100.0, 140.0, 90.0])
+    waits = np.array([10.0, 30.0, 0.0])
+    bound = cost_lower_bound(durations, waits, [], 0)
+    assert np.isclose(bound, calculate_cost(build_trip_metrics(durations, waits, None, 3)))
@@ -0,0 +1,106 @@
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.simplified_traffic import TRAFFIC_PATTERNS, build_edge_sampling_table, categorize_edges, table_probabilities
+
+EXTRA_WEIGHTS = {
+    'perimeter_only_exclusion': {'perimeter_only': 1.0, 'center': 1.0},
+    'no_tickets': {'all': 0.05},           # int(0.05 * 10) == 0 for every edge
+    'unknown_category': {'suburbs': 3.0},
+}
+WEIGHT_CASES = dict(
+    [(f'{name}_{side}', pattern[f'{side}_weights'])
+     for name, pattern in TRAFFIC_PATTERNS.items() for side in ('source', 'sink')],
+    **EXTRA_WEIGHTS
+)
+
+def reference_categories(edges):
+    """The pattern categories as the list-based implementation derived them from grid edge ids."""
+    parsed = [(ord(e[0]) - 65, int(e[1]), ord(e[2]) - 65, int(e[3])) for e in edges]
+    max_row = max(max(sr, er) for sr, _, er, _ in parsed)
+    max_col = max(max(sc, ec) for _, sc, _, ec in parsed)
+
+    def boundary(row, col):
+        return row in (0, max_row) or col in (0, max_col)
+
+    def internal(row, col):
+        return 0 < row < max_row and 0 < col < max_col
+
+    categories = {
+        'all': list(edges),
+        'perimeter': [e for e, (sr, sc, er, ec) in zip(edges, parsed) if boundary(sr, sc) or boundary(er, ec)],
+        'center': [e for e, (sr, sc, er, ec) in zip(edges, parsed) if internal(sr, sc) or internal(er, ec)],
+        'perimeter_only': [e for e, (sr, sc, _, _) in zip(edges, parsed) if boundary(sr, sc)],
+        'center_only': [e for e, (_, _, er, ec) in zip(edges, parsed) if internal(er, ec)],
+        'column_0_only': [e for e, (_, sc, _, _) in zip(edges, parsed) if sc == 0],
+        'rightmost_column_only': [e for e, (_, _, _, ec) in zip(edges, parsed) if ec == max_col],
+    }
+    if not categories['center']:
+        n = len(edges)
+        categories['center'] = edges[n // 3:2 * n // 3] if 2 * n // 3 > n // 3 else [edges[n // 2]]
+    for category, members in categories.items():
+        if not members:
+            categories[category] = list(edges)
+    return categories
+
+def ticket_pool_counts(categories, weights):
+    """Per-edge ticket counts of the pool that repeated each edge int(weight * 10) times."""
+    pool = []
+    for category, weight in weights.items():
+        if category in categories and weight > 0:
+            members = categories[category]
+            if category == 'perimeter_only':
+                exclusive = [e for e in members if e not in categories['center_only'] and e not in categories['center']]
+                if exclusive:
+                    members = exclusive
+            for edge in members:
+                pool.extend([edge] * int(weight * 10))
+    if not pool:
+        for category in ['column_0_only', 'rightmost_column_only', 'perimeter_only', 'center_only']:
+            if categories[category]:
+                pool = list(categories[category])
+                break
+    return Counter(pool)
+
+@pytest.mark.parametrize('size', [4, 2])
+@pytest.mark.parametrize('case', sorted(WEIGHT_CASES))
+def test_table_matches_ticket_pool(grid_net, size, case):
+    weights = WEIGHT_CASES[case]
+    edge_categories = categorize_edges(grid_net(size))
+    edge_ids, probabilities = table_probabilities(build_edge_sampling_table(edge_categories, weights))
+
+    counts = ticket_pool_counts(reference_categories(edge_categories['edges'].tolist()), weights)
+    total = sum(counts.values())
+
+    assert sorted(edge_ids.tolist()) == sorted(counts)
+    for edge, probability in zip(edge_ids.tolist(), probabilities):
+        assert probability == pytest.approx(counts[edge] / total), edge
+
+def test_perimeter_only_excludes_center_edges(grid_net):
+    edge_categories = categorize_edges(grid_net(4))
+    masks = edge_categories['masks']
+    edge_ids, probabilities = table_probabilities(build_edge_sampling_table(edge_categories, {'perimeter_only': 1.0}))
+
+    center = set(edge_categories['edges'][masks['center'] | masks['center_only']].tolist())
+    assert center and not center & set(edge_ids.tolist())
+    assert np.allclose(probabilities, 1.0 / len(edge_ids))
+
+def test_empty_categories_fall_back(grid_net):
+    # A 2x2 grid has no internal junction: center takes the middle third, center_only every edge
+    edge_categories = categorize_edges(grid_net(2))
+    masks = edge_categories['masks']
+    n_edges = len(edge_categories['edges'])
+
+    assert np.flatnonzero(masks['center']).tolist() == list(range(n_edges // 3, 2 * n_edges // 3))
+    assert masks['center_only'].all()
+
+    # Weights without tickets fall back to a uniform draw over column 0
+    edge_ids, probabilities = table_probabilities(build_edge_sampling_table(edge_categories, {'all': 0.05}))
+    assert set(edge_ids.tolist()) == set(edge_categories['edges'][masks['column_0_only']].tolist())
+    assert np.allclose(probabilities, 1.0 / len(edge_ids))
@@ -0,0 +1,66 @@
+import os
+import sys
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.simplified_traffic import (FLOW_SLICE_SECONDS, TRAFFIC_PATTERNS, categorize_edges,
+                                    generate_traffic_pattern, get_edge_sampling_table,
+                                    table_probabilities)
+
+N_VEHICLES = 20000
+SIM_TIME = 1800
+
+def read_demand(path):
+    """(slice index, from, to, number) for every trip or flow of a demand file."""
+    demand = []
+    for elem in ET.parse(path).getroot():
+        if elem.tag == 'trip':
+            demand.append((int(float(elem.get('depart')) // FLOW_SLICE_SECONDS), elem.get('from'), elem.get('to'), 1))
+        elif elem.tag == 'flow':
+            demand.append((int(float(elem.get('begin')) // FLOW_SLICE_SECONDS), elem.get('from'), elem.get('to'),
+                           int(elem.get('number'))))
+    return demand
+
+def totals(demand, field):
+    counts = Counter()
+    for item in demand:
+        counts[item[field]] += item[3]
+    return counts
+
+@pytest.fixture(scope='module')
+def net_file(grid_net):
+    return grid_net(4)
+
+@pytest.mark.parametrize('pattern', sorted(TRAFFIC_PATTERNS))
+def test_flows_keep_summary_statistics_of_trips(net_file, tmp_path, pattern):
+    config = TRAFFIC_PATTERNS[pattern]
+    trips_file, flows_file = str(tmp_path / 'trips.xml'), str(tmp_path / 'flows.xml')
+    assert generate_traffic_pattern(net_file, trips_file, N_VEHICLES, SIM_TIME, config, 42, demand_mode='trips')
+    assert generate_traffic_pattern(net_file, flows_file, N_VEHICLES, SIM_TIME, config, 42, demand_mode='flows')
+    trips, flows = read_demand(trips_file), read_demand(flows_file)
+
+    # Same vehicle count and the same departures per time slice
+    assert sum(flow[3] for flow in flows) == N_VEHICLES
+    assert totals(flows, 0) == totals(trips, 0)
+
+    # Origin and destination shares match the sampling tables and the trips
+    categories = categorize_edges(net_file)
+    n_slices = len(totals(flows, 0))
+    for field, weights in ((1, config['source_weights']), (2, config['sink_weights'])):
+        edge_ids, probabilities = table_probabilities(get_edge_sampling_table(categories, weights))
+        expected = dict(zip(edge_ids.tolist(), N_VEHICLES * probabilities))
+        from_flows, from_trips = totals(flows, field), totals(trips, field)
+        for edge, count in from_flows.items():
+            assert abs(count - expected[edge]) <= n_slices, edge
+        shares = np.array([[from_flows[edge], from_trips[edge]] for edge in expected]) / N_VEHICLES
+        assert 0.5 * np.abs(shares[:, 0] - shares[:, 1]).sum() < 0.05
+
+    # File size follows slices x edges, not vehicles
+    n_edges = len(categories['edges'])
+    assert len(flows) <= n_slices * 2 * n_edges
+    assert len(flows) < N_VEHICLES / 5
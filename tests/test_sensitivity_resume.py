@@ -0,0 +1,104 @@
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+import pytest
+
+matplotlib.use('Agg')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import src.sensitivity_analysis as sensitivity
+from src.sensitivity_analysis import RUN_LOG_NAME, run_sensitivity_analysis
+
+PARAMETER_RANGES = {'n_ants': [5, 10]}
+BASE_CONFIG = {'grid_size': 3, 'n_vehicles': 30}
+N_REPLICATIONS = 2
+TOTAL_RUNS = len(PARAMETER_RANGES['n_ants']) * N_REPLICATIONS
+
+class StubOptimization:
+    """Stand-in for _run_single_optimization that records calls and can fail chosen runs."""
+
+    def __init__(self, fail_seeds=()):
+        self.calls = []
+        self.fail_seeds = set(fail_seeds)
+
+    def __call__(self, config, show_plots=False):
+        self.calls.append((config['n_ants'], config['seed']))
+        if config['seed'] in self.fail_seeds:
+            raise RuntimeError('simulated failure')
+        return {'success': True, 'best_cost': 100.0 - config['n_ants'], 'baseline_cost': 120.0,
+                'improvement_pct': 10.0, 'optimization_time': 0.1}
+
+@pytest.fixture
+def stub(monkeypatch):
+    optimization = StubOptimization()
+    monkeypatch.setattr(sensitivity, '_run_single_optimization', optimization)
+    # Threads instead of processes so the stub and its call log are shared
+    monkeypatch.setattr(sensitivity, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    return optimization
+
+def run(output_dir, base_config=BASE_CONFIG, parallel=False):
+    return run_sensitivity_analysis(PARAMETER_RANGES, base_config, n_replications=N_REPLICATIONS,
+                                    output_dir=str(output_dir), parallel=parallel, show_final_plot=False)
+
+def read_log(output_dir):
+    with open(os.path.join(output_dir, RUN_LOG_NAME)) as f:
+        return f.read().splitlines()
+
+def test_second_call_skips_logged_runs(stub, tmp_path):
+    run(tmp_path)
+    assert len(stub.calls) == TOTAL_RUNS
+
+    stub.calls.clear()
+    results = run(tmp_path)
+
+    assert stub.calls == []
+    assert len(results['results']) == TOTAL_RUNS
+    assert len(read_log(tmp_path)) == TOTAL_RUNS
+
+def test_failed_and_truncated_runs_are_repeated(stub, tmp_path):
+    run(tmp_path)
+    failed_seed = stub.calls[0][1]
+    lines = read_log(tmp_path)
+
+    # First run logged as failed, last line cut short by a crash
+    failed = dict(json.loads(lines[0]), success=False, error='simulated failure')
+    with open(os.path.join(tmp_path, RUN_LOG_NAME), 'w') as f:
+        f.write('\n'.join([json.dumps(failed)] + lines[1:-1] + [lines[-1][:len(lines[-1]) // 2]]))
+
+    stub.calls.clear()
+    run(tmp_path)
+
+    assert len(stub.calls) == 2
+    assert stub.calls[0][1] == failed_seed
+
+    # The repeated runs were logged intact, so a third call has nothing left to do
+    stub.calls.clear()
+    run(tmp_path)
+    assert stub.calls == []
+
+def test_other_base_config_is_not_reused(stub, tmp_path):
+    run(tmp_path)
+
+    stub.calls.clear()
+    run(tmp_path, base_config=dict(BASE_CONFIG, n_vehicles=60))
+
+    assert len(stub.calls) == TOTAL_RUNS
+
+def test_parallel_logs_one_line_per_finished_run(stub, tmp_path):
+    stub.fail_seeds.add(sensitivity._replication_seed({'n_ants': 10}, 1))
+    results = run(tmp_path, parallel=True)
+
+    records = [json.loads(line) for line in read_log(tmp_path)]
+    assert len(records) == TOTAL_RUNS
+    assert sum(record['success'] for record in records) == TOTAL_RUNS - 1
+    assert len({(record['parameters']['n_ants'], record['replication']) for record in records}) == TOTAL_RUNS
+    assert len(results['results']) == TOTAL_RUNS - 1
+
+    # Only the failed run is repeated on resume
+    stub.fail_seeds.clear()
+    stub.calls.clear()
+    run(tmp_path, parallel=True)
+    assert stub.calls == [(10, sensitivity._replication_seed({'n_ants': 10}, 1))]
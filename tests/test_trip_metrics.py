@@ -0,0 +1,75 @@
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.optimization.simple_aco import calculate_cost, parse_statistics_output, parse_tripinfo_file
+from src.utils.tls_utils import parse_tripinfo
+from src.utils.tripinfo_utils import finished_trips, iter_tripinfo_chunks
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+TRIPINFO_FILE = os.path.join(DATA_DIR, 'tripinfo.xml')
+STATISTICS_FILE = os.path.join(DATA_DIR, 'statistics.xml')
+# Statistics mode runs without --tripinfo-output.write-unfinished, so its tripinfo has no arrival="-1" record
+STATISTICS_TRIPINFO_FILE = os.path.join(DATA_DIR, 'tripinfo_statistics_mode.xml')
+
+def test_statistics_mode_matches_tripinfo():
+    from_tripinfo = parse_tripinfo_file(TRIPINFO_FILE, n_vehicles=7)
+    from_statistics = parse_statistics_output(STATISTICS_FILE, STATISTICS_TRIPINFO_FILE, n_vehicles=7)
+
+    for key in ('total_time', 'max_stop', 'wait_p95', 'avg_wait', 'vehicles', 'unfinished'):
+        assert from_statistics[key] == pytest.approx(from_tripinfo[key]), key
+    assert calculate_cost(from_statistics) == pytest.approx(calculate_cost(from_tripinfo))
+
+def test_statistics_fixture_matches_its_tripinfo():
+    # The assumptions parse_statistics_output relies on, checked on the fixture pair
+    root = ET.parse(STATISTICS_FILE).getroot()
+    trip_stats, vehicles = root.find('vehicleTripStatistics'), root.find('vehicles')
+    records = ET.parse(STATISTICS_TRIPINFO_FILE).getroot().findall('tripinfo')
+    durations = [float(record.get('duration')) for record in records]
+
+    assert all(float(record.get('arrival')) >= 0 for record in records)
+    assert int(trip_stats.get('count')) == len(records)
+    assert float(trip_stats.get('totalTravelTime')) == pytest.approx(sum(durations))
+    assert float(trip_stats.get('duration')) == pytest.approx(sum(durations) / len(durations), abs=0.01)
+    waits = [float(record.get('waitingTime')) for record in records]
+    assert float(trip_stats.get('waitingTime')) == pytest.approx(sum(waits) / len(waits), abs=0.01)
+    assert int(vehicles.get('running')) + int(vehicles.get('waiting')) == \
+        int(vehicles.get('loaded')) - int(trip_stats.get('count'))
+
+def test_unfinished_vehicles_are_excluded():
+    metrics = parse_tripinfo_file(TRIPINFO_FILE, n_vehicles=7, with_ids=True)
+
+    assert metrics['vehicles'] == 6
+    assert metrics['unfinished'] == 1
+    assert metrics['total_time'] == pytest.approx(819.0)
+    assert metrics['max_stop'] == pytest.approx(48.0)
+    assert metrics['avg_wait'] == pytest.approx(18.5)
+    assert metrics['completed_ids'] == [f'veh_{i}' for i in range(6)]
+
+def test_missing_statistics_file_fails_the_evaluation():
+    metrics = parse_statistics_output(os.path.join(DATA_DIR, 'missing.xml'), TRIPINFO_FILE, n_vehicles=7)
+
+    assert metrics['total_time'] == float('inf')
+    assert metrics['vehicles'] == 0
+    assert 'unfinished' in metrics
+
+def test_unfinished_vehicles_raise_the_cost():
+    metrics = parse_tripinfo_file(TRIPINFO_FILE, n_vehicles=7)
+    all_arrived = dict(metrics, unfinished=0)
+
+    assert calculate_cost(metrics) > calculate_cost(all_arrived)
+
+def test_chunks_cover_every_trip():
+    chunks = list(iter_tripinfo_chunks(TRIPINFO_FILE, chunk_size=3, with_ids=True))
+
+    assert [len(chunk) for chunk, _ in chunks] == [3, 3, 1]
+    assert [vehicle_id for _, ids in chunks for vehicle_id in ids] == [f'veh_{i}' for i in range(7)]
+    assert sum(int(finished_trips(chunk).sum()) for chunk, _ in chunks) == 6
+    assert parse_tripinfo(TRIPINFO_FILE) == pytest.approx(819.0 + 300.0)
+
+def test_vehicle_ids_only_on_request():
+    assert 'completed_ids' not in parse_tripinfo_file(TRIPINFO_FILE, n_vehicles=7)